@@ -2,36 +2,49 @@
 import streamlit as st
 from datetime import date, time, datetime, timedelta
 from urllib.parse import quote
-import pandas as pd
-import re
+from functools import partial
+from phone_utils import format_br_phone, sanitize_br_phone
 
-from database import listar_registros, inserir_registro, atualizar_registro, excluir_registro
+from database import (
+    supabase, listar_registros, inserir_registro, atualizar_registro, excluir_registro, excluir_registros,
+    buscar_em_paralelo, contar, atualizar_status_agenda, _rpc_inexistente,
+)
 from utils_layout import whatsapp_icon
+from utils_ui import show_logo
+from streamlit_sortables import sort_items
+from calendario import CalendarioTrabalho, carregar_excecoes
+from disponibilidade import (
+    _as_time, _weekday_pt, grade_disponibilidade, buscar_primeiros_horarios,
+    verificar_conflito, erro_de_conflito,
+)
+from recorrencia import (
+    FREQUENCIAS, MAX_OCORRENCIAS, expandir, planejar, agendamentos_no_periodo, criar_serie,
+    serie_do_atendimento, atualizar_futuras,
+)
 
 STATUS = ["Pendente", "Confirmado", "Concluído", "Cancelado"]
 FORM_NS = "agenda_form_v"
-
-# ----------------------
-# Utilidades telefone
-# ----------------------
-def _digits_only(s: str | None) -> str:
-    return re.sub(r"\D", "", s or "")
-
-def _format_phone_br(s: str | None) -> str:
-    d = _digits_only(s)
-    # (DD) 9XXXX-XXXX (11 dígitos) ou (DD) XXXX-XXXX (10 dígitos)
-    if len(d) >= 11:
-        return f"({d[:2]}) {d[2:7]}-{d[7:11]}"
-    if len(d) == 10:
-        return f"({d[:2]}) {d[2:6]}-{d[6:10]}"
-    if len(d) >= 2:
-        return f"({d[:2]}) {d[2:]}"
-    return d
+SEM_REPETICAO = "Não repetir"
+
+# Projeções de ag_agenda: só o que cada aba realmente usa
+COLS_KANBAN = [
+    "id", "profissional_id", "cliente_id", "cliente_nome", "cliente_telefone",
+    "data_atendimento", "hora_inicio", "hora_fim", "status", "observacoes",
+]
+# Kanban: janela padrão e tamanho da página por coluna
+KANBAN_DIAS_ANTES = 7
+KANBAN_DIAS_DEPOIS = 30
+KANBAN_PAGINA = 20
+
+COLS_DISPONIBILIDADE = [
+    "profissional_id", "data_atendimento", "hora_inicio", "hora_fim",
+    "cliente_nome", "status", "observacoes",
+]
 
 def _header():
     col_logo, col_title = st.columns([1, 6])
     with col_logo:
-        st.image("start.png", width=80)
+        show_logo(width=80)
     with col_title:
         st.markdown("<h2>Agenda</h2>", unsafe_allow_html=True)
 
@@ -50,8 +63,11 @@ def _v() -> int:
 def _k(name: str) -> str:
     return f"{FORM_NS}_{name}_{_v()}"
 
+MSG_CONFLITO = "Conflito de horário: a capacidade simultânea já está ocupada nesse intervalo."
+
 @st.dialog("Editar Atendimento")
-def modal_editar(item):
+def modal_editar(item, capacidade: int = 1):
+    serie_id = serie_do_atendimento(item["id"])
     with st.form(f"form_edit_ag_{item['id']}"):
         cliente_nome = st.text_input("Cliente", value=item.get("cliente_nome", ""))
         tel_raw = st.text_input(
@@ -61,7 +77,7 @@ def modal_editar(item):
             help="Digite apenas números ou no formato (DD) 9XXXX-XXXX"
         )
         # Mostra pré-visualização formatada
-        tel_preview = _format_phone_br(tel_raw)
+        tel_preview = format_br_phone(tel_raw)
         if tel_preview and tel_preview != tel_raw:
             st.caption(f"Formatado: {tel_preview}")
 
@@ -70,23 +86,140 @@ def modal_editar(item):
         hora_fim = st.time_input("Hora fim", value=time.fromisoformat(item.get("hora_fim")))
         status = st.selectbox("Status", STATUS, index=STATUS.index(item.get("status", "Pendente")))
         observacoes = st.text_area("Observações", value=item.get("observacoes", ""))
+        aplicar_serie = bool(serie_id) and st.checkbox(
+            "Aplicar também às próximas ocorrências da série",
+            help="Horário, status, cliente e observações; a data muda só neste atendimento.",
+        )
         salvar = st.form_submit_button("Salvar")
     if salvar:
-        telefone_fmt = _format_phone_br(tel_raw)
-        atualizar_registro("ag_agenda", item["id"], {
+        prof_id = item.get("profissional_id") or st.session_state.get("user", {}).get("id")
+        if verificar_conflito(
+            prof_id, data_atendimento, hora_inicio, hora_fim, capacidade, status, ignorar_id=item["id"],
+        ):
+            st.error(MSG_CONFLITO)
+            return
+        telefone_fmt = format_br_phone(tel_raw)
+        payload = {
             "cliente_nome": cliente_nome,
             "cliente_telefone": telefone_fmt,  # mantém salvo formatado como antes
-            "data_atendimento": str(data_atendimento),
             "hora_inicio": str(hora_inicio),
             "hora_fim": str(hora_fim),
             "status": status,
             "observacoes": observacoes,
-        })
+        }
+        try:
+            if aplicar_serie:
+                # um UPDATE para a série inteira a partir deste atendimento
+                n, recusadas = atualizar_futuras(
+                    prof_id, serie_id, date.fromisoformat(item.get("data_atendimento")), payload, capacidade,
+                )
+                if recusadas:
+                    st.error(MSG_CONFLITO + " Datas: " + ", ".join(d.strftime("%d/%m/%Y") for d, _ in recusadas))
+                    return
+                if str(data_atendimento) != item.get("data_atendimento"):
+                    atualizar_registro("ag_agenda", item["id"], {"data_atendimento": str(data_atendimento)})
+            else:
+                atualizar_registro("ag_agenda", item["id"], {**payload, "data_atendimento": str(data_atendimento)})
+        except Exception as e:
+            if erro_de_conflito(e):
+                st.error(MSG_CONFLITO)
+                return
+            raise
         st.success("Atualizado!")
         st.rerun()
 
+# ----------------------
+# Utilidades Tab 2 (kanban em janela)
+# ----------------------
+def _contagens_status(prof_id: str, ini: date, fim: date) -> dict:
+    """
+    {status: (total no histórico, total no período)} numa única RPC sobre o rollup
+    diário (sql/005_contagem_status.sql). Sem a função no banco, usa contagens exatas.
+    """
+    try:
+        res = supabase.rpc(
+            "ag_contagem_status",
+            {"p_profissional_id": prof_id, "p_ini": str(ini), "p_fim": str(fim)},
+        ).execute()
+        return {r["status"]: (int(r["total"]), int(r["total_periodo"])) for r in (res.data or [])}
+    except Exception as e:
+        if not _rpc_inexistente(e):
+            raise
+    consultas = {}
+    for stt in STATUS:
+        filtros = {"profissional_id": prof_id, "status": stt}
+        consultas[(stt, "geral")] = partial(contar, "ag_agenda", filtros)
+        consultas[(stt, "periodo")] = partial(
+            contar, "ag_agenda", filtros, gte={"data_atendimento": ini}, lte={"data_atendimento": fim}
+        )
+    r = buscar_em_paralelo(consultas)
+    return {stt: (r[(stt, "geral")], r[(stt, "periodo")]) for stt in STATUS}
+
+def _kanban_chave(stt: str, ini: date, fim: date) -> str:
+    return f"kanban_lim_{stt}_{ini}_{fim}"
+
+def _kanban_limite(stt: str, ini: date, fim: date) -> int:
+    return int(st.session_state.get(_kanban_chave(stt, ini, fim), KANBAN_PAGINA))
+
+def _carregar_coluna(prof_id: str, stt: str, ini: date, fim: date, limite: int) -> list:
+    return listar_registros(
+        "ag_agenda",
+        {"profissional_id": prof_id, "status": stt},
+        colunas=COLS_KANBAN,
+        gte={"data_atendimento": ini},
+        lte={"data_atendimento": fim},
+        order="data_atendimento",
+        limit=limite,
+    )
+
+def _rotulo_card(a: dict) -> str:
+    # o id no fim garante rótulos únicos (o componente trabalha só com strings)
+    return f"{a.get('cliente_nome') or '(sem nome)'} • {a.get('data_atendimento')} {str(a.get('hora_inicio'))[:5]} #{a['id']}"
+
+def _kanban_arrastar(prof_id: str, dados_por_status: dict):
+    """
+    Quadro arrastar e soltar: os movimentos ficam pendentes até "Salvar", que grava
+    todas as mudanças de status numa única chamada e faz um único rerun.
+    """
+    ver = st.session_state.get("kanban_dnd_v", 0)
+    origem, por_rotulo, containers = {}, {}, []
+    for stt in STATUS:
+        rotulos = []
+        for a in dados_por_status.get(stt, []):
+            r = _rotulo_card(a)
+            rotulos.append(r)
+            origem[r] = stt
+            por_rotulo[r] = a
+        containers.append({"header": stt, "items": rotulos})
+
+    arranjo = sort_items(containers, multi_containers=True, key=f"kanban_dnd_{ver}")
+
+    mudancas = {}
+    for cont in arranjo:
+        for r in cont["items"]:
+            if r in por_rotulo and origem[r] != cont["header"]:
+                mudancas[por_rotulo[r]["id"]] = cont["header"]
+
+    c1, c2, _ = st.columns([2, 1, 3])
+    salvar = c1.button(f"💾 Salvar alterações ({len(mudancas)})", type="primary", disabled=not mudancas, key="kanban_dnd_salvar")
+    descartar = c2.button("Descartar", disabled=not mudancas, key="kanban_dnd_descartar")
+    if salvar:
+        try:
+            n = atualizar_status_agenda(prof_id, mudancas)
+        except Exception as e:
+            if not erro_de_conflito(e):
+                raise
+            st.error(MSG_CONFLITO + " Nenhuma alteração foi gravada.")
+            return
+        st.session_state["kanban_dnd_v"] = ver + 1
+        st.toast(f"{n} atendimento(s) atualizados")
+        st.rerun()
+    if descartar:
+        st.session_state["kanban_dnd_v"] = ver + 1
+        st.rerun()
+
 def _whatsapp_link(nome_prof: str, tel: str, data_str: str, hora_ini: str):
-    num = (tel or "").replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+    num = sanitize_br_phone(tel)
     msg = (
         f"Aqui é {nome_prof}, você tem um horário agendado em {data_str} às {hora_ini} hrs.\n"
         f"Por Favor, responda : 1 - Confirmar / 2 - Cancelar"
@@ -96,63 +229,6 @@ def _whatsapp_link(nome_prof: str, tel: str, data_str: str, hora_ini: str):
 # ----------------------
 # Utilidades Tab 3
 # ----------------------
-def _to_dt(d: date, t: time) -> datetime:
-    return datetime.combine(d, t)
-
-def _overlaps(a_ini: datetime, a_fim: datetime, b_ini: datetime, b_fim: datetime) -> bool:
-    # intervalo [início, fim)
-    return (a_ini < b_fim) and (a_fim > b_ini)
-
-def _weekday_iso(d: date) -> int:
-    # ISO: Monday=1 ... Sunday=7
-    return (d.weekday() + 1)
-
-def _weekday_pt(d: date) -> str:
-    nomes = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
-    return nomes[d.weekday()]
-
-def _feriados_fixos_br(ano: int) -> set[date]:
-    base = [
-        (1, 1),   # Confraternização Universal
-        (4, 21),  # Tiradentes
-        (5, 1),   # Dia do Trabalho
-        (9, 7),   # Independência
-        (10, 12), # N. Sra. Aparecida
-        (11, 2),  # Finados
-        (11, 15), # Proclamação da República
-        (12, 25), # Natal
-    ]
-    return {date(ano, m, d) for (m, d) in base}
-
-def _dia_permitido(d: date, prof: dict) -> bool:
-    ds = (prof.get("dias_semana") or "").strip()
-    if ds:
-        permitidos = {int(x) for x in ds.split(",") if x.strip().isdigit()}
-        return _weekday_iso(d) in permitidos
-    wd = _weekday_iso(d)
-    if wd in {1, 2, 3, 4, 5}:
-        return True
-    if wd == 6:
-        return bool(prof.get("aceita_sabado"))
-    if wd == 7:
-        return bool(prof.get("aceita_domingo"))
-    return True
-
-def _as_time(prof: dict | None, field: str, default: time | None) -> time | None:
-    if not prof:
-        return default
-    val = prof.get(field)
-    if not val:
-        return default
-    try:
-        s = str(val)
-        if len(s) == 5:
-            s += ":00"
-        hh, mm, ss = map(int, s.split(":"))
-        return time(hh, mm, ss)
-    except Exception:
-        return default
-
 def _build_grade_disponibilidade(
     dados_agenda: list,
     prof: dict,
@@ -167,88 +243,19 @@ def _build_grade_disponibilidade(
     almoco_fim: time | None,
     considerar_feriados: bool,
     capacidade: int,
-) -> pd.DataFrame:
-    rows = []
-
-    idx = {}
-    for a in dados_agenda:
-        if str(a.get("profissional_id")) != str(prof_id):
-            continue
-        try:
-            d = date.fromisoformat(a.get("data_atendimento"))
-            if not (data_ini <= d <= data_fim):
-                continue
-            hi = time.fromisoformat(a.get("hora_inicio"))
-            hf = time.fromisoformat(a.get("hora_fim"))
-        except Exception:
-            continue
-        idx.setdefault(d, []).append({
-            "ini": _to_dt(d, hi),
-            "fim": _to_dt(d, hf),
-            "cliente": a.get("cliente_nome", ""),
-            "status": a.get("status", ""),
-            "obs": a.get("observacoes", "")
-        })
-
-    feriados = set()
-    if considerar_feriados:
-        for an in {data_ini.year, data_fim.year}:
-            feriados |= _feriados_fixos_br(an)
-
-    dia = data_ini
-    while dia <= data_fim:
-        if not _dia_permitido(dia, prof):
-            dia += timedelta(days=1)
-            continue
-        if considerar_feriados and dia in feriados:
-            dia += timedelta(days=1)
-            continue
-
-        slot_ini = _to_dt(dia, jornada_ini)
-        jornada_f = _to_dt(dia, jornada_fim)
-
-        while slot_ini < jornada_f:
-            slot_fim = slot_ini + timedelta(minutes=int(slot_min))
-            if slot_fim > jornada_f:
-                break
-
-            if almoco_ini and almoco_fim:
-                a_ini = _to_dt(dia, almoco_ini)
-                a_fim = _to_dt(dia, almoco_fim)
-                if _overlaps(slot_ini, slot_fim, a_ini, a_fim):
-                    slot_ini = max(slot_fim, a_fim)
-                    continue
-
-            sobrepos = 0
-            det_cliente = det_status = det_obs = ""
-            for ag in idx.get(dia, []):
-                if _overlaps(slot_ini, slot_fim, ag["ini"], ag["fim"]):
-                    sobrepos += 1
-                    if not det_cliente:
-                        det_cliente, det_status, det_obs = ag["cliente"], ag["status"], ag["obs"]
-
-            situacao = "Disponível" if sobrepos < int(capacidade or 1) else "Ocupado"
-
-            rows.append({
-                "Data": dia.strftime("%Y-%m-%d"),
-                "Dia Semana": _weekday_pt(dia),
-                "Horário": f"{slot_ini.strftime('%H:%M')} - {slot_fim.strftime('%H:%M')}",
-                "Situação": situacao,
-                "Cliente": det_cliente if situacao == "Ocupado" else "",
-                "Status Atendimento": det_status if situacao == "Ocupado" else "",
-                "Obs.": det_obs if situacao == "Ocupado" else "",
-            })
-
-            slot_ini = slot_fim + timedelta(minutes=int(buffer_min or 0))
-
-        dia += timedelta(days=1)
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df["__d"] = pd.to_datetime(df["Data"])
-        df["__h"] = df["Horário"].str.slice(0, 5)
-        df = df.sort_values(["__d", "__h"]).drop(columns=["__d", "__h"])
-    return df
+    calendario: CalendarioTrabalho | None = None,
+) -> "pandas.DataFrame":
+    # pandas só é carregado quando a grade é montada, não na importação do módulo
+    import pandas as pd
+
+    # o motor (disponibilidade.py) já devolve as linhas ordenadas por data/horário
+    rows = grade_disponibilidade(
+        dados_agenda, prof, prof_id, data_ini, data_fim,
+        jornada_ini, jornada_fim, slot_min, buffer_min,
+        almoco_ini, almoco_fim, considerar_feriados, capacidade,
+        calendario=calendario,
+    )
+    return pd.DataFrame(rows)
 
 # ----------------------
 # RENDER
@@ -267,15 +274,25 @@ def render():
         st.toast("✅ Agenda inserida com sucesso!", icon="🎉")
         st.success("Agenda inserida com sucesso!")
         del st.session_state["flash_agenda_ok"]
-
-    profissional = _carregar_profissional(prof_id)
-    dados = listar_registros("ag_agenda", {"profissional_id": prof_id})
+    if st.session_state.get("flash_agenda_serie"):
+        criadas, puladas = st.session_state.pop("flash_agenda_serie")
+        st.success(f"Série criada com {criadas} atendimento(s).")
+        if puladas:
+            st.warning("Datas puladas: " + "; ".join(puladas))
+
+    # leituras independentes saem juntas: a página espera só pela mais lenta
+    lote = buscar_em_paralelo({
+        "profissional": partial(_carregar_profissional, prof_id),
+        "clientes": partial(_carregar_clientes, prof_id),
+    })
+    profissional = lote["profissional"]
+    capacidade = int((profissional or {}).get("capacidade_simultanea") or 1)
 
     tab1, tab2, tab3 = st.tabs(["📝 Agendar", "📊 Dashboard", "🗓️ Disponibilidade"])
 
     # ---------------- TAB 1: Agendar ----------------
     with tab1:
-        clientes = _carregar_clientes(prof_id)
+        clientes = lote["clientes"]
         nomes = [c.get("nome", "") for c in clientes]
         mapa_nome_cli = {c.get("nome", ""): c for c in clientes}
 
@@ -304,6 +321,23 @@ def render():
                 )
                 status = st.selectbox("Status", STATUS, index=0, key=_k("status"))
 
+            r1, r2, r3 = st.columns(3)
+            with r1:
+                repetir = st.selectbox("Repetir", [SEM_REPETICAO] + list(FREQUENCIAS), key=_k("rep"))
+            with r2:
+                rep_ate = st.date_input(
+                    "Repetir até", value=date.today() + timedelta(days=90), key=_k("rep_ate")
+                )
+            with r3:
+                rep_qtd = st.number_input(
+                    "Nº de ocorrências", min_value=0, max_value=MAX_OCORRENCIAS, value=0, step=1,
+                    key=_k("rep_qtd"), help="0 = repetir até a data informada",
+                )
+            pular_ocupadas = st.checkbox(
+                "Pular datas ocupadas ou sem expediente", value=True, key=_k("rep_pular"),
+                help="Desmarcado, a série só é criada se todas as datas estiverem livres.",
+            )
+
             enviar = st.form_submit_button("Incluir", type="primary")
 
         if enviar:
@@ -318,18 +352,73 @@ def render():
 
             hi = datetime.combine(data_atendimento, hora_inicio)
             hf = hi + timedelta(minutes=int(dur))
-
-            inserir_registro("ag_agenda", {
+            base = {
                 "profissional_id": prof_id,
                 "cliente_id": int(cli["id"]),
                 "cliente_nome": cli.get("nome", ""),
-                "cliente_telefone": _format_phone_br(cli.get("telefone", "")),
-                "data_atendimento": str(data_atendimento),
+                "cliente_telefone": format_br_phone(cli.get("telefone", "")),
                 "hora_inicio": str(hora_inicio),
                 "hora_fim": str(hf.time()),
                 "status": status,
                 "observacoes": observacoes,
-            })
+            }
+
+            if repetir != SEM_REPETICAO:
+                freq, intervalo = FREQUENCIAS[repetir]
+                qtd = int(rep_qtd) or None
+                datas = expandir(data_atendimento, freq, intervalo, ate=None if qtd else rep_ate, quantidade=qtd)
+                if not datas:
+                    st.error("A data final da repetição deve ser igual ou posterior à data do atendimento.")
+                    st.stop()
+                # uma leitura da agenda e uma do calendário para o período todo da série
+                existentes = agendamentos_no_periodo(prof_id, datas[0], datas[-1])
+                calendario = CalendarioTrabalho(
+                    profissional or {"id": prof_id}, carregar_excecoes([prof_id], datas[0], datas[-1])
+                )
+                livres, recusadas = planejar(datas, hora_inicio, hf.time(), capacidade, existentes, calendario)
+                puladas = [f"{d.strftime('%d/%m/%Y')} ({motivo})" for d, motivo in recusadas]
+                if recusadas and not pular_ocupadas:
+                    st.error("Datas indisponíveis: " + "; ".join(puladas))
+                    st.stop()
+                if not livres:
+                    st.error("Nenhuma data livre para a série.")
+                    st.stop()
+                try:
+                    criar_serie(
+                        {
+                            "profissional_id": prof_id,
+                            "cliente_id": int(cli["id"]),
+                            "frequencia": freq,
+                            "intervalo": intervalo,
+                            "data_inicio": data_atendimento,
+                            "data_fim": None if qtd else rep_ate,
+                            "ocorrencias": qtd,
+                            "hora_inicio": str(hora_inicio),
+                            "hora_fim": str(hf.time()),
+                        },
+                        base,
+                        livres,
+                    )
+                except Exception as e:
+                    if erro_de_conflito(e):
+                        st.error(MSG_CONFLITO)
+                        st.stop()
+                    raise
+                st.session_state["flash_agenda_serie"] = (len(livres), puladas)
+                st.session_state[FORM_NS] = _v() + 1
+                st.rerun()
+
+            if verificar_conflito(prof_id, data_atendimento, hora_inicio, hf.time(), capacidade, status):
+                st.error(MSG_CONFLITO)
+                st.stop()
+
+            try:
+                inserir_registro("ag_agenda", {**base, "data_atendimento": str(data_atendimento)})
+            except Exception as e:
+                if erro_de_conflito(e):
+                    st.error(MSG_CONFLITO)
+                    st.stop()
+                raise
             st.session_state["flash_agenda_ok"] = True
             st.session_state[FORM_NS] = _v() + 1
             st.rerun()
@@ -393,11 +482,28 @@ def render():
         """, unsafe_allow_html=True)
         # --- FIM CSS ---
 
+        hoje_k = date.today()
+        periodo = st.date_input(
+            "Período do kanban",
+            value=(hoje_k - timedelta(days=KANBAN_DIAS_ANTES), hoje_k + timedelta(days=KANBAN_DIAS_DEPOIS)),
+            key="kanban_periodo",
+        )
+        if isinstance(periodo, (tuple, list)):
+            k_ini = periodo[0] if periodo else hoje_k
+            k_fim = periodo[1] if len(periodo) > 1 else k_ini
+        else:
+            k_ini = k_fim = periodo
+
+        contagens = _contagens_status(prof_id, k_ini, k_fim)
+        limites = {stt: _kanban_limite(stt, k_ini, k_fim) for stt in STATUS}
+        # uma consulta por coluna, limitada ao período e à página atual, todas em paralelo
+        dados_por_status = buscar_em_paralelo({
+            stt: partial(_carregar_coluna, prof_id, stt, k_ini, k_fim, limites[stt]) for stt in STATUS
+        })
+
         st.subheader("Resumo da Agenda")
-        total = len(dados)
-        por_status = {s: 0 for s in STATUS}
-        for a in dados:
-            por_status[a.get("status", "Pendente")] = por_status.get(a.get("status", "Pendente"), 0) + 1
+        por_status = {s: contagens.get(s, (0, 0))[0] for s in STATUS}
+        total = sum(v[0] for v in contagens.values())
 
         # Wrapper opcional — não é necessário para o CSS, mas não atrapalha
         st.markdown("<div id='kpi-wrap'>", unsafe_allow_html=True)
@@ -411,18 +517,17 @@ def render():
 
         st.divider()
         st.subheader("Atendimentos por Status (Kanban)")
+        st.caption(f"{k_ini.strftime('%d/%m/%Y')} a {k_fim.strftime('%d/%m/%Y')}")
 
-        dados_por_status = {s: [] for s in STATUS}
-        for a in dados:
-            s = a.get("status", "Pendente")
-            if s not in dados_por_status:
-                s = "Pendente"
-            dados_por_status[s].append(a)
-
-        cols = st.columns(4)
+        if st.toggle("Arrastar e soltar", key="kanban_dnd", help="Mova vários cards entre as colunas e grave tudo de uma vez."):
+            _kanban_arrastar(prof_id, dados_por_status)
+            cols = []  # no modo arrastar, as colunas com botões por card não são desenhadas
+        else:
+            cols = st.columns(4)
         for stt, col in zip(STATUS, cols):
+            no_periodo = contagens.get(stt, (0, 0))[1]
             with col:
-                st.markdown(f"<div class='kanban-title {stt.lower()}'>{stt}</div>", unsafe_allow_html=True)
+                st.markdown(f"<div class='kanban-title {stt.lower()}'>{stt} ({no_periodo})</div>", unsafe_allow_html=True)
                 for a in dados_por_status[stt]:
                     with st.container(border=True):
                         st.write(f"**{a['cliente_nome']}**")
@@ -436,9 +541,15 @@ def render():
                         novo_status = m1.selectbox("Mover para", options=destinos, key=f"mv_to_{a['id']}")
                         mover = m2.button("🔀", key=f"mv_btn_{a['id']}", help="Alterar o status deste atendimento para a coluna selecionada")
                         if mover:
-                            atualizar_registro("ag_agenda", a["id"], {"status": novo_status})
-                            st.success(f"Movido para {novo_status}")
-                            st.rerun()
+                            try:
+                                atualizar_registro("ag_agenda", a["id"], {"status": novo_status})
+                            except Exception as e:
+                                if not erro_de_conflito(e):
+                                    raise
+                                st.error(MSG_CONFLITO)
+                            else:
+                                st.success(f"Movido para {novo_status}")
+                                st.rerun()
 
                         # Ações secundárias (mantidas com ícones)
                         st.markdown("<div class='kanban-actions'>", unsafe_allow_html=True)
@@ -453,19 +564,23 @@ def render():
                         st.markdown("</div>", unsafe_allow_html=True)
 
                         if edit:
-                            modal_editar(a)
+                            modal_editar(a, capacidade)
                         if delete:
                             if st.session_state.get(f"confirm_ag_{a['id']}") != True:
                                 st.session_state[f"confirm_ag_{a['id']}"] = True
                                 st.warning("Clique novamente para confirmar.")
                             else:
-                                dependentes = listar_registros("ag_servicos", {"agenda_id": a["id"]})
-                                for dd in dependentes:
-                                    excluir_registro("ag_servicos", dd["id"])
+                                excluir_registros("ag_servicos", {"agenda_id": a["id"]})
                                 excluir_registro("ag_agenda", a["id"])
                                 st.success("Excluído!")
                                 st.rerun()
 
+                carregados = len(dados_por_status[stt])
+                if carregados < no_periodo:
+                    if st.button(f"Carregar mais ({no_periodo - carregados})", key=f"kanban_mais_{stt}", use_container_width=True):
+                        st.session_state[_kanban_chave(stt, k_ini, k_fim)] = limites[stt] + KANBAN_PAGINA
+                        st.rerun()
+
     # ---------------- TAB 3: Disponibilidade ----------------
     with tab3:
         st.subheader("Disponibilidade por Período")
@@ -528,8 +643,16 @@ def render():
             st.error("O fim do almoço deve ser maior que o início.")
             st.stop()
 
+        # só os atendimentos do período visível, com as colunas usadas na grade
+        dados_periodo = listar_registros(
+            "ag_agenda",
+            {"profissional_id": prof_id},
+            colunas=COLS_DISPONIBILIDADE,
+            gte={"data_atendimento": dt_ini},
+            lte={"data_atendimento": dt_fim},
+        )
         df = _build_grade_disponibilidade(
-            dados_agenda=dados,
+            dados_agenda=dados_periodo,
             prof=profissional or {},
             prof_id=str(prof_id),
             data_ini=dt_ini,
@@ -542,6 +665,11 @@ def render():
             almoco_fim=almoco_fim,
             considerar_feriados=considerar_feriados,
             capacidade=int(cap_sim),
+            calendario=CalendarioTrabalho(
+                profissional or {"id": prof_id},
+                carregar_excecoes([prof_id], dt_ini, dt_fim),
+                considerar_feriados=considerar_feriados,
+            ),
         )
 
         if not df.empty:
@@ -608,3 +736,34 @@ def render():
             )
         else:
             st.info("Nenhum horário encontrado para o período configurado.")
+
+        # ---- Busca entre todos os profissionais (recepção) ----
+        st.divider()
+        with st.expander("🔎 Primeiro horário livre — todos os profissionais"):
+            b1, b2, b3 = st.columns(3)
+            with b1:
+                busca_dur = st.number_input("Duração (min)", min_value=5, step=5, value=60, key="busca_livre_dur")
+            with b2:
+                busca_dias = st.number_input("Próximos dias", min_value=1, max_value=365, step=1, value=30, key="busca_livre_dias")
+            with b3:
+                busca_k = st.number_input("Quantos horários", min_value=1, max_value=50, step=1, value=5, key="busca_livre_k")
+            if st.button("Buscar horários", key="busca_livre_btn"):
+                achados = buscar_primeiros_horarios(
+                    inicio=datetime.now().replace(second=0, microsecond=0),
+                    dias=int(busca_dias),
+                    duracao_min=int(busca_dur),
+                    k=int(busca_k),
+                )
+                if achados:
+                    st.dataframe(
+                        [{
+                            "Profissional": h["profissional"],
+                            "Data": h["data"].strftime("%Y-%m-%d"),
+                            "Dia Semana": _weekday_pt(h["data"]),
+                            "Horário": f"{h['hora_inicio'].strftime('%H:%M')} - {h['hora_fim'].strftime('%H:%M')}",
+                        } for h in achados],
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+                else:
+                    st.info("Nenhum horário livre encontrado no período.")
@@ -1,8 +1,10 @@
 # app.py
-from pathlib import Path
+import importlib
 import streamlit as st
 from streamlit_option_menu import option_menu
-from auth import validar_login
+from auth import validar_login, usuario_do_token, token_para, LoginBloqueado, SESSAO_HORAS
+from database import estatisticas_cache
+from utils_ui import show_logo, inject_css
 
 # =========================
 # Configuração inicial
@@ -33,17 +35,10 @@ st.markdown(
 )
 
 # =========================
-# CSS global (carrega style.css caso exista)
+# CSS global (style.css minificado, lido uma vez por processo e relido só se mudar)
 # =========================
 def inject_global_css(path: str = "style.css"):
-    p = Path(path)
-    if not p.exists():
-        return
-    try:
-        css = p.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        css = p.read_text(encoding="latin-1", errors="ignore")
-    st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+    inject_css(path)
 
 inject_global_css()
 
@@ -69,6 +64,70 @@ def _get_debug_flag() -> bool:
 
 DEBUG = _get_debug_flag()
 
+# =========================
+# Sessão persistente (token assinado num cookie)
+# =========================
+# O token não vai na URL: ficaria no histórico do navegador e em qualquer link
+# copiado. O Streamlit só lê cookies (st.context.cookies, que reflete os cookies
+# da conexão); a gravação é feita por um script num iframe de 1px.
+COOKIE_SESSAO = "agenda_sessao"
+PARAM_SESSAO = "sessao"  # versões antigas punham o token na URL
+
+def _cookie_sessao():
+    try:
+        valor = st.context.cookies.get(COOKIE_SESSAO)  # Streamlit 1.37+
+    except Exception:
+        return None
+    return valor if isinstance(valor, str) else None
+
+def _gravar_cookie(valor: str, max_age: int):
+    try:
+        seguro = "; Secure" if str(st.context.url or "").startswith("https") else ""
+    except Exception:
+        seguro = ""
+    # valor é o token (base64url e ".") ou vazio: nada que escape da string JS
+    script = (
+        "<script>window.parent.document.cookie = "
+        f"'{COOKIE_SESSAO}={valor}; Max-Age={int(max_age)}; Path=/; SameSite=Strict{seguro}';</script>"
+    )
+    if hasattr(st, "iframe"):
+        st.iframe(script, height=1)  # 0 não é aceito
+    else:
+        import streamlit.components.v1 as components  # versões anteriores
+        components.html(script, height=0)
+
+def _restaurar_sessao():
+    # token antigo na URL: some da barra de endereço e não é aceito
+    if PARAM_SESSAO in st.query_params:
+        del st.query_params[PARAM_SESSAO]
+    # um reload do navegador zera o session_state; o cookie evita novo login (e novo bcrypt)
+    if st.session_state.user or st.session_state.get("sessao_encerrada"):
+        return
+    token = _cookie_sessao()
+    if not token:
+        return
+    try:
+        u = usuario_do_token(token)
+    except Exception:
+        u = None
+    if u:
+        st.session_state.user = u
+    else:
+        st.session_state.sessao_encerrada = True  # cookie vencido/inválido: apaga na tela de login
+
+def _sincronizar_cookie():
+    # roda depois do st.rerun do login/logout, quando o componente chega de fato ao navegador
+    token = st.session_state.pop("token_sessao", None)
+    if token:
+        _gravar_cookie(token, 3600 * SESSAO_HORAS)
+    elif st.session_state.get("sessao_encerrada") and _cookie_sessao():
+        # os cookies da conexão não mudam até o reload: a flag impede restaurar de novo
+        _gravar_cookie("", 0)
+
+def _encerrar_sessao():
+    st.session_state.user = None
+    st.session_state.sessao_encerrada = True
+
 # =========================
 # Tela de Login (ajustada no topo)
 # =========================
@@ -84,7 +143,7 @@ def tela_login():
 
         c1, c2 = st.columns([1, 3])
         with c1:
-            st.image("start.png", use_container_width=True)
+            show_logo(width=None)
         with c2:
             st.markdown(
                 "<h1 class='titulo-app' style='margin-top:6px'>Agenda Profissional</h1>"
@@ -102,6 +161,9 @@ def tela_login():
     if logar:
         try:
             u = validar_login(email, senha)
+        except LoginBloqueado as e:
+            st.error(str(e))
+            return
         except Exception as e:
             st.error("Erro durante validação de login.")
             if DEBUG:
@@ -109,6 +171,11 @@ def tela_login():
             return
         if u:
             st.session_state.user = u
+            st.session_state.sessao_encerrada = False
+            try:
+                st.session_state.token_sessao = token_para(u)
+            except Exception:
+                pass  # sem token a sessão só não sobrevive ao reload
             st.rerun()
         else:
             st.error("Credenciais inválidas, inativas ou licença expirada.")
@@ -120,7 +187,7 @@ def sidebar_menu(is_admin: bool) -> str:
     with st.sidebar:
         # Cabeçalho visual
         st.markdown("<div class='sidebar-header'>", unsafe_allow_html=True)
-        st.image("start.png", use_container_width=True)
+        show_logo(width=None)
         st.markdown("<div class='brand-title'>Agenda Profissional</div>", unsafe_allow_html=True)
 
         u = st.session_state.user or {}
@@ -138,6 +205,7 @@ def sidebar_menu(is_admin: bool) -> str:
             "Clientes",
             "Tipos de Serviços",
             "Lançamento de Serviços",
+            "Faturamento",
             "Agenda",
         ]
         icons = [
@@ -145,6 +213,7 @@ def sidebar_menu(is_admin: bool) -> str:
             "person-lines-fill",
             "book",
             "envelope",
+            "cash-coin",
             "calendar-date-fill",
         ]
         if is_admin:
@@ -182,7 +251,7 @@ def sidebar_menu(is_admin: bool) -> str:
             unsafe_allow_html=True,
         )
         if st.button("Sair", use_container_width=True):
-            st.session_state.user = None
+            _encerrar_sessao()
             st.rerun()
 
         return selected
@@ -190,12 +259,24 @@ def sidebar_menu(is_admin: bool) -> str:
 # =========================
 # Renderização de páginas
 # =========================
+@st.cache_resource(show_spinner=False)
+def _carregar_pagina(modname: str):
+    # o app.py é reexecutado a cada interação; o módulo da página é resolvido uma vez por processo
+    return importlib.import_module(modname)
+
 def _render_page(modname: str):
     try:
-        page = __import__(modname)
+        page = _carregar_pagina(modname)
         if DEBUG:
             st.info(f"Render: {modname}")
+            antes = estatisticas_cache()
         page.render()
+        if DEBUG:
+            depois = estatisticas_cache()
+            st.caption(
+                f"Cache de leitura nesta página: {depois['hits'] - antes['hits']} hits • "
+                f"{depois['misses'] - antes['misses']} misses (round trips evitados / feitos)"
+            )
     except ModuleNotFoundError as e:
         st.error(f"Módulo '{modname}' não encontrado. Crie {modname}.py no diretório do app.")
         if DEBUG:
@@ -209,6 +290,8 @@ def _render_page(modname: str):
 # Main
 # =========================
 def main():
+    _restaurar_sessao()
+    _sincronizar_cookie()
     if not st.session_state.user:
         tela_login()
         return
@@ -224,6 +307,7 @@ def main():
         "Clientes": "clientes",
         "Tipos de Serviços": "tipos_servicos",
         "Lançamento de Serviços": "lancamento_servicos",
+        "Faturamento": "faturamento",
         "Agenda": "agenda",
         "Profissionais": "profissionais",
     }
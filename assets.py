@@ -0,0 +1,154 @@
+# assets.py
+# Cache de arquivos estáticos por processo: CSS minificado e bytes do logo.
+# Cada arquivo é lido uma vez e só é relido quando o mtime muda; o stat que
+# confere o mtime é feito no máximo a cada ASSETS_CHECK_SECS por arquivo.
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+
+try:
+    ASSETS_CHECK_SECS = float(os.getenv("AGENDA_ASSETS_CHECK_SECS", "5"))
+except ValueError:
+    ASSETS_CHECK_SECS = 5.0
+
+# ordem de preferência do logo: SVG antes de raster
+_LOGO_NOMES = [
+    "start.svg", "START.svg", "logo.svg",
+    "start.png", "START.png", "logo.png",
+    "start.jpg", "start.jpeg",
+]
+
+# caminho -> (mtime, último stat, valor)
+_arquivos: Dict[Tuple[str, str], Tuple[Optional[float], float, object]] = {}
+_lock = threading.Lock()
+
+def _cacheado(tipo: str, path: Path, carregar: Callable[[Path], object]) -> object:
+    chave = (tipo, str(path))
+    agora = time.monotonic()
+    with _lock:
+        item = _arquivos.get(chave)
+        if item and agora - item[1] < ASSETS_CHECK_SECS:
+            return item[2]
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        mtime = None
+    with _lock:
+        item = _arquivos.get(chave)
+        if item and item[0] == mtime:
+            _arquivos[chave] = (mtime, agora, item[2])
+            return item[2]
+    valor = carregar(path) if mtime is not None else None
+    with _lock:
+        _arquivos[chave] = (mtime, agora, valor)
+    return valor
+
+def limpar():
+    with _lock:
+        _arquivos.clear()
+    _resolver.cache_clear()
+
+# ----------------------
+# CSS
+# ----------------------
+_RE_COMENTARIO = re.compile(r"/\*.*?\*/", re.S)
+_RE_ESPACOS = re.compile(r"\s+")
+# espaço ao redor destes é sempre dispensável; ":" só depois (antes dele pode ser combinador)
+_RE_PONTUACAO = re.compile(r"\s*([{};,>])\s*")
+_RE_DOIS_PONTOS = re.compile(r":\s+")
+
+def minificar_css(css: str) -> str:
+    css = _RE_COMENTARIO.sub("", css)
+    css = _RE_ESPACOS.sub(" ", css)
+    css = _RE_PONTUACAO.sub(r"\1", css)
+    css = _RE_DOIS_PONTOS.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+def _ler_css(path: Path) -> str:
+    try:
+        css = path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        css = path.read_text(encoding="latin-1", errors="ignore")
+    return minificar_css(css)
+
+def css_minificado(path: str = "style.css") -> str:
+    """Conteúdo minificado do arquivo ('' se não existir)."""
+    p = Path(path)
+    if not p.is_absolute():
+        p = BASE_DIR / p
+    return _cacheado("css", p, _ler_css) or ""
+
+_css_literais: Dict[str, str] = {}
+
+def css_literal(css: str) -> str:
+    """Minifica CSS embutido no código uma vez por processo."""
+    out = _css_literais.get(css)
+    if out is None:
+        out = _css_literais[css] = minificar_css(css)
+    return out
+
+# ----------------------
+# Logo
+# ----------------------
+def _candidatos(src: Optional[str]):
+    if src:
+        p = Path(src)
+        yield p if p.is_absolute() else BASE_DIR / p
+        yield BASE_DIR / "assets" / p.name
+        yield Path.cwd() / p.name
+    for nome in _LOGO_NOMES:
+        yield BASE_DIR / nome
+        yield BASE_DIR / "assets" / nome
+        yield Path.cwd() / nome
+
+def _resolver_impl(src: Optional[str]) -> Optional[Path]:
+    for p in _candidatos(src):
+        if p.is_file():
+            return p
+    return None
+
+class _Resolvedor:
+    """
+    Memo do caminho resolvido por `src`: a sondagem dos candidatos roda uma vez.
+    Um miss (nenhum arquivo) não é memorizado, para um logo enviado depois ser achado.
+    """
+
+    def __init__(self):
+        self._memo: Dict[Optional[str], Path] = {}
+
+    def __call__(self, src: Optional[str] = None) -> Optional[Path]:
+        p = self._memo.get(src)
+        if p is not None:
+            return p
+        p = _resolver_impl(src)
+        if p is not None:
+            self._memo[src] = p
+        return p
+
+    def cache_clear(self):
+        self._memo.clear()
+
+_resolver = _Resolvedor()
+
+def caminho_logo(src: Optional[str] = None) -> Optional[Path]:
+    """Primeiro logo existente (src sugerido, depois start/logo em SVG, PNG, JPG)."""
+    return _resolver(src)
+
+def _ler_bytes(path: Path) -> bytes:
+    return path.read_bytes()
+
+def logo_bytes(src: Optional[str] = None) -> Optional[bytes]:
+    """
+    Conteúdo do logo, lido uma vez por processo (None se não houver logo).
+    A exibição fica com st.image: o media manager do Streamlit serve a imagem por
+    URL, em vez de o arquivo inteiro viajar no websocket a cada rerun.
+    """
+    p = caminho_logo(src)
+    if p is None:
+        return None
+    return _cacheado("logo", p, _ler_bytes)
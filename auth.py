@@ -1,28 +1,107 @@
-import bcrypt
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time as _time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from typing import Optional, Dict
-from database import listar_registros
 
-def validar_login(email: str, senha: str) -> Optional[Dict]:
-    usuarios = listar_registros("ag_profissionais", {"email": email})
-    if not usuarios:
-        return None
-    u = usuarios[0]
+import bcrypt
+from database import listar_registros, atualizar_registro, _env_int
+
+# custo do bcrypt para hashes novos; hashes com outro custo são refeitos no próximo login
+BCRYPT_ROUNDS = _env_int("AGENDA_BCRYPT_ROUNDS", 12)
+# quantos bcrypt podem rodar ao mesmo tempo (fora da thread do script)
+BCRYPT_THREADS = _env_int("AGENDA_BCRYPT_THREADS", 2)
+SESSAO_HORAS = _env_int("AGENDA_SESSION_HOURS", 12)
+LOGIN_MAX_FALHAS = _env_int("AGENDA_LOGIN_MAX_FALHAS", 5)
+LOGIN_JANELA_SECS = _env_int("AGENDA_LOGIN_JANELA_SECS", 900)
 
-    senha_hash = u.get("senha_hash") or u.get("SENHA_HASH")
-    if not senha_hash:
+COLS_LOGIN = ["id", "nome", "email", "senha_hash", "ativo", "is_admin", "data_licenca", "data_teste"]
+
+class LoginBloqueado(Exception):
+    """Falhas demais para o e-mail na janela de LOGIN_JANELA_SECS."""
+
+# ----------------------
+# bcrypt
+# ----------------------
+_bcrypt_pool: Optional[ThreadPoolExecutor] = None
+_bcrypt_lock = threading.Lock()
+
+def _executar_bcrypt(fn, *args):
+    # o bcrypt solta o GIL: a thread do script só espera, e o pool limita o pico de CPU
+    global _bcrypt_pool
+    if _bcrypt_pool is None:
+        with _bcrypt_lock:
+            if _bcrypt_pool is None:
+                _bcrypt_pool = ThreadPoolExecutor(max_workers=max(1, BCRYPT_THREADS), thread_name_prefix="bcrypt")
+    return _bcrypt_pool.submit(fn, *args).result()
+
+def gerar_hash(senha: str) -> str:
+    """Hash bcrypt com o custo configurado (AGENDA_BCRYPT_ROUNDS)."""
+    return bcrypt.hashpw(senha.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
+
+def _custo_hash(senha_hash: str) -> Optional[int]:
+    # formato $2b$12$<salt+hash>
+    try:
+        return int(senha_hash.split("$")[2])
+    except (IndexError, ValueError):
         return None
 
+def _conferir_senha(senha: str, senha_hash) -> bool:
     try:
-        ok = bcrypt.checkpw(senha.encode("utf-8"), (senha_hash.encode("utf-8") if isinstance(senha_hash, str) else senha_hash))
+        h = senha_hash.encode("utf-8") if isinstance(senha_hash, str) else senha_hash
+        return _executar_bcrypt(bcrypt.checkpw, senha.encode("utf-8"), h)
     except Exception:
-        return None
+        return False
 
-    if not ok:
-        return None
+def _rehash_se_preciso(u: Dict, senha: str, senha_hash: str) -> None:
+    if _custo_hash(str(senha_hash)) == BCRYPT_ROUNDS:
+        return
+    try:
+        novo = _executar_bcrypt(gerar_hash, senha)
+        atualizar_registro("ag_profissionais", u["id"], {"senha_hash": novo})
+    except Exception:
+        pass  # o login não depende disso; tenta de novo na próxima vez
+
+# ----------------------
+# Limite de tentativas
+# ----------------------
+_falhas: Dict[str, deque] = {}
+_falhas_lock = threading.Lock()
+
+def _chave_login(email: str) -> str:
+    return (email or "").strip().lower()
 
+def _bloqueado(email: str) -> bool:
+    limite = _time.monotonic() - LOGIN_JANELA_SECS
+    with _falhas_lock:
+        q = _falhas.get(_chave_login(email))
+        if not q:
+            return False
+        while q and q[0] < limite:
+            q.popleft()
+        return len(q) >= LOGIN_MAX_FALHAS
+
+def _registrar_falha(email: str) -> None:
+    with _falhas_lock:
+        _falhas.setdefault(_chave_login(email), deque()).append(_time.monotonic())
+
+def _limpar_falhas(email: str) -> None:
+    with _falhas_lock:
+        _falhas.pop(_chave_login(email), None)
+
+# ----------------------
+# Login
+# ----------------------
+def _usuario_liberado(u: Dict) -> bool:
     if not u.get("ativo", True):
-        return None
+        return False
 
     hoje = date.today()
 
@@ -40,7 +119,95 @@ def validar_login(email: str, senha: str) -> Optional[Dict]:
     dt = to_date(u.get("data_teste"))
 
     licenca_ok = (dl and hoje <= dl) or (dt and hoje <= dt)
-    if not licenca_ok and not u.get("is_admin", False):
+    return bool(licenca_ok or u.get("is_admin", False))
+
+def _sem_hash(u: Dict) -> Dict:
+    return {k: v for k, v in u.items() if k not in ("senha_hash", "SENHA_HASH")}
+
+def validar_login(email: str, senha: str) -> Optional[Dict]:
+    if _bloqueado(email):
+        raise LoginBloqueado("Muitas tentativas. Aguarde alguns minutos e tente novamente.")
+
+    usuarios = listar_registros("ag_profissionais", {"email": email}, colunas=COLS_LOGIN)
+    u = usuarios[0] if usuarios else None
+    senha_hash = (u or {}).get("senha_hash")
+    if not senha_hash or not _conferir_senha(senha, senha_hash):
+        _registrar_falha(email)
+        return None
+    _limpar_falhas(email)
+
+    if not _usuario_liberado(u):
+        return None
+
+    _rehash_se_preciso(u, senha, senha_hash)
+    return _sem_hash(u)
+
+# ----------------------
+# Token de sessão
+# ----------------------
+# formato: base64url(json {uid, exp, h}) + "." + base64url(HMAC-SHA256)
+# "h" amarra o token ao hash da senha: trocar a senha derruba as sessões abertas.
+# A chave vem só de AGENDA_SESSION_SECRET: nada público (chave anon, hash da senha
+# legível com ela) pode entrar nela. Sem a variável, cada processo sorteia a sua e
+# a sessão só sobrevive a reloads enquanto o mesmo processo estiver no ar.
+def _segredo() -> bytes:
+    s = os.getenv("AGENDA_SESSION_SECRET")
+    if s:
+        return s.encode("utf-8")
+    return _SEGREDO_PROCESSO
+
+_SEGREDO_PROCESSO = secrets.token_bytes(32)
+
+def _b64(b: bytes) -> str:
+    return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
+
+def _unb64(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + "=" * (-len(s) % 4))
+
+def _marca_senha(senha_hash) -> str:
+    return hashlib.sha256(str(senha_hash or "").encode("utf-8")).hexdigest()[:12]
+
+def _assinar(corpo: str) -> str:
+    return _b64(hmac.new(_segredo(), corpo.encode("ascii"), hashlib.sha256).digest())
+
+def emitir_token(usuario_id, senha_hash, horas: Optional[int] = None) -> str:
+    payload = {
+        "uid": str(usuario_id),
+        "exp": int(_time.time()) + 3600 * int(horas or SESSAO_HORAS),
+        "h": _marca_senha(senha_hash),
+    }
+    corpo = _b64(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{corpo}.{_assinar(corpo)}"
+
+def ler_token(token: str) -> Optional[Dict]:
+    """Payload do token se a assinatura confere e não expirou; só CPU, sem banco."""
+    try:
+        corpo, assinatura = (token or "").split(".", 1)
+        if not hmac.compare_digest(assinatura, _assinar(corpo)):
+            return None
+        payload = json.loads(_unb64(corpo))
+    except (ValueError, TypeError):
+        return None
+    if int(payload.get("exp", 0)) < _time.time():
+        return None
+    return payload
+
+def usuario_do_token(token: str) -> Optional[Dict]:
+    """Restaura o usuário da sessão sem bcrypt: assinatura + uma leitura (cacheada) do cadastro."""
+    payload = ler_token(token)
+    if not payload:
+        return None
+    usuarios = listar_registros("ag_profissionais", {"id": payload["uid"]}, colunas=COLS_LOGIN)
+    if not usuarios:
+        return None
+    u = usuarios[0]
+    if not hmac.compare_digest(_marca_senha(u.get("senha_hash")), str(payload.get("h", ""))):
+        return None
+    if not _usuario_liberado(u):
         return None
+    return _sem_hash(u)
 
-    return u
+def token_para(usuario: Dict) -> str:
+    """Token para um usuário já autenticado (busca o hash atual para amarrar a sessão à senha)."""
+    rows = listar_registros("ag_profissionais", {"id": usuario["id"]}, colunas=["id", "senha_hash"])
+    return emitir_token(usuario["id"], rows[0].get("senha_hash") if rows else None)
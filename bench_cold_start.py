@@ -0,0 +1,67 @@
+# bench_cold_start.py
+# Relatório de tempo de partida: importa os módulos do app num processo novo com
+# `python -X importtime`, resume os pacotes mais caros e confere o orçamento.
+# Sai com código 1 se o orçamento estourar ou se algum módulo que deveria ser
+# carregado sob demanda (pandas, SDK do Supabase, psycopg2) entrar na importação.
+# Uso: python bench_cold_start.py [modulo ...]   (padrão: os módulos das páginas)
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULOS_PADRAO = ["auth", "database", "dashboard", "clientes", "tipos_servicos",
+                  "lancamento_servicos", "agenda", "profissionais"]
+ORCAMENTO_MS = float(os.getenv("AGENDA_COLD_START_MS", "1500"))
+SOB_DEMANDA = ["pandas", "supabase", "postgrest", "psycopg2"]
+TOP = 15
+
+
+def _importtime(modulos):
+    cmd = [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modulos)]
+    proc = subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, text=True)
+    linhas = []
+    for ln in proc.stderr.splitlines():
+        if not ln.startswith("import time:") or "self [us]" in ln:
+            continue
+        # "import time:   self |   cumulative | <2 espaços por nível>pacote"
+        auto, cumul, nome = ln[len("import time:"):].split("|", 2)
+        nivel = (len(nome) - len(nome.lstrip(" ")) - 1) // 2
+        linhas.append((nome.strip(), nivel, int(auto), int(cumul)))
+    return proc.returncode, proc.stderr, linhas
+
+
+def main():
+    modulos = sys.argv[1:] or MODULOS_PADRAO
+    rc, stderr, linhas = _importtime(modulos)
+    if rc != 0:
+        print(stderr.splitlines()[-1] if stderr else "falha ao importar")
+        sys.exit(rc)
+
+    topo = [l for l in linhas if l[1] == 0]
+    total_ms = sum(l[3] for l in topo) / 1000
+    carregados = {l[0] for l in linhas}
+
+    print(f"{'cumulativo ms':>14} {'próprio ms':>11}  pacote (nível 0)")
+    for nome, _, auto, cumul in sorted(topo, key=lambda l: -l[3])[:TOP]:
+        print(f"{cumul / 1000:14.1f} {auto / 1000:11.1f}  {nome}")
+    for m in modulos:
+        ms = next((l[3] / 1000 for l in linhas if l[0] == m), None)
+        if ms is not None:
+            print(f"  {m:<22} {ms:8.1f} ms")
+
+    falhas = []
+    print(f"\ntotal: {total_ms:.1f} ms (orçamento {ORCAMENTO_MS:.0f} ms)")
+    if total_ms > ORCAMENTO_MS:
+        falhas.append(f"orçamento de partida estourado: {total_ms:.1f} ms > {ORCAMENTO_MS:.0f} ms")
+    for m in SOB_DEMANDA:
+        if m in carregados:
+            falhas.append(f"'{m}' foi importado na partida (deveria ser sob demanda)")
+    for f in falhas:
+        print("FALHOU:", f)
+    if not falhas:
+        print("OK")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
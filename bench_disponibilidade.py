@@ -0,0 +1,156 @@
+# bench_disponibilidade.py
+# Compara o motor sweep-line (disponibilidade.grade_disponibilidade) com a grade
+# original de agenda.py (loop slot x atendimento), conferindo que a saída é idêntica.
+# Uso: python bench_disponibilidade.py [dias] [capacidade] [atendimentos_por_dia]
+import sys
+import time as _time
+import random
+from datetime import date, time, datetime, timedelta
+
+from disponibilidade import (
+    grade_disponibilidade,
+    _to_dt, _overlaps, _dia_permitido, _feriados_fixos_br, _weekday_pt,
+)
+
+
+def grade_original(
+    dados_agenda, prof, prof_id, data_ini, data_fim, jornada_ini, jornada_fim,
+    slot_min, buffer_min, almoco_ini, almoco_fim, considerar_feriados, capacidade,
+):
+    """Cópia da implementação anterior de agenda._build_grade_disponibilidade (sem o DataFrame)."""
+    rows = []
+
+    idx = {}
+    for a in dados_agenda:
+        if str(a.get("profissional_id")) != str(prof_id):
+            continue
+        try:
+            d = date.fromisoformat(a.get("data_atendimento"))
+            if not (data_ini <= d <= data_fim):
+                continue
+            hi = time.fromisoformat(a.get("hora_inicio"))
+            hf = time.fromisoformat(a.get("hora_fim"))
+        except Exception:
+            continue
+        idx.setdefault(d, []).append({
+            "ini": _to_dt(d, hi),
+            "fim": _to_dt(d, hf),
+            "cliente": a.get("cliente_nome", ""),
+            "status": a.get("status", ""),
+            "obs": a.get("observacoes", "")
+        })
+
+    feriados = set()
+    if considerar_feriados:
+        for an in {data_ini.year, data_fim.year}:
+            feriados |= _feriados_fixos_br(an)
+
+    dia = data_ini
+    while dia <= data_fim:
+        if not _dia_permitido(dia, prof):
+            dia += timedelta(days=1)
+            continue
+        if considerar_feriados and dia in feriados:
+            dia += timedelta(days=1)
+            continue
+
+        slot_ini = _to_dt(dia, jornada_ini)
+        jornada_f = _to_dt(dia, jornada_fim)
+
+        while slot_ini < jornada_f:
+            slot_fim = slot_ini + timedelta(minutes=int(slot_min))
+            if slot_fim > jornada_f:
+                break
+
+            if almoco_ini and almoco_fim:
+                a_ini = _to_dt(dia, almoco_ini)
+                a_fim = _to_dt(dia, almoco_fim)
+                if _overlaps(slot_ini, slot_fim, a_ini, a_fim):
+                    slot_ini = max(slot_fim, a_fim)
+                    continue
+
+            sobrepos = 0
+            det_cliente = det_status = det_obs = ""
+            for ag in idx.get(dia, []):
+                if _overlaps(slot_ini, slot_fim, ag["ini"], ag["fim"]):
+                    sobrepos += 1
+                    if not det_cliente:
+                        det_cliente, det_status, det_obs = ag["cliente"], ag["status"], ag["obs"]
+
+            situacao = "Disponível" if sobrepos < int(capacidade or 1) else "Ocupado"
+
+            rows.append({
+                "Data": dia.strftime("%Y-%m-%d"),
+                "Dia Semana": _weekday_pt(dia),
+                "Horário": f"{slot_ini.strftime('%H:%M')} - {slot_fim.strftime('%H:%M')}",
+                "Situação": situacao,
+                "Cliente": det_cliente if situacao == "Ocupado" else "",
+                "Status Atendimento": det_status if situacao == "Ocupado" else "",
+                "Obs.": det_obs if situacao == "Ocupado" else "",
+            })
+
+            slot_ini = slot_fim + timedelta(minutes=int(buffer_min or 0))
+
+        dia += timedelta(days=1)
+
+    # o sort_values(["__d", "__h"]) original não altera a ordem: os slots já saem em ordem
+    return rows
+
+
+def _agenda_sintetica(prof_id, data_ini, dias, por_dia, seed=42):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(dias):
+        d = data_ini + timedelta(days=i)
+        for _ in range(por_dia):
+            ini = datetime.combine(d, time(8, 0)) + timedelta(minutes=5 * rnd.randrange(0, 120))
+            fim = ini + timedelta(minutes=rnd.choice([15, 30, 45, 60, 90]))
+            out.append({
+                "profissional_id": prof_id,
+                "data_atendimento": str(d),
+                "hora_inicio": str(ini.time()),
+                "hora_fim": str(fim.time()),
+                "cliente_nome": rnd.choice(["Ana", "Bruno", "Carla", "", "Diego"]),
+                "status": rnd.choice(["Pendente", "Confirmado", "Concluído", "Cancelado"]),
+                "observacoes": "",
+            })
+    rnd.shuffle(out)
+    return out
+
+
+def _medir(fn, repeticoes=3):
+    melhor, res = None, None
+    for _ in range(repeticoes):
+        t0 = _time.perf_counter()
+        res = fn()
+        dt = _time.perf_counter() - t0
+        melhor = dt if melhor is None else min(melhor, dt)
+    return melhor * 1000, res
+
+
+def main():
+    dias = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    cap = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    por_dia = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    prof_id = "1"
+    prof = {"dias_semana": "1,2,3,4,5,6"}
+    ini = date(2025, 1, 1)
+    fim = ini + timedelta(days=dias - 1)
+    dados = _agenda_sintetica(prof_id, ini, dias, por_dia)
+    # sem feriados: a versão original só conhecia os fixos; o calendário atual inclui
+    # também os móveis e municipais, então as saídas divergiriam por regra, não por motor
+    args = (dados, prof, prof_id, ini, fim, time(8, 0), time(18, 0), 15, 5,
+            time(12, 0), time(13, 0), False, cap)
+
+    t_orig, r_orig = _medir(lambda: grade_original(*args))
+    t_novo, r_novo = _medir(lambda: grade_disponibilidade(*args))
+
+    print(f"{dias} dias • {len(dados)} atendimentos • capacidade {cap} • {len(r_novo)} slots")
+    print(f"original   : {t_orig:9.1f} ms")
+    print(f"sweep-line : {t_novo:9.1f} ms  ({t_orig / t_novo:.1f}x)")
+    print("saída idêntica:", r_orig == r_novo)
+
+
+if __name__ == "__main__":
+    main()
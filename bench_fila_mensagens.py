@@ -0,0 +1,46 @@
+# bench_fila_mensagens.py
+# Mede a vazão do worker da fila (msgs/s) contra o gateway HTTP local de
+# fila_mensagens.servidor_local, com falhas 503 simuladas para exercitar os reenvios.
+# Não usa o banco: a fila é a FilaMemoria.
+# Uso: python bench_fila_mensagens.py [mensagens] [threads] [taxa_falha] [latencia_ms]
+import sys
+
+from fila_mensagens import (
+    CANAL_WHATSAPP, FilaMemoria, TransporteHTTP, WorkerFila, mensagem, servidor_local,
+)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    falha = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+    latencia = float(sys.argv[4]) if len(sys.argv) > 4 else 5.0
+
+    srv, url = servidor_local(falha=falha, latencia_ms=latencia)
+    msgs = [
+        mensagem(CANAL_WHATSAPP, f"55119{i:08d}", f"Lembrete {i}", f"bench:{i}")
+        for i in range(n)
+    ]
+    # a duplicata final deve ser descartada pela chave de deduplicação
+    fila = FilaMemoria(msgs + msgs[:1])
+
+    for por_seg in (0, 200):
+        if por_seg:
+            fila = FilaMemoria(msgs)
+            srv.recebidas.clear()
+        worker = WorkerFila(
+            fila, {CANAL_WHATSAPP: TransporteHTTP(url, timeout=5)},
+            threads=threads, por_segundo=por_seg, max_tentativas=8, backoff_base=0.01,
+        )
+        st = worker.rodar("vazia", ocioso_s=0.05)
+        rotulo = f"limite {por_seg} msg/s" if por_seg else "sem limite"
+        print(
+            f"{rotulo:>16}: {st['enviadas']} enviadas, {st['reenvios']} reenvios, {st['falhas']} falhas "
+            f"em {st['segundos']:.2f}s -> {st['msgs_por_seg']:.0f} msg/s"
+        )
+        print(f"{'':>16}  gateway recebeu {len(srv.recebidas)} chaves distintas de {n}")
+    srv.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# bench_kpis_dashboard.py
+# Compara a latência dos KPIs do dashboard: 8 contagens separadas x 1 RPC agregada.
+# Uso: python bench_kpis_dashboard.py <profissional_id> [repeticoes]
+import sys
+import time
+import statistics
+
+import dashboard
+
+
+def _medir(fn, repeticoes: int):
+    tempos, ultimo = [], None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        ultimo = fn()
+        tempos.append((time.perf_counter() - t0) * 1000)
+    tempos.sort()
+    p95 = tempos[min(len(tempos) - 1, int(round(len(tempos) * 0.95)) - 1)]
+    return statistics.median(tempos), p95, ultimo
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python bench_kpis_dashboard.py <profissional_id> [repeticoes]")
+        sys.exit(1)
+    prof_id = sys.argv[1]
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    def sequencia():
+        return dashboard._contagens_basicas(prof_id), dashboard._contagens_status(prof_id)
+
+    def agregada():
+        return dashboard._contagens_agregadas(prof_id)
+
+    try:
+        dashboard.supabase.rpc("ag_kpis_dashboard", {"p_profissional_id": prof_id}).execute()
+    except Exception as e:
+        print(f"Aviso: RPC ag_kpis_dashboard indisponível ({e}); rode sql/001_kpis_dashboard.sql.")
+        print("A medição 'agregada' abaixo estará usando o fallback sequencial.")
+
+    # aquece conexão HTTP/TLS antes de medir
+    sequencia()
+    agregada()
+
+    med_seq, p95_seq, res_seq = _medir(sequencia, repeticoes)
+    med_agg, p95_agg, res_agg = _medir(agregada, repeticoes)
+
+    print(f"repetições: {repeticoes}")
+    print(f"sequência (8 consultas): mediana {med_seq:8.1f} ms | p95 {p95_seq:8.1f} ms")
+    print(f"agregada  (1 RPC)      : mediana {med_agg:8.1f} ms | p95 {p95_agg:8.1f} ms")
+    if med_agg > 0:
+        print(f"ganho: {med_seq / med_agg:.1f}x")
+    print("resultados iguais:", res_seq == res_agg)
+
+
+if __name__ == "__main__":
+    main()
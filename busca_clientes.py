@@ -0,0 +1,244 @@
+# busca_clientes.py
+# Índice de busca de clientes em memória, um por profissional (tenant).
+# Montado uma vez a partir de ag_clientes (leitura por keyset) e mantido pelas
+# escritas da tela de clientes (adicionar/remover), sem reconstruir a cada mudança.
+# A busca ignora acentos e maiúsculas e casa, por palavra digitada:
+#   - prefixo de palavra do nome, do e-mail (inteiro ou por partes) ou dos dígitos do telefone;
+#   - trecho com 3+ caracteres em qualquer posição (índice de trigramas).
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from database import LOTE_IDS, iterar_registros, listar_registros
+from phone_utils import _nacional, normalize_br_phone, normalize_br_phones
+
+TABELA = "ag_clientes"
+COLS_CLIENTE = ["id", "profissional_id", "nome", "telefone", "email"]
+
+# o índice é relido do banco depois deste tempo (escritas feitas por outros processos)
+try:
+    INDICE_TTL_SECS = float(os.getenv("AGENDA_INDICE_CLIENTES_TTL_SECS", "600"))
+except ValueError:
+    INDICE_TTL_SECS = 600.0
+
+_RE_NAO_DIGITO = re.compile(r"\D")
+_RE_PALAVRA = re.compile(r"[a-z0-9]+")
+_RE_TERMO = re.compile(r"[a-z0-9@._+-]+")
+_RE_TELEFONE = re.compile(r"^[\d\s()+\-.]+$")
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas e sem acentos ('João' -> 'joao')."""
+    s = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in s if not unicodedata.combining(c)).casefold()
+
+def _digitos(s: Optional[str]) -> str:
+    return _RE_NAO_DIGITO.sub("", s or "")
+
+def _trigramas(s: str) -> Set[str]:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+def _campos(row: Dict[str, Any]) -> tuple[str, Set[str]]:
+    """(texto pesquisável, palavras indexadas por prefixo) de um cliente."""
+    nome = normalizar(row.get("nome"))
+    email = normalizar(row.get("email")).strip()
+    tel = _digitos(row.get("telefone"))
+    nacional = _nacional(tel) or tel  # sem 0 de discagem e sem o código do país, como na busca
+    palavras = set(_RE_PALAVRA.findall(nome)) | set(_RE_PALAVRA.findall(email))
+    if email:
+        palavras.add(email)
+    if tel:
+        palavras.update((tel, nacional))
+        if len(nacional) >= 10:
+            palavras.add(nacional[2:])  # sem o DDD
+    return "\x00".join((nome, email, nacional)), palavras
+
+def termos_da_busca(termo: str) -> List[str]:
+    t = normalizar(termo).strip()
+    if not t:
+        return []
+    if _RE_TELEFONE.match(t) and _digitos(t):
+        # "(11) 9 8765" -> um termo só de dígitos; "+55 11 ..." / "011 ..." -> "11 ..."
+        return [_nacional(t) or _digitos(t)]
+    return _RE_TERMO.findall(t)
+
+
+class IndiceClientes:
+    """Prefixo (lista ordenada de palavras) + trigramas sobre nome, e-mail e telefone."""
+
+    def __init__(self, linhas: Iterable[Dict[str, Any]] = ()):
+        self._lock = threading.RLock()
+        self._linhas: Dict[str, Dict[str, Any]] = {}
+        self._texto: Dict[str, str] = {}
+        self._palavras_doc: Dict[str, Set[str]] = {}
+        self._por_palavra: Dict[str, Set[str]] = {}
+        self._palavras: List[str] = []  # ordenada, para busca por prefixo com bisect
+        self._por_trigrama: Dict[str, Set[str]] = {}
+        self._ordem: Optional[List[str]] = None
+        self.criado_em = time.monotonic()
+        for row in linhas:
+            self.adicionar(row)
+
+    def __len__(self) -> int:
+        return len(self._linhas)
+
+    # ---- manutenção ----
+    def adicionar(self, row: Dict[str, Any]) -> None:
+        """Inclui o cliente ou substitui a versão anterior (mesmo id)."""
+        cid = str(row["id"])
+        texto, palavras = _campos(row)
+        with self._lock:
+            if cid in self._linhas:
+                self._desindexar(cid)
+            self._linhas[cid] = dict(row)
+            self._texto[cid] = texto
+            self._palavras_doc[cid] = palavras
+            for p in palavras:
+                ids = self._por_palavra.get(p)
+                if ids is None:
+                    ids = self._por_palavra[p] = set()
+                    bisect.insort(self._palavras, p)
+                ids.add(cid)
+            for tri in _trigramas(texto):
+                self._por_trigrama.setdefault(tri, set()).add(cid)
+            self._ordem = None
+
+    def remover(self, cliente_id: Any) -> None:
+        with self._lock:
+            cid = str(cliente_id)
+            if cid in self._linhas:
+                self._desindexar(cid)
+                del self._linhas[cid]
+                self._ordem = None
+
+    def _desindexar(self, cid: str) -> None:
+        for p in self._palavras_doc.pop(cid, ()):
+            ids = self._por_palavra.get(p)
+            if ids is None:
+                continue
+            ids.discard(cid)
+            if not ids:
+                del self._por_palavra[p]
+                i = bisect.bisect_left(self._palavras, p)
+                if i < len(self._palavras) and self._palavras[i] == p:
+                    del self._palavras[i]
+        for tri in _trigramas(self._texto.pop(cid, "")):
+            ids = self._por_trigrama.get(tri)
+            if ids is not None:
+                ids.discard(cid)
+                if not ids:
+                    del self._por_trigrama[tri]
+
+    # ---- consulta ----
+    def _por_prefixo(self, termo: str) -> Set[str]:
+        out: Set[str] = set()
+        i = bisect.bisect_left(self._palavras, termo)
+        while i < len(self._palavras) and self._palavras[i].startswith(termo):
+            out |= self._por_palavra[self._palavras[i]]
+            i += 1
+        return out
+
+    def _por_trecho(self, termo: str) -> Set[str]:
+        if len(termo) < 3:
+            return set()
+        conjuntos = sorted((self._por_trigrama.get(t, set()) for t in _trigramas(termo)), key=len)
+        if not conjuntos[0]:
+            return set()
+        candidatos = set.intersection(*conjuntos)
+        # os trigramas podem estar em campos diferentes: confere o trecho de fato
+        return {cid for cid in candidatos if termo in self._texto[cid]}
+
+    def _ids_ordenados(self) -> List[str]:
+        if self._ordem is None:
+            self._ordem = sorted(self._linhas, key=lambda c: (self._texto[c], c))
+        return self._ordem
+
+    def buscar(self, termo: str = "") -> List[Dict[str, Any]]:
+        """Clientes que casam com todas as palavras de `termo`, em ordem de nome (vazio = todos)."""
+        termos = termos_da_busca(termo)
+        with self._lock:
+            ordem = self._ids_ordenados()
+            if not termos:
+                return [self._linhas[c] for c in ordem]
+            achados: Optional[Set[str]] = None
+            for t in sorted(set(termos), key=len, reverse=True):
+                ids = self._por_prefixo(t) | self._por_trecho(t)
+                achados = ids if achados is None else achados & ids
+                if not achados:
+                    return []
+            if len(achados) * 8 < len(ordem):
+                return [self._linhas[c] for c in sorted(achados, key=lambda c: (self._texto[c], c))]
+            return [self._linhas[c] for c in ordem if c in achados]
+
+
+# ----------------------
+# Um índice por profissional
+# ----------------------
+_indices: Dict[str, IndiceClientes] = {}
+_lock = threading.Lock()
+
+def _carregar(prof_id: Any) -> IndiceClientes:
+    return IndiceClientes(iterar_registros(TABELA, {"profissional_id": prof_id}, colunas=COLS_CLIENTE))
+
+def indice(prof_id: Any) -> IndiceClientes:
+    """Índice do profissional; montado na primeira busca e relido após INDICE_TTL_SECS."""
+    chave = str(prof_id)
+    with _lock:
+        idx = _indices.get(chave)
+    if idx is not None and time.monotonic() - idx.criado_em < INDICE_TTL_SECS:
+        return idx
+    idx = _carregar(prof_id)
+    with _lock:
+        _indices[chave] = idx
+    return idx
+
+def registrar_escrita(prof_id: Any, row: Optional[Dict[str, Any]] = None, removido_id: Any = None) -> None:
+    """Aplica uma escrita em ag_clientes ao índice já montado (se ainda não há índice, nada a fazer)."""
+    with _lock:
+        idx = _indices.get(str(prof_id))
+    if idx is None:
+        return
+    if removido_id is not None:
+        idx.remover(removido_id)
+    if row:
+        idx.adicionar(row)
+
+def descartar(prof_id: Any = None) -> None:
+    with _lock:
+        if prof_id is None:
+            _indices.clear()
+        else:
+            _indices.pop(str(prof_id), None)
+
+# ----------------------
+# Busca exata por telefone (coluna gerada telefone_digitos, sql/011)
+# ----------------------
+def cliente_por_telefone(prof_id: Any, telefone: str) -> Optional[Dict[str, Any]]:
+    """Cliente do profissional com esse telefone, em qualquer formato; None se inválido ou sem cadastro."""
+    digitos = normalize_br_phone(telefone)
+    if not digitos:
+        return None
+    rows = listar_registros(
+        TABELA, {"profissional_id": prof_id, "telefone_digitos": digitos}, colunas=COLS_CLIENTE, limit=1,
+    )
+    return rows[0] if rows else None
+
+def clientes_por_telefones(prof_id: Any, telefones: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    {telefone canônico: cliente} para uma lista de telefones (ex.: linhas de importação).
+    Uma consulta por lote de LOTE_IDS números, todas pelo índice (profissional_id, telefone_digitos).
+    """
+    digitos = sorted({d for d in normalize_br_phones(list(telefones)) if d})
+    out: Dict[str, Dict[str, Any]] = {}
+    for i in range(0, len(digitos), LOTE_IDS):
+        rows = listar_registros(
+            TABELA, {"profissional_id": prof_id},
+            colunas=COLS_CLIENTE + ["telefone_digitos"],
+            in_={"telefone_digitos": digitos[i:i + LOTE_IDS]},
+        )
+        for r in rows:
+            out.setdefault(r["telefone_digitos"], r)
+    return out
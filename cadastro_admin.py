@@ -1,7 +1,7 @@
 # cadastro_admin.py
 import streamlit as st
-import bcrypt
-from utils.database import get_connection
+from auth import gerar_hash
+from database import get_connection
 
 def cadastrar_admin():
     st.title("Cadastro do Administrador Inicial")
@@ -34,7 +34,7 @@ def cadastrar_admin():
                 return
 
             # Gerar hash da senha
-            senha_hash = bcrypt.hashpw(senha.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+            senha_hash = gerar_hash(senha)
 
             # Inserir administrador
             cur.execute("""
@@ -0,0 +1,228 @@
+# calendario.py
+# Calendário de dias úteis por profissional, compilado por ano num bitmap:
+# dias da semana permitidos, feriados nacionais (fixos e móveis), feriados
+# municipais (arquivo de dados) e exceções por data (folgas/férias e plantões extras).
+import csv
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARQ_FERIADOS_MUNICIPAIS = os.getenv(
+    "AGENDA_FERIADOS_MUNICIPAIS", os.path.join(BASE_DIR, "feriados_municipais.csv")
+)
+
+TABELA_EXCECOES = "ag_calendario_excecoes"
+EXCECAO_BLOQUEIO = "bloqueio"  # não atende (férias, folga, curso...)
+EXCECAO_EXTRA = "extra"        # atende mesmo fora dos dias permitidos / em feriado
+
+# ----------------------
+# Feriados nacionais
+# ----------------------
+FERIADOS_FIXOS = [
+    (1, 1),   # Confraternização Universal
+    (4, 21),  # Tiradentes
+    (5, 1),   # Dia do Trabalho
+    (9, 7),   # Independência
+    (10, 12), # N. Sra. Aparecida
+    (11, 2),  # Finados
+    (11, 15), # Proclamação da República
+    (12, 25), # Natal
+]
+
+def pascoa(ano: int) -> date:
+    # algoritmo de Meeus/Jones/Butcher (calendário gregoriano)
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+@lru_cache(maxsize=64)
+def feriados_nacionais(ano: int) -> frozenset:
+    p = pascoa(ano)
+    moveis = {
+        p - timedelta(days=48),  # Carnaval (segunda)
+        p - timedelta(days=47),  # Carnaval (terça)
+        p - timedelta(days=2),   # Sexta-feira Santa
+        p + timedelta(days=60),  # Corpus Christi
+    }
+    return frozenset({date(ano, m, d) for (m, d) in FERIADOS_FIXOS} | moveis)
+
+# ----------------------
+# Feriados municipais (arquivo CSV: data,nome — data "MM-DD" anual ou "AAAA-MM-DD")
+# ----------------------
+_municipais = {"mtime": None, "anuais": frozenset(), "datas": frozenset()}
+_municipais_lock = threading.Lock()
+
+def _carregar_municipais():
+    try:
+        mtime = os.path.getmtime(ARQ_FERIADOS_MUNICIPAIS)
+    except OSError:
+        mtime = None
+    with _municipais_lock:
+        if _municipais["mtime"] == mtime:
+            return _municipais
+        anuais, datas = set(), set()
+        if mtime is not None:
+            with open(ARQ_FERIADOS_MUNICIPAIS, encoding="utf-8") as f:
+                linhas = (ln for ln in f if ln.strip() and not ln.lstrip().startswith("#"))
+                for row in csv.DictReader(linhas):
+                    txt = (row.get("data") or "").strip()
+                    try:
+                        if len(txt) == 5:
+                            m, d = map(int, txt.split("-"))
+                            anuais.add((m, d))
+                        else:
+                            datas.add(date.fromisoformat(txt))
+                    except ValueError:
+                        continue
+        _municipais.update(mtime=mtime, anuais=frozenset(anuais), datas=frozenset(datas))
+        return _municipais
+
+def feriados_municipais(ano: int) -> frozenset:
+    mun = _carregar_municipais()
+    out = set()
+    for m, d in mun["anuais"]:
+        try:
+            out.add(date(ano, m, d))
+        except ValueError:
+            pass  # 29/02 em ano não bissexto
+    out |= {d for d in mun["datas"] if d.year == ano}
+    return frozenset(out)
+
+# ----------------------
+# Calendário compilado
+# ----------------------
+def _dias_semana(prof: dict) -> frozenset:
+    """Dias ISO (1=Seg ... 7=Dom) em que o profissional atende."""
+    ds = (prof.get("dias_semana") or "").strip()
+    if ds:
+        return frozenset(int(x) for x in ds.split(",") if x.strip().isdigit())
+    dias = {1, 2, 3, 4, 5}
+    if prof.get("aceita_sabado"):
+        dias.add(6)
+    if prof.get("aceita_domingo"):
+        dias.add(7)
+    return frozenset(dias)
+
+def _excecoes_por_data(excecoes: list) -> dict:
+    """{data: tipo}; intervalos (data_inicio..data_fim) são expandidos. Bloqueio vence extra."""
+    out: dict = {}
+    for ex in excecoes or []:
+        try:
+            ini = date.fromisoformat(str(ex.get("data_inicio")))
+            fim = date.fromisoformat(str(ex.get("data_fim") or ex.get("data_inicio")))
+        except ValueError:
+            continue
+        tipo = ex.get("tipo") or EXCECAO_BLOQUEIO
+        d = ini
+        while d <= fim:
+            if out.get(d) != EXCECAO_BLOQUEIO:
+                out[d] = tipo
+            d += timedelta(days=1)
+    return out
+
+def _compilar_ano(ano: int, dias_semana: frozenset, considerar_feriados: bool, excecoes: tuple) -> int:
+    """Bitmap do ano: bit n = 1 se o dia de número n (0 = 1º de janeiro) é trabalhável."""
+    feriados = (feriados_nacionais(ano) | feriados_municipais(ano)) if considerar_feriados else frozenset()
+    mask = 0
+    d = date(ano, 1, 1)
+    n = 0
+    while d.year == ano:
+        if d.isoweekday() in dias_semana and d not in feriados:
+            mask |= 1 << n
+        d += timedelta(days=1)
+        n += 1
+    for d, tipo in excecoes:
+        n = d.timetuple().tm_yday - 1
+        if tipo == EXCECAO_EXTRA:
+            mask |= 1 << n
+        else:
+            mask &= ~(1 << n)
+    return mask
+
+_bitmaps: "OrderedDict[tuple, int]" = OrderedDict()
+_bitmaps_lock = threading.Lock()
+_BITMAPS_MAX = 1024
+
+def _bitmap_memo(prof_id, ano: int, dias_semana: frozenset, considerar_feriados: bool, excecoes: tuple) -> int:
+    mun = _carregar_municipais()
+    cfg = repr((sorted(dias_semana), considerar_feriados, excecoes, mun["mtime"])).encode("utf-8")
+    chave = (str(prof_id), ano, hashlib.sha1(cfg).hexdigest())
+    with _bitmaps_lock:
+        if chave in _bitmaps:
+            _bitmaps.move_to_end(chave)
+            return _bitmaps[chave]
+    mask = _compilar_ano(ano, dias_semana, considerar_feriados, excecoes)
+    with _bitmaps_lock:
+        _bitmaps[chave] = mask
+        while len(_bitmaps) > _BITMAPS_MAX:
+            _bitmaps.popitem(last=False)
+    return mask
+
+class CalendarioTrabalho:
+    """
+    Calendário de um profissional. `trabalha(d)` é um teste de bit no bitmap do ano;
+    os bitmaps são memoizados por (profissional, ano, hash da configuração).
+    """
+
+    def __init__(self, prof: dict, excecoes: list | None = None, considerar_feriados: bool | None = None):
+        self.prof_id = prof.get("id")
+        self.dias_semana = _dias_semana(prof)
+        self.considerar_feriados = bool(
+            prof.get("considerar_feriados") if considerar_feriados is None else considerar_feriados
+        )
+        self._excecoes = _excecoes_por_data(excecoes)
+        self._anos: dict = {}
+
+    def _mask(self, ano: int) -> int:
+        mask = self._anos.get(ano)
+        if mask is None:
+            exc = tuple(sorted((d, t) for d, t in self._excecoes.items() if d.year == ano))
+            mask = _bitmap_memo(self.prof_id, ano, self.dias_semana, self.considerar_feriados, exc)
+            self._anos[ano] = mask
+        return mask
+
+    def trabalha(self, d: date) -> bool:
+        return bool((self._mask(d.year) >> (d.timetuple().tm_yday - 1)) & 1)
+
+    def dias_uteis(self, ini: date, fim: date):
+        d = ini
+        while d <= fim:
+            if self.trabalha(d):
+                yield d
+            d += timedelta(days=1)
+
+def carregar_excecoes(prof_ids: list, ini: date, fim: date) -> list:
+    """
+    Exceções que tocam [ini, fim]. Sem a tabela (sql/004) devolve lista vazia;
+    qualquer outra falha sobe (sem as exceções, férias virariam dias livres).
+    """
+    from database import _tabela_inexistente, listar_registros
+
+    if not prof_ids:
+        return []
+    ids = list(prof_ids)
+    try:
+        return listar_registros(
+            TABELA_EXCECOES,
+            {"profissional_id": ids[0]} if len(ids) == 1 else None,
+            colunas=["profissional_id", "data_inicio", "data_fim", "tipo"],
+            in_=None if len(ids) == 1 else {"profissional_id": ids},
+            lte={"data_inicio": fim},
+            gte={"data_fim": ini},
+        )
+    except Exception as e:
+        if not _tabela_inexistente(e):
+            raise
+        return []
@@ -1,30 +1,17 @@
 import streamlit as st
-import re
-from database import listar_registros, inserir_registro, atualizar_registro, excluir_registro
+from database import inserir_registro, atualizar_registro, excluir_registro
+from utils_ui import show_logo
+from busca_clientes import indice, registrar_escrita
+from phone_utils import format_br_phone
 
 TABELA = "ag_clientes"
 FORM_NS = "clientes_form"
-
-# ----------------------
-# Utilidades telefone
-# ----------------------
-def _digits_only(s: str | None) -> str:
-    return re.sub(r"\D", "", s or "")
-
-def _format_phone_br(s: str | None) -> str:
-    d = _digits_only(s)
-    if len(d) >= 11:
-        return f"({d[:2]}) {d[2:7]}-{d[7:11]}"
-    if len(d) == 10:
-        return f"({d[:2]}) {d[2:6]}-{d[6:10]}"
-    if len(d) >= 2:
-        return f"({d[:2]}) {d[2:]}"
-    return d
+POR_PAGINA = 25
 
 def _header():
     col_logo, col_title = st.columns([1,6])
     with col_logo:
-        st.image("start.png", width=80)
+        show_logo(width=80)
     with col_title:
         st.markdown("<h2>Clientes</h2>", unsafe_allow_html=True)
 
@@ -46,14 +33,15 @@ def modal_editar(item):
             key=f"tel_edit_{item['id']}",
             help="Digite apenas números ou no formato (DD) 9XXXX-XXXX"
         )
-        tel_preview = _format_phone_br(tel_raw)
+        tel_preview = format_br_phone(tel_raw)
         if tel_preview and tel_preview != tel_raw:
             st.caption(f"Formatado: {tel_preview}")
         email = st.text_input("Email", value=item.get("email",""))
         salvar = st.form_submit_button("Salvar")  # secundário
     if salvar:
-        payload = {"nome": nome, "telefone": _format_phone_br(tel_raw), "email": email}
-        atualizar_registro(TABELA, item["id"], payload)
+        payload = {"nome": nome, "telefone": format_br_phone(tel_raw), "email": email}
+        row = atualizar_registro(TABELA, item["id"], payload)
+        registrar_escrita(item.get("profissional_id"), row)
         st.success("Atualizado!")
         st.rerun()
 
@@ -72,19 +60,20 @@ def render():
                 key=_k("tel"),
                 help="Digite apenas números ou no formato (DD) 9XXXX-XXXX"
             )
-            tel_preview = _format_phone_br(tel_raw)
+            tel_preview = format_br_phone(tel_raw)
             if tel_preview and tel_preview != tel_raw:
                 st.caption(f"Formatado: {tel_preview}")
         with c3:
             email = st.text_input("Email", key=_k("email"))
         enviar = st.form_submit_button("Incluir", type="primary")
     if enviar:
-        inserir_registro(TABELA, {
+        row = inserir_registro(TABELA, {
             "profissional_id": prof_id,
             "nome": nome,
-            "telefone": _format_phone_br(tel_raw),
+            "telefone": format_br_phone(tel_raw),
             "email": email
         })
+        registrar_escrita(prof_id, row)
         st.success("Cliente incluído!")
         st.session_state[f"{FORM_NS}_version"] = _v() + 1
         st.rerun()
@@ -92,7 +81,24 @@ def render():
     st.divider()
     st.subheader("Lista de clientes")
 
-    itens = listar_registros(TABELA, {"profissional_id": prof_id}, order="nome")
+    # busca e paginação no índice em memória (busca_clientes.py): só a página atual vira widgets
+    busca = st.text_input(
+        "Buscar",
+        placeholder="nome, telefone ou e-mail",
+        key="cli_busca",
+        label_visibility="collapsed",
+    )
+    achados = indice(prof_id).buscar(busca)
+    total = len(achados)
+    paginas = max(1, -(-total // POR_PAGINA))
+    if st.session_state.get("cli_busca_anterior") != busca:
+        st.session_state["cli_busca_anterior"] = busca
+        st.session_state["cli_pagina"] = 0
+    pagina = min(st.session_state.get("cli_pagina", 0), paginas - 1)
+    itens = achados[pagina * POR_PAGINA:(pagina + 1) * POR_PAGINA]
+
+    if not itens:
+        st.info("Nenhum cliente encontrado." if busca else "Nenhum cliente cadastrado.")
     for it in itens:
         col_info, col_actions = st.columns([6, 4])
         with col_info:
@@ -114,5 +120,19 @@ def render():
                 st.warning("Clique novamente para confirmar.")
             else:
                 excluir_registro(TABELA, it["id"])
+                registrar_escrita(prof_id, removido_id=it["id"])
                 st.success("Excluído!")
                 st.rerun()
+
+    if paginas > 1:
+        p1, p2, p3 = st.columns([1, 2, 1])
+        if p1.button("◀ Anterior", key="cli_pag_ant", disabled=pagina == 0, use_container_width=True):
+            st.session_state["cli_pagina"] = pagina - 1
+            st.rerun()
+        p2.markdown(
+            f"<div style='text-align:center'>Página {pagina + 1} de {paginas} • {total} clientes</div>",
+            unsafe_allow_html=True,
+        )
+        if p3.button("Próxima ▶", key="cli_pag_prox", disabled=pagina >= paginas - 1, use_container_width=True):
+            st.session_state["cli_pagina"] = pagina + 1
+            st.rerun()
@@ -1,27 +1,20 @@
 # dashboard.py
 import streamlit as st
 from datetime import date, timedelta
-from database import supabase  # usa o SDK já configurado no seu database.py
+from database import supabase, _rpc_inexistente  # usa o SDK já configurado no seu database.py
+from utils_ui import show_logo, inject_css
 
 TITLE = "Agenda Profissional"
 
 def _header():
     col_logo, col_title = st.columns([1,6])
     with col_logo:
-        st.image("start.png", width=160)
+        show_logo(width=160)
     with col_title:
         st.markdown(f"<h2 style='margin:0'>{TITLE}</h2>", unsafe_allow_html=True)
 
-def _inject_css():
-    # tenta carregar style.css global (se existir) + garante CSS mínimo dos KPIs
-    css = ""
-    try:
-        with open("style.css", "r", encoding="utf-8") as f:
-            css = f.read()
-    except Exception:
-        pass
-
-    extra = """
+# CSS mínimo dos KPIs (o style.css global já é injetado pelo app.py)
+CSS_KPIS = """
     /* KPI cards */
     .kpi-row { margin-top: .5rem; margin-bottom: 1rem; }
     .kpi-card{
@@ -51,7 +44,9 @@ def _inject_css():
         text-shadow: 0 1px 1px rgba(0,0,0,.25);
     }
     """
-    st.markdown(f"<style>{css}\n{extra}</style>", unsafe_allow_html=True)
+
+def _inject_css():
+    inject_css(None, extra=CSS_KPIS)
 
 def _count_exact(q):
     """
@@ -153,6 +148,28 @@ def _contagens_status(prof_id: str):
     )
     return confirmados, pendentes, cancelados, concluidos_hoje
 
+def _contagens_agregadas(prof_id: str):
+    """
+    Os oito KPIs em uma única chamada (RPC ag_kpis_dashboard). A função lê os contadores
+    diários pré-calculados de ag_agenda_resumo_diario (sql/002_resumo_diario.sql).
+    Se a função ainda não existir no banco, cai na sequência antiga de contagens.
+    Retorna ((dia, mes_ant, mes_ate_ontem, total_mes), (conf, pend, canc, concl_hoje)).
+    """
+    try:
+        resp = supabase.rpc(
+            "ag_kpis_dashboard",
+            {"p_profissional_id": prof_id, "p_hoje": str(date.today())},
+        ).execute()
+        row = (resp.data or [None])[0]
+        if row:
+            basicas = (int(row["dia"]), int(row["mes_anterior"]), int(row["mes_ate_ontem"]), int(row["total_mes"]))
+            status = (int(row["confirmados"]), int(row["pendentes"]), int(row["cancelados"]), int(row["concluidos_hoje"]))
+            return basicas, status
+    except Exception as e:
+        if not _rpc_inexistente(e):
+            raise
+    return _contagens_basicas(prof_id), _contagens_status(prof_id)
+
 def _kpi_card(label: str, value: int):
     html = f"""
     <div class="kpi-card">
@@ -172,8 +189,9 @@ def render():
         st.error("Profissional não identificado na sessão.")
         return
 
+    (a, b, c, d), (conf, pend, canc, concl_hoje) = _contagens_agregadas(prof_id)
+
     # Linha 1 — KPIs básicos
-    a, b, c, d = _contagens_basicas(prof_id)
     st.markdown('<div class="kpi-row"></div>', unsafe_allow_html=True)
     c1, c2, c3, c4 = st.columns(4, gap="small")
     with c1: _kpi_card("Atendimentos do dia", a)
@@ -182,7 +200,6 @@ def render():
     with c4: _kpi_card("Total no mês (a + c)", d)
 
     # Linha 2 — KPIs por status (Confirmados, Pendentes, Cancelados, Concluídos hoje)
-    conf, pend, canc, concl_hoje = _contagens_status(prof_id)
     st.markdown('<div class="kpi-row"></div>', unsafe_allow_html=True)
     s1, s2, s3, s4 = st.columns(4, gap="small")
     with s1: _kpi_card("Agendamentos Confirmados", conf)
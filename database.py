@@ -1,8 +1,10 @@
 import os
-import psycopg2
-from supabase import create_client
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 dotenv_path = os.path.join(BASE_DIR, ".env")
@@ -11,13 +13,33 @@ load_dotenv(dotenv_path)
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-print("DEBUG: SUPABASE_URL =", SUPABASE_URL)
-print("DEBUG: SUPABASE_KEY =", (SUPABASE_KEY[:10] + " ...") if SUPABASE_KEY else None)
+# ===============================
+# Cliente Supabase (criado no primeiro uso)
+# ===============================
+# importar o SDK e montar o cliente custa caro; páginas e scripts que não tocam a
+# API REST (ou só a tocam depois do primeiro render) não pagam isso na partida.
+_cliente = None
+_cliente_lock = threading.Lock()
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("❌ SUPABASE_URL ou SUPABASE_KEY não encontrados no .env")
+def get_supabase():
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("❌ SUPABASE_URL ou SUPABASE_KEY não encontrados no .env")
+                from supabase import create_client
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+                _cliente = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _cliente
+
+class _SupabaseLazy:
+    """`supabase.table(...)`, `supabase.rpc(...)` etc. delegam ao cliente único de get_supabase()."""
+
+    def __getattr__(self, nome):
+        return getattr(get_supabase(), nome)
+
+supabase = _SupabaseLazy()
 
 def _has_db_env() -> bool:
     return all([
@@ -27,66 +49,786 @@ def _has_db_env() -> bool:
         os.getenv("SUPABASE_DB_PASS"),
     ])
 
-def get_connection():
-    if not _has_db_env():
-        raise RuntimeError(
-            "Variáveis de conexão PostgreSQL ausentes. Defina SUPABASE_DB_HOST, SUPABASE_DB_NAME, "
-            "SUPABASE_DB_USER, SUPABASE_DB_PASS e SUPABASE_DB_PORT no .env.\n"
-            "Ou use apenas o SDK do Supabase (sem executar_sql)."
-        )
-    conn = psycopg2.connect(
+def _env_int(nome: str, default: int) -> int:
+    try:
+        return int(os.getenv(nome, default))
+    except (TypeError, ValueError):
+        return default
+
+def _nova_conexao_pg():
+    import psycopg2
+
+    return psycopg2.connect(
         host=os.getenv("SUPABASE_DB_HOST"),
         dbname=os.getenv("SUPABASE_DB_NAME"),
         user=os.getenv("SUPABASE_DB_USER"),
         password=os.getenv("SUPABASE_DB_PASS"),
         port=os.getenv("SUPABASE_DB_PORT", "5432"),
         sslmode=os.getenv("SUPABASE_DB_SSLMODE", "require"),
+        connect_timeout=_env_int("SUPABASE_DB_CONNECT_TIMEOUT", 10),
     )
-    return conn
-
-def listar_registros(tabela: str, filtros: Optional[Dict[str, Any]] = None, order: Optional[str] = None) -> List[Dict[str, Any]]:
-    q = supabase.table(tabela).select("*")
-    if filtros:
-        for k, v in filtros.items():
-            if v is None:
-                continue
+
+# ===============================
+# Pool de conexões PostgreSQL
+# ===============================
+class _ConexaoPool:
+    """
+    Conexão emprestada do pool. Delega tudo para a conexão psycopg2 real;
+    close() e o fim do bloco `with` devolvem a conexão ao pool em vez de fechá-la.
+    """
+
+    def __init__(self, pool: "_PoolConexoes", raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, nome):
+        if self._raw is None:
+            import psycopg2
+
+            raise psycopg2.InterfaceError("Conexão já devolvida ao pool")
+        return getattr(self._raw, nome)
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._devolver(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._raw is not None and not self._raw.closed:
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        # conexão esquecida sem close(): devolve para não vazar o slot
+        try:
+            self.close()
+        except Exception:
+            pass
+
+class _PoolConexoes:
+    """
+    Pool thread-safe compartilhado pelo processo (todas as sessões do Streamlit).
+    - health check (SELECT 1) ao reutilizar conexão ociosa há mais de `ping_s`
+    - descarte de conexões ociosas há mais de `idle_s` (mantendo o mínimo)
+    - espera até `timeout_s` quando todas as `max_conn` estão em uso
+    """
+
+    def __init__(self, min_conn: int, max_conn: int, idle_s: int, ping_s: int, timeout_s: int):
+        self.min_conn = max(0, min_conn)
+        self.max_conn = max(1, max_conn, self.min_conn)
+        self.idle_s = idle_s
+        self.ping_s = ping_s
+        self.timeout_s = timeout_s
+        self._ociosas: List[tuple] = []  # (conexão, instante em que voltou ao pool)
+        self._em_uso = 0
+        self._cond = threading.Condition()
+        self._stats = {"criadas": 0, "reutilizadas": 0, "descartadas": 0, "falhas_health_check": 0, "esperas": 0}
+
+    def _total(self) -> int:
+        return self._em_uso + len(self._ociosas)
+
+    # Rede (SELECT 1, rollback, close) nunca roda com self._cond: um socket lento ou
+    # meio aberto travaria todo obter()/devolver(). Sob o lock só se mexe em listas e contadores.
+    @staticmethod
+    def _fechar(raws):
+        for raw in raws:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def _saudavel(self, raw, ociosa_desde: float) -> bool:
+        if raw.closed:
+            return False
+        if time.monotonic() - ociosa_desde < self.ping_s:
+            return True
+        try:
+            with raw.cursor() as cur:
+                cur.execute("SELECT 1")
+            raw.rollback()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["falhas_health_check"] += 1
+            return False
+
+    def _evict_ociosas(self) -> List[Any]:
+        # chamada com self._cond; devolve as conexões a fechar depois de soltar o lock
+        agora = time.monotonic()
+        total = self._total()
+        manter, fechar = [], []
+        # _ociosas está em ordem de devolução: as mais antigas vêm primeiro
+        for raw, desde in self._ociosas:
+            if agora - desde > self.idle_s and total > self.min_conn:
+                fechar.append(raw)
+                total -= 1
+            else:
+                manter.append((raw, desde))
+        self._ociosas = manter
+        self._stats["descartadas"] += len(fechar)
+        return fechar
+
+    def obter(self) -> _ConexaoPool:
+        limite = time.monotonic() + self.timeout_s
+        while True:
+            candidata, esgotado = None, False
+            with self._cond:
+                fechar = self._evict_ociosas()
+                while True:
+                    if self._ociosas:
+                        candidata = self._ociosas.pop()  # LIFO: a mais "quente" primeiro
+                        self._em_uso += 1  # o slot fica reservado enquanto ela é conferida
+                        break
+                    if self._total() < self.max_conn:
+                        self._em_uso += 1  # reserva o slot antes de conectar fora do lock
+                        break
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        esgotado = True
+                        break
+                    self._stats["esperas"] += 1
+                    self._cond.wait(restante)
+            self._fechar(fechar)
+            if esgotado:
+                raise RuntimeError(
+                    f"Pool PostgreSQL esgotado ({self.max_conn} conexões em uso). "
+                    "Aumente SUPABASE_DB_POOL_MAX ou SUPABASE_DB_POOL_TIMEOUT."
+                )
+            if candidata is None:
+                break
+            raw, desde = candidata
+            if self._saudavel(raw, desde):
+                with self._cond:
+                    self._stats["reutilizadas"] += 1
+                return _ConexaoPool(self, raw)
+            self._fechar([raw])
+            with self._cond:
+                self._em_uso -= 1
+                self._stats["descartadas"] += 1
+                self._cond.notify()
+
+        try:
+            raw = _nova_conexao_pg()
+        except Exception:
+            with self._cond:
+                self._em_uso -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["criadas"] += 1
+        return _ConexaoPool(self, raw)
+
+    def _devolver(self, raw):
+        volta = False
+        if not raw.closed:
+            try:
+                from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+                # não devolve transação aberta/abortada ao pool
+                if raw.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    raw.rollback()
+                volta = True
+            except Exception:
+                self._fechar([raw])
+        with self._cond:
+            self._em_uso -= 1
+            if volta:
+                self._ociosas.append((raw, time.monotonic()))
+            else:
+                self._stats["descartadas"] += 1
+            self._cond.notify()
+
+    def fechar_todas(self):
+        with self._cond:
+            fechar = [raw for raw, _ in self._ociosas]
+            self._ociosas = []
+            self._stats["descartadas"] += len(fechar)
+        self._fechar(fechar)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                **self._stats,
+                "em_uso": self._em_uso,
+                "ociosas": len(self._ociosas),
+                "min": self.min_conn,
+                "max": self.max_conn,
+            }
+
+_pool: Optional[_PoolConexoes] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> _PoolConexoes:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _PoolConexoes(
+                    min_conn=_env_int("SUPABASE_DB_POOL_MIN", 1),
+                    max_conn=_env_int("SUPABASE_DB_POOL_MAX", 10),
+                    idle_s=_env_int("SUPABASE_DB_POOL_IDLE_SECS", 300),
+                    ping_s=_env_int("SUPABASE_DB_POOL_PING_SECS", 30),
+                    timeout_s=_env_int("SUPABASE_DB_POOL_TIMEOUT", 30),
+                )
+    return _pool
+
+def get_connection():
+    """
+    Empresta uma conexão do pool do processo. Use `with get_connection() as conn:`
+    (commit/rollback automático) ou chame conn.close() para devolvê-la.
+    """
+    if not _has_db_env():
+        raise RuntimeError(
+            "Variáveis de conexão PostgreSQL ausentes. Defina SUPABASE_DB_HOST, SUPABASE_DB_NAME, "
+            "SUPABASE_DB_USER, SUPABASE_DB_PASS e SUPABASE_DB_PORT no .env.\n"
+            "Ou use apenas o SDK do Supabase (sem executar_sql)."
+        )
+    return _get_pool().obter()
+
+def estatisticas_pool() -> Dict[str, Any]:
+    """Uso do pool: conexões criadas, reutilizadas, descartadas, em uso e ociosas."""
+    if _pool is None:
+        return {"criadas": 0, "reutilizadas": 0, "descartadas": 0, "falhas_health_check": 0,
+                "esperas": 0, "em_uso": 0, "ociosas": 0}
+    return _pool.estatisticas()
+
+def fechar_pool() -> None:
+    if _pool is not None:
+        _pool.fechar_todas()
+
+# ===============================
+# Cache de leitura (read-through)
+# ===============================
+TENANT_COL = "profissional_id"
+# views lidas pelo cache: escrever numa tabela-base derruba também as views que a usam
+VIEWS_DEPENDENTES: Dict[str, tuple] = {
+    "ag_servicos": ("ag_servicos_detalhados",),
+    "ag_agenda": ("ag_servicos_detalhados",),
+    "ag_tipos_servicos": ("ag_servicos_detalhados",),
+}
+
+def _congelar(v: Any) -> Any:
+    if isinstance(v, dict):
+        return tuple(sorted((k, _congelar(x)) for k, x in v.items()))
+    if isinstance(v, (list, tuple, set)):
+        return tuple(_congelar(x) for x in v)
+    return v
+
+class _QueryCache:
+    """
+    Cache LRU com TTL para listar_registros, compartilhado pelo processo.
+    Cada entrada guarda a tabela e o tenant (profissional_id) para que as
+    escritas invalidem só o que foi afetado.
+    """
+
+    def __init__(self, ttl_s: float, max_entradas: int):
+        self.ttl_s = ttl_s
+        self.max_entradas = max_entradas
+        self._dados: "OrderedDict[tuple, tuple]" = OrderedDict()  # chave -> (expira_em, linhas)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _contar(self, tabela: str, campo: str):
+        por_tabela = self._stats.setdefault(tabela, {"hits": 0, "misses": 0, "invalidacoes": 0})
+        por_tabela[campo] += 1
+
+    def obter(self, chave: tuple) -> Optional[List[Dict[str, Any]]]:
+        if self.ttl_s <= 0:
+            return None
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None and item[0] > time.monotonic():
+                self._dados.move_to_end(chave)
+                self._contar(chave[0], "hits")
+                return item[1]
+            if item is not None:
+                del self._dados[chave]
+            self._contar(chave[0], "misses")
+            return None
+
+    def guardar(self, chave: tuple, linhas: List[Dict[str, Any]]):
+        if self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (time.monotonic() + self.ttl_s, linhas)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def invalidar(self, tabela: str, tenant: Any = None):
+        """
+        Remove as entradas da tabela para o tenant informado. Consultas sem
+        filtro de tenant (ex.: listar todos os profissionais) sempre caem;
+        tenant=None invalida a tabela inteira.
+        """
+        tabelas = {tabela, *VIEWS_DEPENDENTES.get(tabela, ())}
+        with self._lock:
+            alvo = None if tenant is None else str(tenant)
+            for chave in [c for c in self._dados if c[0] in tabelas]:
+                if alvo is None or chave[1] is None or chave[1] == alvo:
+                    del self._dados[chave]
+            self._contar(tabela, "invalidacoes")
+        for fn in list(_ouvintes.get(tabela, ())):
+            fn(tenant)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+        for fn in {f for fns in list(_ouvintes.values()) for f in fns}:
+            fn(None)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            por_tabela = {t: dict(v) for t, v in self._stats.items()}
+            return {
+                "hits": sum(v["hits"] for v in por_tabela.values()),
+                "misses": sum(v["misses"] for v in por_tabela.values()),
+                "entradas": len(self._dados),
+                "por_tabela": por_tabela,
+            }
+
+_cache = _QueryCache(
+    ttl_s=float(os.getenv("AGENDA_CACHE_TTL_SECS", "60")),
+    max_entradas=_env_int("AGENDA_CACHE_MAX_ENTRIES", 256),
+)
+
+# caches derivados (ex.: relatorios.py) que precisam saber quando uma tabela foi escrita
+_ouvintes: Dict[str, List[Callable[[Any], None]]] = {}
+
+def ao_invalidar(tabela: str, fn: Callable[[Any], None]) -> None:
+    """Registra fn(tenant) para ser chamada a cada escrita em `tabela` (tenant None = tabela inteira)."""
+    lst = _ouvintes.setdefault(tabela, [])
+    if fn not in lst:
+        lst.append(fn)
+
+def _chave_cache(tabela: str, filtros: Optional[Dict[str, Any]], order: Optional[str], colunas: str, **extras: Any) -> tuple:
+    filtros = {k: v for k, v in (filtros or {}).items() if v is not None}
+    tenant = filtros.get(TENANT_COL)
+    return (tabela, None if tenant is None else str(tenant), _congelar(filtros), order, colunas, _congelar(extras))
+
+def _invalidar_por_linhas(tabela: str, linhas: Optional[List[Dict[str, Any]]], payload: Optional[Dict[str, Any]] = None):
+    tenants = {r.get(TENANT_COL) for r in (linhas or []) if isinstance(r, dict)}
+    if payload and TENANT_COL in payload:
+        tenants.add(payload.get(TENANT_COL))
+    if not tenants or None in tenants:
+        _cache.invalidar(tabela)
+        return
+    for t in tenants:
+        _cache.invalidar(tabela, t)
+
+def estatisticas_cache() -> Dict[str, Any]:
+    """Hits/misses do cache de leitura (total e por tabela)."""
+    return _cache.estatisticas()
+
+def limpar_cache(tabela: Optional[str] = None, tenant: Any = None) -> None:
+    if tabela is None:
+        _cache.limpar()
+    else:
+        _cache.invalidar(tabela, tenant)
+
+def _colunas_select(colunas: Optional[List[str]]) -> str:
+    if not colunas:
+        return "*"
+    return ",".join(colunas)
+
+def _aplicar_filtros(
+    q,
+    filtros: Optional[Dict[str, Any]] = None,
+    gte: Optional[Dict[str, Any]] = None,
+    lte: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+    like: Optional[Dict[str, str]] = None,
+    ilike: Optional[Dict[str, str]] = None,
+):
+    """Aplica igualdade + predicados de intervalo/lista/padrão; valores None são ignorados."""
+    for k, v in (filtros or {}).items():
+        if v is not None:
             q = q.eq(k, v)
-    if order:
-        q = q.order(order)
-    res = q.execute()
-    return res.data or []
+    for k, v in (gte or {}).items():
+        if v is not None:
+            q = q.gte(k, str(v) if hasattr(v, "isoformat") else v)
+    for k, v in (lte or {}).items():
+        if v is not None:
+            q = q.lte(k, str(v) if hasattr(v, "isoformat") else v)
+    for k, v in (in_ or {}).items():
+        if v is not None:
+            q = q.in_(k, list(v))
+    for k, v in (like or {}).items():
+        if v is not None:
+            q = q.like(k, v)
+    for k, v in (ilike or {}).items():
+        if v is not None:
+            q = q.ilike(k, v)
+    return q
+
+def listar_registros(
+    tabela: str,
+    filtros: Optional[Dict[str, Any]] = None,
+    order: Optional[str] = None,
+    colunas: Optional[List[str]] = None,
+    gte: Optional[Dict[str, Any]] = None,
+    lte: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+    like: Optional[Dict[str, str]] = None,
+    limit: Optional[int] = None,
+    desc: bool = False,
+    ilike: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    SELECT com projeção e predicados:
+      listar_registros("ag_agenda", {"profissional_id": pid},
+                       colunas=["id", "data_atendimento", "hora_inicio"],
+                       gte={"data_atendimento": ini}, lte={"data_atendimento": fim},
+                       order="data_atendimento", limit=200)
+    `in_` recebe listas (ex.: {"id": [1, 2]}) e `like` padrões SQL (ex.: {"nome": "Ana%"});
+    `ilike` é o mesmo sem diferenciar maiúsculas/minúsculas.
+    Uma lista vazia em `in_` retorna [] sem ir ao banco.
+    """
+    if in_ and any(v is not None and len(v) == 0 for v in in_.values()):
+        return []
+    sel = _colunas_select(colunas)
+    chave = _chave_cache(tabela, filtros, order, sel, gte=gte, lte=lte, in_=in_, like=like, ilike=ilike, limit=limit, desc=desc)
+    linhas = _cache.obter(chave)
+    if linhas is None:
+        q = _aplicar_filtros(supabase.table(tabela).select(sel), filtros, gte, lte, in_, like, ilike)
+        if order:
+            q = q.order(order, desc=desc)
+        if limit:
+            q = q.limit(int(limit))
+        res = q.execute()
+        linhas = res.data or []
+        _cache.guardar(chave, linhas)
+    # cópia rasa: quem chama pode alterar os dicts sem corromper o cache
+    return [dict(r) for r in linhas]
+
+TAMANHO_PAGINA = _env_int("AGENDA_PAGE_SIZE", 1000)
+
+def _valor_postgrest(v: Any) -> str:
+    s = str(v)
+    # valores com separadores do PostgREST precisam de aspas dentro de or=(...)
+    if any(c in s for c in ',.:()" '):
+        return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return s
+
+def _consulta_keyset(
+    tabela: str,
+    sel: str,
+    filtros, gte, lte, in_, like,
+    order_col: str,
+    desc: bool,
+    ultimo: Optional[tuple],
+    limite: int,
+):
+    op = "lt" if desc else "gt"
+    q = _aplicar_filtros(supabase.table(tabela).select(sel), filtros, gte, lte, in_, like)
+    if ultimo is not None:
+        v, i = _valor_postgrest(ultimo[0]), _valor_postgrest(ultimo[1])
+        if order_col == "id":
+            q = q.filter("id", op, ultimo[1])
+        else:
+            q = q.or_(f"{order_col}.{op}.{v},and({order_col}.eq.{v},id.{op}.{i})")
+    if order_col != "id":
+        q = q.order(order_col, desc=desc)
+    return q.order("id", desc=desc).limit(limite)
+
+def _select_keyset(colunas: Optional[List[str]], order_col: str) -> str:
+    if not colunas:
+        return "*"
+    extras = [c for c in (order_col, "id") if c not in colunas]
+    return _colunas_select(list(colunas) + extras)
+
+def iterar_registros(
+    tabela: str,
+    filtros: Optional[Dict[str, Any]] = None,
+    order_col: str = "id",
+    colunas: Optional[List[str]] = None,
+    gte: Optional[Dict[str, Any]] = None,
+    lte: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+    like: Optional[Dict[str, str]] = None,
+    tamanho_pagina: Optional[int] = None,
+    desc: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre a tabela inteira em páginas, sem OFFSET e sem o corte de linhas do
+    PostgREST, usando paginação por chave (keyset) em (order_col, id).
+    As linhas são entregues uma a uma; só uma página fica em memória.
+    `order_col` deve ser NOT NULL (ex.: data_atendimento). Não passa pelo cache.
+    """
+    tamanho = int(tamanho_pagina or TAMANHO_PAGINA)
+    sel = _select_keyset(colunas, order_col)
+    ultimo: Optional[tuple] = None
+    while True:
+        q = _consulta_keyset(tabela, sel, filtros, gte, lte, in_, like, order_col, desc, ultimo, tamanho)
+        pagina = q.execute().data or []
+        if not pagina:
+            return
+        for r in pagina:
+            yield r
+        # não para em página "curta": o max-rows do PostgREST pode ser menor que `tamanho`
+        fim = pagina[-1]
+        ultimo = (fim.get(order_col), fim.get("id"))
+
+def pagina_registros(
+    tabela: str,
+    filtros: Optional[Dict[str, Any]] = None,
+    order_col: str = "id",
+    colunas: Optional[List[str]] = None,
+    gte: Optional[Dict[str, Any]] = None,
+    lte: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+    like: Optional[Dict[str, str]] = None,
+    cursor: Optional[tuple] = None,
+    tamanho: int = 20,
+    desc: bool = False,
+) -> tuple:
+    """
+    Uma tela de linhas em uma ida ao banco, por keyset em (order_col, id):
+    retorna (linhas, cursor_da_proxima) — cursor None quando não há próxima página.
+    Passe o cursor devolvido para buscar a página seguinte. Passa pelo cache de leitura.
+    """
+    sel = _select_keyset(colunas, order_col)
+    chave = _chave_cache(tabela, filtros, order_col, sel, gte=gte, lte=lte, in_=in_, like=like,
+                         cursor=cursor, tamanho=tamanho, desc=desc, pagina=True)
+    linhas = _cache.obter(chave)
+    if linhas is None:
+        # pede uma linha a mais só para saber se existe próxima página
+        q = _consulta_keyset(tabela, sel, filtros, gte, lte, in_, like, order_col, desc, cursor, int(tamanho) + 1)
+        linhas = q.execute().data or []
+        _cache.guardar(chave, linhas)
+    linhas = [dict(r) for r in linhas]
+    if len(linhas) <= int(tamanho):
+        return linhas, None
+    linhas = linhas[:int(tamanho)]
+    fim = linhas[-1]
+    return linhas, (fim.get(order_col), fim.get("id"))
+
+# ===============================
+# Leituras independentes em paralelo
+# ===============================
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_env_int("AGENDA_FETCH_WORKERS", 8),
+                    thread_name_prefix="agenda-fetch",
+                )
+    return _executor
+
+def buscar_em_paralelo(consultas: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Executa consultas independentes ao mesmo tempo num pool limitado de threads
+    e devolve {nome: resultado}. A latência fica próxima da consulta mais lenta.
+      r = buscar_em_paralelo({
+          "prof": partial(listar_registros, "ag_profissionais", {"id": pid}),
+          "clientes": partial(listar_registros, "ag_clientes", {"profissional_id": pid}),
+      })
+    Se alguma falhar, a primeira exceção é relançada depois que todas terminarem.
+    Não chame funções do Streamlit (st.*) dentro das consultas.
+    """
+    if len(consultas) <= 1:
+        return {nome: fn() for nome, fn in consultas.items()}
+    futuros = {nome: _get_executor().submit(fn) for nome, fn in consultas.items()}
+    resultados, erro = {}, None
+    for nome, fut in futuros.items():
+        try:
+            resultados[nome] = fut.result()
+        except Exception as e:
+            if erro is None:
+                erro = e
+    if erro is not None:
+        raise erro
+    return resultados
 
 def inserir_registro(tabela: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     res = supabase.table(tabela).insert(payload).execute()
+    _invalidar_por_linhas(tabela, res.data, payload)
     if res.data:
         return res.data[0]
     raise RuntimeError(f"Falha ao inserir em {tabela}")
 
 def atualizar_registro(tabela: str, id_value: str, payload: Dict[str, Any]) -> Dict[str, Any]:
     res = supabase.table(tabela).update(payload).eq('id', id_value).execute()
+    _invalidar_por_linhas(tabela, res.data, payload)
     if res.data:
         return res.data[0]
     raise RuntimeError(f"Falha ao atualizar {tabela} id={id_value}")
 
 def excluir_registro(tabela: str, id_value: str) -> None:
-    supabase.table(tabela).delete().eq('id', id_value).execute()
+    res = supabase.table(tabela).delete().eq('id', id_value).execute()
+    _invalidar_por_linhas(tabela, getattr(res, "data", None))
+
+# ===============================
+# Escritas em lote
+# ===============================
+LOTE_INSERT = _env_int("AGENDA_BULK_INSERT", 500)
+LOTE_IDS = 200  # ids por requisição em filtros id=in.(...) (limite prático de URL)
+
+def _lotes(itens: List[Any], tamanho: int):
+    for i in range(0, len(itens), max(1, tamanho)):
+        yield itens[i:i + tamanho]
+
+def _exigir_filtro(op: str, tabela: str, filtros, ids, in_):
+    # mesmo critério de _aplicar_filtros: valores None não viram filtro
+    tem_filtro = any(v is not None for v in (filtros or {}).values())
+    tem_in = any(v is not None for v in (in_ or {}).values())
+    if not ids and not tem_filtro and not tem_in:
+        raise ValueError(f"{op} em {tabela} sem filtro/ids afetaria a tabela inteira")
+
+def inserir_registros(
+    tabela: str,
+    payloads: List[Dict[str, Any]],
+    tamanho_lote: Optional[int] = None,
+    ignorar_conflito_em: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    INSERT de várias linhas: uma requisição por lote de `tamanho_lote` (padrão AGENDA_BULK_INSERT).
+    Com `ignorar_conflito_em` (coluna única), linhas já existentes são puladas em
+    silêncio (ON CONFLICT DO NOTHING) e só as novas são retornadas.
+    """
+    out: List[Dict[str, Any]] = []
+    for lote in _lotes(list(payloads), int(tamanho_lote or LOTE_INSERT)):
+        if ignorar_conflito_em:
+            res = supabase.table(tabela).upsert(lote, on_conflict=ignorar_conflito_em, ignore_duplicates=True).execute()
+            out.extend(res.data or [])
+            continue
+        res = supabase.table(tabela).insert(lote).execute()
+        if not res.data:
+            _invalidar_por_linhas(tabela, out or lote)
+            raise RuntimeError(f"Falha ao inserir lote em {tabela}")
+        out.extend(res.data)
+    _invalidar_por_linhas(tabela, out)
+    return out
+
+def atualizar_registros(
+    tabela: str,
+    payload: Dict[str, Any],
+    ids: Optional[List[Any]] = None,
+    filtros: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+    gte: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    UPDATE do mesmo payload em várias linhas, por lista de ids e/ou filtros.
+    Com ids, uma requisição a cada LOTE_IDS ids; só com filtros, uma requisição.
+    `gte` restringe por limite inferior (ex.: ocorrências futuras de uma série).
+    """
+    _exigir_filtro("atualizar_registros", tabela, filtros, ids, in_)
+    out: List[Dict[str, Any]] = []
+    grupos = list(_lotes(list(ids), LOTE_IDS)) if ids else [None]
+    try:
+        for grupo in grupos:
+            q = _aplicar_filtros(supabase.table(tabela).update(payload), filtros, gte=gte, in_=in_)
+            if grupo is not None:
+                q = q.in_("id", grupo)
+            out.extend(q.execute().data or [])
+    finally:
+        _invalidar_por_linhas(tabela, out, {**(filtros or {}), **payload})
+    return out
+
+def excluir_registros(
+    tabela: str,
+    filtros: Optional[Dict[str, Any]] = None,
+    ids: Optional[List[Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+) -> int:
+    """DELETE por filtros e/ou lista de ids (em lotes de LOTE_IDS). Retorna o nº de linhas removidas."""
+    _exigir_filtro("excluir_registros", tabela, filtros, ids, in_)
+    removidas: List[Dict[str, Any]] = []
+    grupos = list(_lotes(list(ids), LOTE_IDS)) if ids else [None]
+    try:
+        for grupo in grupos:
+            q = _aplicar_filtros(supabase.table(tabela).delete(), filtros, in_=in_)
+            if grupo is not None:
+                q = q.in_("id", grupo)
+            removidas.extend(q.execute().data or [])
+    finally:
+        _invalidar_por_linhas(tabela, removidas, filtros)
+    return len(removidas)
+
+def _rpc_inexistente(e: Exception) -> bool:
+    # PostgREST responde PGRST202 quando a função SQL ainda não foi criada no banco
+    txt = f"{getattr(e, 'code', '')} {e}"
+    return "PGRST202" in txt or "Could not find the function" in txt
+
+def _tabela_inexistente(e: Exception) -> bool:
+    # tabela de uma migração ainda não aplicada: PGRST205 (PostgREST) / 42P01 (Postgres)
+    txt = f"{getattr(e, 'code', '')} {e}"
+    return "PGRST205" in txt or "42P01" in txt or "Could not find the table" in txt
+
+def _coluna_inexistente(e: Exception) -> bool:
+    # coluna de uma migração ainda não aplicada: 42703 (Postgres) / PGRST204 (cache do PostgREST)
+    txt = f"{getattr(e, 'code', '')} {e}"
+    return "42703" in txt or "PGRST204" in txt
+
+def atualizar_status_agenda(profissional_id: Any, mudancas: Dict[Any, str]) -> int:
+    """
+    Aplica {id: novo_status} em ag_agenda numa única ida ao banco (RPC
+    ag_atualizar_status_lote, sql/006_status_em_lote.sql). Sem a função no banco,
+    agrupa por status e faz um UPDATE ... WHERE id IN (...) por status.
+    """
+    if not mudancas:
+        return 0
+    itens = [{"id": i, "status": s} for i, s in mudancas.items()]
+    try:
+        res = supabase.rpc(
+            "ag_atualizar_status_lote",
+            {"p_profissional_id": profissional_id, "p_itens": itens},
+        ).execute()
+        n = int(res.data or 0)
+    except Exception as e:
+        if not _rpc_inexistente(e):
+            raise
+        por_status: Dict[str, List[Any]] = {}
+        for i, s in mudancas.items():
+            por_status.setdefault(s, []).append(i)
+        n = 0
+        for s, ids in por_status.items():
+            n += len(atualizar_registros("ag_agenda", {"status": s}, ids=ids, filtros={TENANT_COL: profissional_id}))
+    _cache.invalidar("ag_agenda", profissional_id)
+    return n
 
 def executar_sql(sql: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(sql, params)
+            if cur.description is None:
+                return []
             cols = [d[0] for d in cur.description]
             rows = cur.fetchall()
             return [dict(zip(cols, r)) for r in rows]
 
-def contar(tabela: str, filtros: Optional[Dict[str, Any]] = None) -> int:
-    q = supabase.table(tabela).select("id", count="exact")
-    if filtros:
-        for k, v in filtros.items():
-            if v is None:
-                continue
-            q = q.eq(k, v)
+def contar(
+    tabela: str,
+    filtros: Optional[Dict[str, Any]] = None,
+    gte: Optional[Dict[str, Any]] = None,
+    lte: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, List[Any]]] = None,
+) -> int:
+    q = _aplicar_filtros(supabase.table(tabela).select("id", count="exact"), filtros, gte, lte, in_)
     res = q.execute()
     if getattr(res, "count", None) is not None:
         return int(res.count)
     return len(res.data or [])
+
+def reconstruir_resumo_diario(profissional_id: Optional[Any] = None) -> int:
+    """
+    Recalcula ag_agenda_resumo_diario a partir de ag_agenda (sql/002_resumo_diario.sql).
+    Sem profissional_id reconstrói tudo. Retorna o nº de linhas do rollup geradas.
+    """
+    res = supabase.rpc("ag_rebuild_resumo_diario", {"p_profissional_id": profissional_id}).execute()
+    return int(res.data or 0)
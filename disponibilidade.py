@@ -0,0 +1,405 @@
+# disponibilidade.py
+# Regras de disponibilidade (dias permitidos, feriados, almoço, buffer, capacidade)
+# e o motor que monta a grade de slots. Sem dependência de Streamlit/pandas.
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import date, time, datetime, timedelta
+
+from calendario import CalendarioTrabalho, FERIADOS_FIXOS, _dias_semana, carregar_excecoes
+
+WEEKDAYS_PT = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+
+# ----------------------
+# Regras
+# ----------------------
+def _to_dt(d: date, t: time) -> datetime:
+    return datetime.combine(d, t)
+
+def _overlaps(a_ini: datetime, a_fim: datetime, b_ini: datetime, b_fim: datetime) -> bool:
+    # intervalo [início, fim)
+    return (a_ini < b_fim) and (a_fim > b_ini)
+
+def _weekday_iso(d: date) -> int:
+    # ISO: Monday=1 ... Sunday=7
+    return (d.weekday() + 1)
+
+def _weekday_pt(d: date) -> str:
+    return WEEKDAYS_PT[d.weekday()]
+
+def _feriados_fixos_br(ano: int) -> set[date]:
+    # só os fixos; o calendário compilado (calendario.py) inclui também móveis e municipais
+    return {date(ano, m, d) for (m, d) in FERIADOS_FIXOS}
+
+def _dia_permitido(d: date, prof: dict) -> bool:
+    return _weekday_iso(d) in _dias_semana(prof)
+
+def _as_time(prof: dict | None, field: str, default: time | None) -> time | None:
+    if not prof:
+        return default
+    val = prof.get(field)
+    if not val:
+        return default
+    try:
+        s = str(val)
+        if len(s) == 5:
+            s += ":00"
+        hh, mm, ss = map(int, s.split(":"))
+        return time(hh, mm, ss)
+    except Exception:
+        return default
+
+# ----------------------
+# Motor (sweep line)
+# ----------------------
+def _seg(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+def _hhmm(s: int) -> str:
+    return f"{s // 3600:02d}:{s % 3600 // 60:02d}"
+
+def _slots_do_dia(
+    jornada_ini: time,
+    jornada_fim: time,
+    slot_min: int,
+    buffer_min: int,
+    almoco_ini: time | None,
+    almoco_fim: time | None,
+) -> list[tuple[int, int]]:
+    """
+    Slots (início, fim) em segundos do dia. Como a grade não depende da data,
+    é calculada uma única vez por consulta e reaproveitada em todos os dias.
+    """
+    passo = int(slot_min) * 60
+    buffer = int(buffer_min or 0) * 60
+    j_fim = _seg(jornada_fim)
+    alm = (_seg(almoco_ini), _seg(almoco_fim)) if (almoco_ini and almoco_fim) else None
+    slots = []
+    s = _seg(jornada_ini)
+    while s < j_fim:
+        e = s + passo
+        if e > j_fim:
+            break
+        if alm and s < alm[1] and e > alm[0]:
+            s = max(e, alm[1])
+            continue
+        slots.append((s, e))
+        s = e + buffer
+    return slots
+
+def _indexar_agenda(dados_agenda: list, prof_id: str, data_ini: date, data_fim: date) -> dict:
+    """
+    {dia: [(ini_seg, fim_seg, ordem, cliente, status, obs), ...]} ordenado por início.
+    `ordem` é a posição original em dados_agenda (desempate do "primeiro" atendimento do slot).
+    """
+    idx: dict = {}
+    for ordem, a in enumerate(dados_agenda):
+        if str(a.get("profissional_id")) != str(prof_id):
+            continue
+        try:
+            d = date.fromisoformat(a.get("data_atendimento"))
+            if not (data_ini <= d <= data_fim):
+                continue
+            hi = time.fromisoformat(a.get("hora_inicio"))
+            hf = time.fromisoformat(a.get("hora_fim"))
+        except Exception:
+            continue
+        idx.setdefault(d, []).append((
+            _seg(hi), _seg(hf), ordem,
+            a.get("cliente_nome", ""), a.get("status", ""), a.get("observacoes", ""),
+        ))
+    for lst in idx.values():
+        lst.sort()
+    return idx
+
+def _detalhe(sobrepostos: list[tuple]) -> tuple:
+    # mesma regra da grade original: o primeiro atendimento (na ordem carregada) com
+    # nome de cliente; se nenhum tiver nome, valem os campos do último sobreposto
+    com_nome = [a for a in sobrepostos if a[3]]
+    a = min(com_nome, key=lambda x: x[2]) if com_nome else max(sobrepostos, key=lambda x: x[2])
+    return a[3], a[4], a[5]
+
+def _varrer_dia(slots: list[tuple[int, int]], ags: list[tuple], capacidade: int) -> list[tuple[int, tuple | None]]:
+    """
+    Para cada slot devolve (sobreposições, detalhe do atendimento se ocupado).
+    Início e fim dos slots são crescentes, então um único passe com dois ponteiros
+    mantém o conjunto ativo: entra quem começa antes do fim do slot, sai (heap por
+    fim) quem termina até o início do slot. Custo O((slots + atendimentos) log n)
+    por dia, em vez de slots x atendimentos.
+    """
+    if not ags:
+        return [(0, None)] * len(slots)
+    # atendimentos com fim < início (dados inconsistentes) não cabem no sweep; checados à parte
+    normais = [a for a in ags if a[1] >= a[0]]
+    invertidos = [a for a in ags if a[1] < a[0]]
+    por_fim: list = []   # (fim, ordem)
+    ativos: dict = {}    # ordem -> atendimento
+    out = []
+    i = 0
+    for s, e in slots:
+        while i < len(normais) and normais[i][0] < e:
+            a = normais[i]
+            heapq.heappush(por_fim, (a[1], a[2]))
+            ativos[a[2]] = a
+            i += 1
+        while por_fim and por_fim[0][0] <= s:
+            ativos.pop(heapq.heappop(por_fim)[1], None)
+        extras = [a for a in invertidos if s < a[1] and e > a[0]]
+        n = len(ativos) + len(extras)
+        det = _detalhe(list(ativos.values()) + extras) if n >= capacidade else None
+        out.append((n, det))
+    return out
+
+def grade_disponibilidade(
+    dados_agenda: list,
+    prof: dict,
+    prof_id: str,
+    data_ini: date,
+    data_fim: date,
+    jornada_ini: time,
+    jornada_fim: time,
+    slot_min: int,
+    buffer_min: int,
+    almoco_ini: time | None,
+    almoco_fim: time | None,
+    considerar_feriados: bool,
+    capacidade: int,
+    calendario: CalendarioTrabalho | None = None,
+) -> list[dict]:
+    """
+    Linhas da grade de disponibilidade (mesmas colunas exibidas na aba Disponibilidade),
+    já em ordem de data e horário. Os dias trabalháveis vêm do `calendario`
+    (por padrão, compilado a partir do perfil e de `considerar_feriados`, sem exceções).
+    """
+    slots = _slots_do_dia(jornada_ini, jornada_fim, slot_min, buffer_min, almoco_ini, almoco_fim)
+    horarios = [f"{_hhmm(s)} - {_hhmm(e)}" for s, e in slots]
+    idx = _indexar_agenda(dados_agenda, prof_id, data_ini, data_fim)
+    cal = calendario or CalendarioTrabalho(prof, considerar_feriados=considerar_feriados)
+    cap = int(capacidade or 1)
+
+    rows = []
+    for dia in cal.dias_uteis(data_ini, data_fim):
+        data_str = dia.isoformat()
+        dia_semana = _weekday_pt(dia)
+        for horario, (n, det) in zip(horarios, _varrer_dia(slots, idx.get(dia, []), cap)):
+            if det is None:
+                rows.append({
+                    "Data": data_str, "Dia Semana": dia_semana, "Horário": horario,
+                    "Situação": "Disponível", "Cliente": "", "Status Atendimento": "", "Obs.": "",
+                })
+            else:
+                rows.append({
+                    "Data": data_str, "Dia Semana": dia_semana, "Horário": horario,
+                    "Situação": "Ocupado", "Cliente": det[0], "Status Atendimento": det[1], "Obs.": det[2],
+                })
+    return rows
+
+# ----------------------
+# Índice de intervalos e busca do primeiro horário livre
+# ----------------------
+COLS_REGRAS = [
+    "id", "nome", "dias_semana", "aceita_sabado", "aceita_domingo",
+    "hora_inicio_jornada", "hora_fim_jornada", "almoco_inicio", "almoco_fim",
+    "buffer_minutos", "capacidade_simultanea", "considerar_feriados",
+]
+STATUS_SEM_OCUPACAO = {"Cancelado"}
+
+def _ocupa_horario(a: dict) -> bool:
+    """Atendimento que conta na ocupação (cancelados liberam o horário)."""
+    return (a.get("status") or "Pendente") not in STATUS_SEM_OCUPACAO
+
+class IndiceAgenda:
+    """
+    Índice por dia de um profissional: inícios e fins ordenados (em segundos).
+    Quantos atendimentos sobrepõem [s, e) = #(inícios < e) - #(fins <= s), em O(log n).
+    Quantos correm ao mesmo tempo, no pico, dentro de [s, e) = máximo de
+    #(inícios <= t) - #(fins <= t) para t em s e nos inícios dentro do intervalo.
+    Atendimentos com fim < início (dados inconsistentes) ficam de fora.
+    """
+
+    def __init__(self):
+        self._dias: dict = {}  # dia -> (inícios, fins)
+
+    @classmethod
+    def de_registros(cls, registros: list) -> "IndiceAgenda":
+        idx = cls()
+        brutos: dict = {}
+        for a in registros:
+            try:
+                d = date.fromisoformat(str(a.get("data_atendimento")))
+                ini = _seg(time.fromisoformat(str(a.get("hora_inicio"))))
+                fim = _seg(time.fromisoformat(str(a.get("hora_fim"))))
+            except Exception:
+                continue
+            if fim < ini:
+                continue
+            inis, fins = brutos.setdefault(d, ([], []))
+            inis.append(ini)
+            fins.append(fim)
+        for d, (inis, fins) in brutos.items():
+            idx._dias[d] = (sorted(inis), sorted(fins))
+        return idx
+
+    def ocupacao(self, dia: date, s: int, e: int) -> int:
+        par = self._dias.get(dia)
+        if not par:
+            return 0
+        inis, fins = par
+        return bisect_left(inis, e) - bisect_right(fins, s)
+
+    def pico(self, dia: date, s: int, e: int) -> int:
+        """Máximo de atendimentos simultâneos em [s, e) (o que a capacidade limita)."""
+        par = self._dias.get(dia)
+        if not par:
+            return 0
+        inis, fins = par
+        i, j = bisect_right(inis, s), bisect_right(fins, s)
+        maior = i - j  # em curso no instante s
+        while i < len(inis) and inis[i] < e:
+            t = inis[i]
+            i, j = bisect_right(inis, t, i), bisect_right(fins, t, j)
+            maior = max(maior, i - j)
+        return maior
+
+def _regras_profissional(prof: dict, duracao_min: int) -> dict:
+    return {
+        "slots": _slots_do_dia(
+            _as_time(prof, "hora_inicio_jornada", time(8, 0)),
+            _as_time(prof, "hora_fim_jornada", time(18, 0)),
+            duracao_min,
+            int(prof.get("buffer_minutos") or 0),
+            _as_time(prof, "almoco_inicio", None),
+            _as_time(prof, "almoco_fim", None),
+        ),
+        "capacidade": int(prof.get("capacidade_simultanea") or 1),
+    }
+
+def _livres_do_profissional(
+    prof: dict, indice: IndiceAgenda, calendario: CalendarioTrabalho,
+    inicio: datetime, data_fim: date, duracao_min: int,
+):
+    """Gera, em ordem cronológica e sob demanda, os slots livres de um profissional."""
+    r = _regras_profissional(prof, duracao_min)
+    for dia in calendario.dias_uteis(inicio.date(), data_fim):
+        minimo = _seg(inicio.time()) if dia == inicio.date() else 0
+        for s, e in r["slots"]:
+            if s < minimo:
+                continue
+            if indice.pico(dia, s, e) < r["capacidade"]:
+                yield datetime.combine(dia, time()) + timedelta(seconds=s), e - s
+
+def primeiros_horarios_livres(
+    profissionais: list,
+    agendamentos: list,
+    inicio: datetime,
+    dias: int,
+    duracao_min: int,
+    k: int = 5,
+    excecoes: list | None = None,
+) -> list[dict]:
+    """
+    Os k primeiros slots livres de `duracao_min` entre todos os profissionais,
+    a partir de `inicio` e por `dias` dias, respeitando as regras de cada um
+    (calendário de trabalho, jornada, almoço, buffer e capacidade).
+    Atendimentos cancelados não ocupam horário, como em verificar_conflito.
+    Cada profissional é um gerador preguiçoso; uma fila de prioridade pelo
+    horário do próximo slot livre faz a busca parar nos k primeiros sem montar
+    a grade completa de ninguém.
+    """
+    data_fim = inicio.date() + timedelta(days=max(int(dias), 1) - 1)
+    por_prof: dict = {}
+    for a in filter(_ocupa_horario, agendamentos):
+        por_prof.setdefault(str(a.get("profissional_id")), []).append(a)
+    exc_por_prof: dict = {}
+    for ex in excecoes or []:
+        exc_por_prof.setdefault(str(ex.get("profissional_id")), []).append(ex)
+
+    fila = []
+    geradores = []
+    for n, prof in enumerate(profissionais):
+        indice = IndiceAgenda.de_registros(por_prof.get(str(prof.get("id")), []))
+        cal = CalendarioTrabalho(prof, exc_por_prof.get(str(prof.get("id"))))
+        gen = _livres_do_profissional(prof, indice, cal, inicio, data_fim, duracao_min)
+        geradores.append(gen)
+        prox = next(gen, None)
+        if prox is not None:
+            heapq.heappush(fila, (prox[0], n))
+
+    out = []
+    while fila and len(out) < k:
+        quando, n = heapq.heappop(fila)
+        prof = profissionais[n]
+        out.append({
+            "profissional_id": prof.get("id"),
+            "profissional": prof.get("nome", ""),
+            "data": quando.date(),
+            "hora_inicio": quando.time(),
+            "hora_fim": (quando + timedelta(minutes=int(duracao_min))).time(),
+        })
+        prox = next(geradores[n], None)
+        if prox is not None:
+            heapq.heappush(fila, (prox[0], n))
+    return out
+
+def buscar_primeiros_horarios(inicio: datetime, dias: int, duracao_min: int, k: int = 5) -> list[dict]:
+    """Carrega profissionais ativos e os atendimentos do período e executa a busca."""
+    # import local: o motor acima continua utilizável sem credenciais do Supabase
+    from database import listar_registros, iterar_registros
+
+    profs = listar_registros("ag_profissionais", {"ativo": True}, order="nome", colunas=COLS_REGRAS)
+    if not profs:
+        return []
+    data_fim = inicio.date() + timedelta(days=max(int(dias), 1) - 1)
+    ags = iterar_registros(
+        "ag_agenda",
+        colunas=["profissional_id", "data_atendimento", "hora_inicio", "hora_fim", "status"],
+        order_col="data_atendimento",
+        gte={"data_atendimento": inicio.date()},
+        lte={"data_atendimento": data_fim},
+        in_={"profissional_id": [p["id"] for p in profs]},
+    )
+    excecoes = carregar_excecoes([p["id"] for p in profs], inicio.date(), data_fim)
+    return primeiros_horarios_livres(profs, list(ags), inicio, dias, duracao_min, k, excecoes)
+
+# ----------------------
+# Conflitos na gravação
+# ----------------------
+COLS_CONFLITO = ["id", "data_atendimento", "hora_inicio", "hora_fim", "status"]
+
+def indice_do_dia(registros: list, ignorar_id=None) -> IndiceAgenda:
+    """Índice dos atendimentos que ocupam horário (exclui cancelados e o próprio item em edição)."""
+    return IndiceAgenda.de_registros([
+        a for a in registros
+        if _ocupa_horario(a) and (ignorar_id is None or str(a.get("id")) != str(ignorar_id))
+    ])
+
+def tem_conflito(indice: IndiceAgenda, dia: date, hora_ini: time, hora_fim: time, capacidade: int) -> bool:
+    return indice.pico(dia, _seg(hora_ini), _seg(hora_fim)) >= int(capacidade or 1)
+
+def verificar_conflito(
+    prof_id: str,
+    dia: date,
+    hora_ini: time,
+    hora_fim: time,
+    capacidade: int,
+    status: str = "Pendente",
+    ignorar_id=None,
+) -> bool:
+    """
+    Checagem rápida antes de gravar (o trigger de sql/003_conflito_agenda.sql é a
+    garantia definitiva contra gravações concorrentes).
+    """
+    if (status or "Pendente") in STATUS_SEM_OCUPACAO:
+        return False
+    from database import listar_registros
+
+    registros = listar_registros(
+        "ag_agenda",
+        {"profissional_id": prof_id, "data_atendimento": str(dia)},
+        colunas=COLS_CONFLITO,
+    )
+    return tem_conflito(indice_do_dia(registros, ignorar_id), dia, hora_ini, hora_fim, capacidade)
+
+def erro_de_conflito(e: Exception) -> bool:
+    """True se a exceção veio do trigger de conflito (SQLSTATE 23P01)."""
+    txt = f"{getattr(e, 'code', '')} {e}"
+    return "23P01" in txt or "Conflito de horário" in txt
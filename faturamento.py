@@ -0,0 +1,150 @@
+# faturamento.py
+import streamlit as st
+from datetime import date, timedelta
+from utils_ui import show_logo
+
+TITLE = "Faturamento"
+PERIODOS = ["Este mês", "Mês anterior", "Últimos 30 dias", "Últimos 90 dias", "Este ano", "Personalizado"]
+
+def _header():
+    col_logo, col_title = st.columns([1,6])
+    with col_logo:
+        show_logo(width=80)
+    with col_title:
+        st.markdown(f"<h2 style='margin:0'>{TITLE}</h2>", unsafe_allow_html=True)
+
+def _intervalo(opcao: str, hoje: date) -> tuple[date, date]:
+    if opcao == "Mês anterior":
+        fim = hoje.replace(day=1) - timedelta(days=1)
+        return fim.replace(day=1), fim
+    if opcao == "Últimos 30 dias":
+        return hoje - timedelta(days=29), hoje
+    if opcao == "Últimos 90 dias":
+        return hoje - timedelta(days=89), hoje
+    if opcao == "Este ano":
+        return hoje.replace(month=1, day=1), hoje
+    return hoje.replace(day=1), hoje
+
+def _moeda(v: float) -> str:
+    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def _delta(d: dict, moeda: bool = False) -> str | None:
+    if d["anterior"] == 0 and d["atual"] == 0:
+        return None
+    txt = _moeda(d["variacao"]) if moeda else f"{d['variacao']:+,.0f}".replace(",", ".")
+    if d["variacao_pct"] is not None:
+        txt += f" ({d['variacao_pct']:+.1f}%)"
+    return txt
+
+def _baixar(df, nome: str, rotulo: str, ini: date, fim: date, key: str):
+    csv = df.to_csv(index=False, sep=";", decimal=",").encode("utf-8-sig")
+    st.download_button(
+        f"⬇️ {rotulo} (CSV)",
+        data=csv,
+        file_name=f"faturamento_{nome}_{ini:%Y%m%d}_{fim:%Y%m%d}.csv",
+        mime="text/csv",
+        use_container_width=True,
+        key=key,
+    )
+
+def _tabela(df, colunas: dict, nome: str, ini: date, fim: date, grafico: str | None = None):
+    """Tabela com os rótulos da tela, gráfico opcional (x = `grafico`) e exportação."""
+    vis = df[list(colunas)].rename(columns=colunas)
+    if grafico:
+        st.bar_chart(vis.set_index(colunas[grafico])["Faturamento"], use_container_width=True)
+    # datas viram dd/mm/aaaa só depois do gráfico: como texto o eixo ordenaria 01/04 antes de 31/03
+    for c in vis.select_dtypes("datetime").columns:
+        vis[c] = vis[c].dt.strftime("%d/%m/%Y")
+    st.dataframe(
+        vis,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Faturamento": st.column_config.NumberColumn(format="R$ %.2f"),
+            "Ticket médio": st.column_config.NumberColumn(format="R$ %.2f"),
+            "Participação (%)": st.column_config.NumberColumn(format="%.1f"),
+        },
+    )
+    _baixar(vis, nome, f"Baixar {nome.replace('_', ' ')}", ini, fim, key=f"fat_csv_{nome}")
+
+MEDIDAS = {"faturamento": "Faturamento", "quantidade": "Quantidade", "itens": "Itens", "ticket_medio": "Ticket médio"}
+
+def render():
+    _header()
+
+    u = st.session_state.get("user", {})
+    prof_id = u.get("id")
+    if not prof_id:
+        st.error("Profissional não identificado na sessão.")
+        return
+
+    hoje = date.today()
+    c1, c2, c3, c4 = st.columns([2, 2, 2, 2])
+    with c1:
+        opcao = st.selectbox("Período", PERIODOS, key="fat_periodo")
+    ini, fim = _intervalo(opcao, hoje)
+    with c2:
+        ini = st.date_input("De", value=ini, format="DD/MM/YYYY", key=f"fat_ini_{opcao}", disabled=opcao != "Personalizado")
+    with c3:
+        fim = st.date_input("Até", value=fim, format="DD/MM/YYYY", key=f"fat_fim_{opcao}", disabled=opcao != "Personalizado")
+    with c4:
+        todos = bool(u.get("is_admin")) and st.toggle("Todos os profissionais", key="fat_todos")
+    if ini > fim:
+        st.warning("A data inicial deve ser anterior à final.")
+        return
+
+    # pandas/NumPy só carregam quando a página é aberta
+    from relatorios import relatorio
+
+    with st.spinner("Calculando..."):
+        rel = relatorio(None if todos else prof_id, ini, fim)
+    r = rel["resumo"]
+    ini_ant, fim_ant = rel["periodo_anterior"]
+
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Faturamento", _moeda(r["faturamento"]["atual"]), _delta(r["faturamento"], moeda=True))
+    k2.metric("Itens lançados", r["itens"]["atual"], _delta(r["itens"]))
+    k3.metric("Quantidade", r["quantidade"]["atual"], _delta(r["quantidade"]))
+    k4.metric("Ticket médio", _moeda(r["ticket_medio"]["atual"]), _delta(r["ticket_medio"], moeda=True))
+    k5.metric("Clientes atendidos", r["clientes"]["atual"], _delta(r["clientes"]))
+    st.caption(f"Comparado a {ini_ant:%d/%m/%Y} – {fim_ant:%d/%m/%Y} (período anterior de mesmo tamanho).")
+
+    if r["itens"]["atual"] == 0:
+        st.info("Nenhum serviço lançado no período.")
+        return
+
+    abas = ["Por dia", "Por mês", "Por serviço", "Por cliente"] + (["Por profissional"] if todos else [])
+    tabs = st.tabs(abas)
+    with tabs[0]:
+        _tabela(rel["por_dia"], {"data": "Data", **MEDIDAS}, "por_dia", ini, fim, grafico="data")
+    with tabs[1]:
+        _tabela(rel["por_mes"], {"mes": "Mês", **MEDIDAS}, "por_mes", ini, fim, grafico="mes")
+    with tabs[2]:
+        st.markdown(f"#### Top {len(rel['top_servicos'])} serviços")
+        st.bar_chart(rel["top_servicos"].set_index("servico_nome")["faturamento"], use_container_width=True)
+        _tabela(rel["por_servico"], {"servico_nome": "Serviço", **MEDIDAS, "participacao_pct": "Participação (%)"}, "por_servico", ini, fim)
+        st.markdown("#### Contra o período anterior")
+        _tabela(
+            rel["servicos_vs_anterior"],
+            {"servico_nome": "Serviço", "faturamento": "Faturamento", "faturamento_anterior": "Anterior",
+             "variacao": "Variação", "variacao_pct": "Variação (%)"},
+            "servicos_vs_anterior", ini, fim,
+        )
+    with tabs[3]:
+        st.markdown(f"#### Top {len(rel['top_clientes'])} clientes")
+        st.bar_chart(rel["top_clientes"].set_index("cliente_nome")["faturamento"], use_container_width=True)
+        _tabela(rel["por_cliente"], {"cliente_nome": "Cliente", **MEDIDAS, "participacao_pct": "Participação (%)"}, "por_cliente", ini, fim)
+    if todos:
+        with tabs[4]:
+            _tabela(rel["por_profissional"], {"profissional": "Profissional", **MEDIDAS, "participacao_pct": "Participação (%)"},
+                    "por_profissional", ini, fim, grafico="profissional")
+
+    st.divider()
+    itens = rel["itens"].assign(data=rel["itens"]["data"].dt.strftime("%d/%m/%Y"))
+    _baixar(
+        itens[["data", "cliente_nome", "servico_nome", "quantidade", "valor_total"]].rename(columns={
+            "data": "Data", "cliente_nome": "Cliente", "servico_nome": "Serviço",
+            "quantidade": "Quantidade", "valor_total": "Valor total",
+        }),
+        "itens", "Baixar itens do período", ini, fim, key="fat_csv_itens",
+    )
@@ -0,0 +1,462 @@
+# fila_mensagens.py
+# Fila persistente de mensagens de saída (ag_fila_mensagens, sql/008_fila_mensagens.sql)
+# e o worker que a esvazia: pool de threads, limite de taxa, novas tentativas com
+# backoff exponencial e chave de deduplicação por mensagem. O envio em si fica a
+# cargo de um transporte plugável (HTTP para gateway de WhatsApp, SMTP para e-mail).
+#
+# Uso:
+#   python fila_mensagens.py enfileirar [AAAA-MM-DD]   # lembretes do dia (padrão: amanhã)
+#   python fila_mensagens.py worker [--uma-vez]        # processa a fila (cron ou serviço)
+import heapq
+import json
+import os
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from email.message import EmailMessage
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import error as urlerror
+from urllib import request as urlrequest
+
+TABELA_FILA = "ag_fila_mensagens"
+CANAL_WHATSAPP = "whatsapp"
+CANAL_EMAIL = "email"
+
+def _env_float(nome: str, default: float) -> float:
+    try:
+        return float(os.getenv(nome, default))
+    except (TypeError, ValueError):
+        return default
+
+FILA_THREADS = int(_env_float("AGENDA_FILA_THREADS", 8))
+FILA_POR_SEG = _env_float("AGENDA_FILA_POR_SEG", 10.0)
+FILA_MAX_TENTATIVAS = int(_env_float("AGENDA_FILA_MAX_TENTATIVAS", 6))
+FILA_BACKOFF_BASE = _env_float("AGENDA_FILA_BACKOFF_SECS", 30.0)
+FILA_BACKOFF_TETO = 3600.0
+
+# ----------------------
+# Transportes
+# ----------------------
+class ErroTransitorio(Exception):
+    """Falha que vale nova tentativa (rede, timeout, HTTP 429/5xx)."""
+
+class ErroPermanente(Exception):
+    """Falha definitiva (destino inválido, HTTP 4xx): a mensagem vai para 'falhou'."""
+
+class TransporteHTTP:
+    """
+    POST JSON de cada mensagem para `url` (gateway de WhatsApp, webhook, servidor_local).
+    A chave de deduplicação segue no cabeçalho Idempotency-Key.
+    """
+
+    def __init__(self, url: str, token: str | None = None, timeout: float = 10.0):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+
+    def enviar(self, msg: dict) -> None:
+        corpo = json.dumps(
+            {k: msg.get(k) for k in ("canal", "destino", "assunto", "corpo", "chave_dedup")}
+        ).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Idempotency-Key": str(msg.get("chave_dedup") or "")}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        req = urlrequest.Request(self.url, data=corpo, headers=headers, method="POST")
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as resp:
+                resp.read()
+        except urlerror.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise ErroTransitorio(f"HTTP {e.code}") from e
+            raise ErroPermanente(f"HTTP {e.code}") from e
+        except (urlerror.URLError, OSError) as e:
+            raise ErroTransitorio(str(e)) from e
+
+class TransporteSMTP:
+    """E-mail via SMTP (SMTP_HOST, SMTP_PORT, SMTP_USUARIO, SMTP_SENHA, SMTP_REMETENTE)."""
+
+    def __init__(self, host=None, porta=None, usuario=None, senha=None, remetente=None, timeout: float = 15.0):
+        self.host = host or os.getenv("SMTP_HOST")
+        self.porta = int(porta or os.getenv("SMTP_PORT") or 587)
+        self.usuario = usuario or os.getenv("SMTP_USUARIO")
+        self.senha = senha or os.getenv("SMTP_SENHA")
+        self.remetente = remetente or os.getenv("SMTP_REMETENTE") or self.usuario
+        self.timeout = timeout
+
+    def enviar(self, msg: dict) -> None:
+        em = EmailMessage()
+        em["From"] = self.remetente
+        em["To"] = msg["destino"]
+        em["Subject"] = msg.get("assunto") or "Lembrete de atendimento"
+        em.set_content(msg["corpo"])
+        try:
+            with smtplib.SMTP(self.host, self.porta, timeout=self.timeout) as smtp:
+                smtp.starttls()
+                if self.usuario:
+                    smtp.login(self.usuario, self.senha or "")
+                smtp.send_message(em)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise ErroPermanente(str(e)) from e
+        except (smtplib.SMTPException, OSError) as e:
+            raise ErroTransitorio(str(e)) from e
+
+def transportes_configurados() -> dict:
+    """{canal: transporte} só para os canais com configuração no ambiente."""
+    out = {}
+    if os.getenv("AGENDA_WHATSAPP_URL"):
+        out[CANAL_WHATSAPP] = TransporteHTTP(os.getenv("AGENDA_WHATSAPP_URL"), os.getenv("AGENDA_WHATSAPP_TOKEN"))
+    if os.getenv("SMTP_HOST"):
+        out[CANAL_EMAIL] = TransporteSMTP()
+    return out
+
+def servidor_local(porta: int = 0, falha: float = 0.0, latencia_ms: float = 0.0):
+    """
+    Gateway HTTP de mentira para testes e medições: aceita POSTs, responde 503 numa
+    fração `falha` das requisições e conta o que recebeu (sem duplicar por Idempotency-Key).
+    Retorna (servidor, url); o servidor roda numa thread daemon — pare com servidor.shutdown().
+    """
+    recebidas: dict = {}
+    trava = threading.Lock()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if latencia_ms:
+                time.sleep(latencia_ms / 1000)
+            if falha and random.random() < falha:
+                self.send_response(503)
+            else:
+                with trava:
+                    chave = self.headers.get("Idempotency-Key") or str(len(recebidas))
+                    recebidas[chave] = recebidas.get(chave, 0) + 1
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    class _Servidor(ThreadingHTTPServer):
+        # o backlog padrão (5) estoura com o pool de threads do worker: SYN descartado
+        # custa 1s de retransmissão e a medição vira medição do kernel
+        request_queue_size = 128
+
+    srv = _Servidor(("127.0.0.1", porta), _Handler)
+    srv.daemon_threads = True
+    srv.recebidas = recebidas
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/mensagens"
+
+# ----------------------
+# Armazenamento da fila
+# ----------------------
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+class FilaSupabase:
+    """Fila em ag_fila_mensagens; a reserva é atômica (RPC com FOR UPDATE SKIP LOCKED)."""
+
+    def __init__(self, lease_segundos: int = 120):
+        self.lease_segundos = lease_segundos
+
+    def reservar(self, limite: int) -> list:
+        from database import supabase
+
+        res = supabase.rpc(
+            "ag_reservar_mensagens", {"p_limite": int(limite), "p_lease_segundos": self.lease_segundos}
+        ).execute()
+        return res.data or []
+
+    def concluir(self, ids: list) -> None:
+        from database import atualizar_registros
+
+        if ids:
+            atualizar_registros(
+                TABELA_FILA,
+                {"status": "enviado", "enviado_em": _agora().isoformat(), "reservado_ate": None, "ultimo_erro": None},
+                ids=ids,
+            )
+
+    def reagendar(self, msg: dict, tentativas: int, espera_s: float, erro: str) -> None:
+        from database import atualizar_registro
+
+        atualizar_registro(TABELA_FILA, msg["id"], {
+            "status": "pendente",
+            "tentativas": tentativas,
+            "proxima_tentativa": (_agora() + timedelta(seconds=espera_s)).isoformat(),
+            "reservado_ate": None,
+            "ultimo_erro": erro[:500],
+        })
+
+    def falhar(self, msg: dict, tentativas: int, erro: str) -> None:
+        from database import atualizar_registro
+
+        atualizar_registro(TABELA_FILA, msg["id"], {
+            "status": "falhou", "tentativas": tentativas, "reservado_ate": None, "ultimo_erro": erro[:500],
+        })
+
+    def proxima_em(self) -> float | None:
+        """Segundos até a próxima mensagem pendente ficar pronta (None se não há pendentes)."""
+        from database import listar_registros
+
+        rows = listar_registros(
+            TABELA_FILA, {"status": "pendente"}, colunas=["proxima_tentativa"], order="proxima_tentativa", limit=1,
+        )
+        if not rows:
+            return None
+        quando = datetime.fromisoformat(str(rows[0]["proxima_tentativa"]).replace("Z", "+00:00"))
+        return max(0.0, (quando - _agora()).total_seconds())
+
+class FilaMemoria:
+    """Mesma interface da FilaSupabase, em memória (medições e execuções de teste)."""
+
+    def __init__(self, mensagens: list | None = None):
+        self._trava = threading.Lock()
+        self._prontas: list = []  # heap (quando, seq, msg)
+        self._seq = 0
+        self._chaves: set = set()
+        self.enviadas: list = []
+        self.falhas: list = []
+        self.adicionar(mensagens or [])
+
+    def adicionar(self, mensagens: list) -> int:
+        n = 0
+        with self._trava:
+            for m in mensagens:
+                if m["chave_dedup"] in self._chaves:
+                    continue
+                self._chaves.add(m["chave_dedup"])
+                self._seq += 1
+                heapq.heappush(self._prontas, (time.monotonic(), self._seq, {"id": self._seq, "tentativas": 0, **m}))
+                n += 1
+        return n
+
+    def reservar(self, limite: int) -> list:
+        agora = time.monotonic()
+        out = []
+        with self._trava:
+            while self._prontas and len(out) < limite and self._prontas[0][0] <= agora:
+                out.append(heapq.heappop(self._prontas)[2])
+        return out
+
+    def concluir(self, ids: list) -> None:
+        with self._trava:
+            self.enviadas.extend(ids)
+
+    def reagendar(self, msg: dict, tentativas: int, espera_s: float, erro: str) -> None:
+        with self._trava:
+            self._seq += 1
+            heapq.heappush(self._prontas, (time.monotonic() + espera_s, self._seq, {**msg, "tentativas": tentativas}))
+
+    def falhar(self, msg: dict, tentativas: int, erro: str) -> None:
+        with self._trava:
+            self.falhas.append((msg["id"], erro))
+
+    def proxima_em(self) -> float | None:
+        with self._trava:
+            if not self._prontas:
+                return None
+            return max(0.0, self._prontas[0][0] - time.monotonic())
+
+# ----------------------
+# Worker
+# ----------------------
+class LimiteTaxa:
+    """Token bucket compartilhado pelas threads: no máximo `por_segundo` envios/s (0 = sem limite)."""
+
+    def __init__(self, por_segundo: float, rajada: int | None = None):
+        self.por_segundo = float(por_segundo or 0)
+        self.capacidade = float(rajada or max(1.0, self.por_segundo))
+        self._fichas = self.capacidade
+        self._ultimo = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self) -> None:
+        if self.por_segundo <= 0:
+            return
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.por_segundo)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.por_segundo
+            time.sleep(espera)
+
+def espera_backoff(tentativa: int, base: float, teto: float = FILA_BACKOFF_TETO) -> float:
+    """base * 2^(tentativa-1), limitado ao teto, com jitter (50–100%) para não sincronizar reenvios."""
+    return min(teto, base * (2 ** max(0, tentativa - 1))) * random.uniform(0.5, 1.0)
+
+class WorkerFila:
+    """
+    Reserva lotes da fila e envia em paralelo. Sucessos são confirmados num único
+    UPDATE por lote; falhas transitórias voltam para a fila com backoff até
+    `max_tentativas`, falhas permanentes vão direto para 'falhou'.
+    """
+
+    def __init__(
+        self,
+        fila,
+        transportes: dict,
+        threads: int = FILA_THREADS,
+        por_segundo: float = FILA_POR_SEG,
+        max_tentativas: int = FILA_MAX_TENTATIVAS,
+        backoff_base: float = FILA_BACKOFF_BASE,
+        lote: int | None = None,
+    ):
+        self.fila = fila
+        self.transportes = transportes
+        self.threads = max(1, int(threads))
+        self.limite = LimiteTaxa(por_segundo)
+        self.max_tentativas = int(max_tentativas)
+        self.backoff_base = float(backoff_base)
+        self.lote = int(lote or self.threads * 4)
+        self.stats = {"enviadas": 0, "reenvios": 0, "falhas": 0, "segundos": 0.0}
+
+    def _enviar(self, msg: dict):
+        transporte = self.transportes.get(msg.get("canal"))
+        if transporte is None:
+            return msg, ErroPermanente(f"canal sem transporte: {msg.get('canal')}")
+        self.limite.aguardar()
+        try:
+            transporte.enviar(msg)
+            return msg, None
+        except (ErroTransitorio, ErroPermanente) as e:
+            return msg, e
+        except Exception as e:  # erro inesperado do transporte: trata como transitório
+            return msg, ErroTransitorio(repr(e))
+
+    def processar_lote(self, executor: ThreadPoolExecutor) -> int:
+        msgs = self.fila.reservar(self.lote)
+        if not msgs:
+            return 0
+        ok = []
+        for msg, erro in executor.map(self._enviar, msgs):
+            if erro is None:
+                ok.append(msg["id"])
+                continue
+            tentativas = int(msg.get("tentativas") or 0) + 1
+            if isinstance(erro, ErroPermanente) or tentativas >= self.max_tentativas:
+                self.fila.falhar(msg, tentativas, str(erro))
+                self.stats["falhas"] += 1
+            else:
+                self.fila.reagendar(msg, tentativas, espera_backoff(tentativas, self.backoff_base), str(erro))
+                self.stats["reenvios"] += 1
+        self.fila.concluir(ok)
+        self.stats["enviadas"] += len(ok)
+        return len(msgs)
+
+    def rodar(self, parar_quando: str | None = None, ocioso_s: float = 5.0) -> dict:
+        """
+        Processa a fila em laço. parar_quando=None roda para sempre (serviço);
+        "sem_prontas" para assim que não houver mensagem pronta (cron);
+        "vazia" espera também os reenvios agendados até a fila esvaziar.
+        """
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="fila") as ex:
+            while True:
+                if self.processar_lote(ex):
+                    continue
+                if parar_quando == "sem_prontas":
+                    break
+                espera = self.fila.proxima_em()
+                if parar_quando == "vazia" and espera is None:
+                    break
+                time.sleep(min(ocioso_s, espera if espera is not None else ocioso_s))
+        self.stats["segundos"] = time.perf_counter() - t0
+        return self.estatisticas()
+
+    def estatisticas(self) -> dict:
+        seg = self.stats["segundos"] or 0.0
+        return {**self.stats, "msgs_por_seg": (self.stats["enviadas"] / seg) if seg else 0.0}
+
+# ----------------------
+# Produtores
+# ----------------------
+def mensagem(canal: str, destino: str, corpo: str, chave_dedup: str, assunto: str | None = None,
+             profissional_id=None, agenda_id=None) -> dict:
+    return {
+        "canal": canal,
+        "destino": destino,
+        "assunto": assunto,
+        "corpo": corpo,
+        "chave_dedup": chave_dedup,
+        "profissional_id": None if profissional_id is None else str(profissional_id),
+        "agenda_id": None if agenda_id is None else str(agenda_id),
+    }
+
+def enfileirar(mensagens: list) -> int:
+    """Grava as mensagens num INSERT em lote; chaves já enfileiradas são ignoradas. Retorna as novas."""
+    from database import inserir_registros
+
+    if not mensagens:
+        return 0
+    return len(inserir_registros(TABELA_FILA, mensagens, ignorar_conflito_em="chave_dedup"))
+
+def _chave_lembrete(canal: str, lembrete: dict) -> str:
+    # inclui data e hora: remarcar o atendimento gera um lembrete novo
+    return f"lembrete:{canal}:{lembrete['agenda_id']}:{lembrete['data']}:{lembrete['hora']}"
+
+def _emails_clientes(ids: list) -> dict:
+    from database import LOTE_IDS, listar_registros
+
+    out = {}
+    ids = sorted({i for i in ids if i is not None}, key=str)
+    for i in range(0, len(ids), LOTE_IDS):
+        rows = listar_registros("ag_clientes", colunas=["id", "email"], in_={"id": ids[i:i + LOTE_IDS]})
+        out.update({str(r["id"]): (r.get("email") or "").strip() for r in rows})
+    return out
+
+def enfileirar_lembretes(dia: date | None = None) -> dict:
+    """
+    Enfileira os lembretes do dia: WhatsApp para profissionais com whatsapp_notificar,
+    e-mail ao cliente para profissionais com email_notificar. Retorna {canal: novas}.
+    """
+    from whatsapp_notifier import lembretes_do_dia
+
+    whatsapp = [
+        mensagem(CANAL_WHATSAPP, l["telefone"], l["mensagem"], _chave_lembrete(CANAL_WHATSAPP, l),
+                 profissional_id=prof_id, agenda_id=l["agenda_id"])
+        for prof_id, _, lembretes in lembretes_do_dia(dia)
+        for l in lembretes
+        if l["telefone"]
+    ]
+
+    por_email = [(prof_id, l) for prof_id, _, lembretes in lembretes_do_dia(dia, "email_notificar") for l in lembretes]
+    emails = _emails_clientes([l["cliente_id"] for _, l in por_email])
+    email = [
+        mensagem(CANAL_EMAIL, emails[str(l["cliente_id"])], l["mensagem"], _chave_lembrete(CANAL_EMAIL, l),
+                 assunto="Lembrete de atendimento", profissional_id=prof_id, agenda_id=l["agenda_id"])
+        for prof_id, l in por_email
+        if emails.get(str(l["cliente_id"]))
+    ]
+    return {CANAL_WHATSAPP: enfileirar(whatsapp), CANAL_EMAIL: enfileirar(email)}
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    if args[:1] == ["enfileirar"]:
+        dia = date.fromisoformat(args[1]) if len(args) > 1 else None
+        t0 = time.perf_counter()
+        novas = enfileirar_lembretes(dia)
+        print(f"enfileiradas: {novas} em {time.perf_counter() - t0:.2f}s")
+    elif args[:1] == ["worker"]:
+        transportes = transportes_configurados()
+        if not transportes:
+            print("Nenhum transporte configurado (AGENDA_WHATSAPP_URL / SMTP_HOST).")
+            sys.exit(1)
+        worker = WorkerFila(FilaSupabase(), transportes)
+        st_ = worker.rodar("sem_prontas" if "--uma-vez" in args else None)
+        print(
+            f"enviadas {st_['enviadas']} • reenvios {st_['reenvios']} • falhas {st_['falhas']} "
+            f"• {st_['msgs_por_seg']:.1f} msg/s"
+        )
+    else:
+        print("Uso: python fila_mensagens.py enfileirar [AAAA-MM-DD] | worker [--uma-vez]")
+        sys.exit(1)
@@ -1,11 +1,33 @@
 # lancamento_servicos.py
+import re
 import streamlit as st
-from database import listar_registros, inserir_registro, atualizar_registro, excluir_registro
+from datetime import date, datetime, timedelta
+from functools import partial
+from database import (
+    listar_registros, inserir_registro, atualizar_registro, excluir_registro, buscar_em_paralelo, pagina_registros,
+)
+from utils_ui import show_logo
 
 TITLE = "Lançamento de Serviços"
 TABELA = "ag_servicos"
 FORM_NS = "lan_serv_form_v"
 
+# Seletores com busca no banco: só os N melhores resultados vão para a tela,
+# qualquer que seja o tamanho do histórico
+LIMITE_SUGESTOES = 20
+COLS_AGENDA = ["id", "cliente_id", "cliente_nome", "data_atendimento", "hora_inicio", "hora_fim"]
+COLS_TIPO = ["id", "nome", "valor_padrao", "duracao_minutos"]
+
+# "Serviços lançados": view já unida (sql/010), uma tela por ida ao banco
+VIEW_ITENS = "ag_servicos_detalhados"
+COLS_ITENS = [
+    "id", "agenda_id", "tipo_servico_id", "quantidade", "valor_unitario", "valor_total",
+    "data_atendimento", "hora_inicio", "cliente_nome", "servico_nome",
+]
+ITENS_POR_PAGINA = 20
+ITENS_DIAS_ANTES = 30
+ITENS_DIAS_DEPOIS = 30
+
 def _v() -> int:
     if FORM_NS not in st.session_state:
         st.session_state[FORM_NS] = 0
@@ -17,43 +39,95 @@ def _k(name: str) -> str:
 def _header():
     col_logo, col_title = st.columns([1,6])
     with col_logo:
-        st.image("start.png", width=80)
+        show_logo(width=80)
     with col_title:
         st.markdown(f"<h2 style='margin:0'>{TITLE}</h2>", unsafe_allow_html=True)
 
+def _ag_label(a: dict) -> str:
+    return f"{a.get('cliente_nome','(sem nome)')} • {a.get('data_atendimento','')} {a.get('hora_inicio','')}-{a.get('hora_fim','')}"
+
+def _ts_label(t: dict) -> str:
+    return f"{t.get('nome','')} — R$ {float(t.get('valor_padrao',0.0)):.2f} • {int(t.get('duracao_minutos',30))}min"
+
+def _termo_data(termo: str) -> date | None:
+    """Aceita dd/mm/aaaa, dd/mm (ano corrente) ou aaaa-mm-dd."""
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(termo, fmt).date()
+        except ValueError:
+            pass
+    try:
+        return datetime.strptime(f"{termo}/{date.today().year}", "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+def _termo_like(termo: str) -> str:
+    # curingas e separadores do PostgREST viram espaço; o resto é busca por "contém"
+    return "%" + re.sub(r"[%_*,()]", " ", termo).strip() + "%"
+
+def buscar_agendamentos(prof_id: str, termo: str = "", limite: int = LIMITE_SUGESTOES) -> list:
+    """
+    Até `limite` agendamentos, mais recentes primeiro: por data (se o termo for uma data),
+    por trecho do nome do cliente, ou — sem termo — os últimos até hoje.
+    """
+    termo = (termo or "").strip()
+    base = dict(colunas=COLS_AGENDA, order="data_atendimento", desc=True, limit=limite)
+    dia = _termo_data(termo) if termo else None
+    if dia:
+        return listar_registros("ag_agenda", {"profissional_id": prof_id, "data_atendimento": str(dia)}, **base)
+    if termo:
+        return listar_registros("ag_agenda", {"profissional_id": prof_id}, ilike={"cliente_nome": _termo_like(termo)}, **base)
+    return listar_registros("ag_agenda", {"profissional_id": prof_id}, lte={"data_atendimento": date.today()}, **base)
+
+def buscar_tipos(prof_id: str, termo: str = "", limite: int = LIMITE_SUGESTOES) -> list:
+    """Até `limite` tipos de serviço ativos, por trecho do nome."""
+    termo = (termo or "").strip()
+    return listar_registros(
+        "ag_tipos_servicos",
+        {"profissional_id": prof_id, "ativo": True},
+        colunas=COLS_TIPO,
+        order="nome",
+        limit=limite,
+        ilike={"nome": _termo_like(termo)} if termo else None,
+    )
+
+def _incluir_atual(opcoes: list, tabela: str, atual_id, colunas: list) -> list:
+    """Garante a opção já gravada no item (edição) entre as sugestões."""
+    if atual_id is None or any(o["id"] == atual_id for o in opcoes):
+        return opcoes
+    return listar_registros(tabela, {"id": atual_id}, colunas=colunas) + opcoes
+
+def _indice(opcoes: list, atual_id) -> int:
+    return next((i for i, o in enumerate(opcoes) if o["id"] == atual_id), 0)
+
+def _aviso_limite(*listas):
+    if any(len(l) >= LIMITE_SUGESTOES for l in listas):
+        st.caption(f"Mostrando até {LIMITE_SUGESTOES} resultados — refine a busca para ver outros.")
+
 @st.dialog("Editar item de serviço")
 def _modal_editar(item, prof_id: str):
-    # Carrega agendas (precisamos de cliente_id) e tipos (precisamos do id do serviço)
-    ags = listar_registros("ag_agenda", {"profissional_id": prof_id})
-    ag_labels, ag_map = [], {}
-    for a in ags:
-        lab = f"{a.get('cliente_nome','(sem nome)')} • {a.get('data_atendimento','')} {a.get('hora_inicio','')}-{a.get('hora_fim','')}"
-        ag_labels.append(lab)
-        ag_map[lab] = a
-    ag_label_atual = next((lab for lab, a in ag_map.items() if a["id"] == item.get("agenda_id")), (ag_labels[0] if ag_labels else None))
-
-    tps = listar_registros("ag_tipos_servicos", {"profissional_id": prof_id, "ativo": True}, order="nome")
-    ts_labels, ts_map = [], {}
-    for t in tps:
-        lab = f"{t.get('nome','')} — R$ {float(t.get('valor_padrao',0.0)):.2f} • {int(t.get('duracao_minutos',30))}min"
-        ts_labels.append(lab)
-        ts_map[lab] = t
-    ts_label_atual = next((lab for lab, t in ts_map.items() if t["id"] == item.get("tipo_servico_id")), (ts_labels[0] if ts_labels else None))
+    # só as sugestões da busca + o agendamento/serviço atuais do item
+    b1, b2 = st.columns(2)
+    with b1:
+        busca_ag = st.text_input("Buscar agendamento", placeholder="cliente ou data (dd/mm)", key=f"ls_busca_ag_{item['id']}")
+    with b2:
+        busca_ts = st.text_input("Buscar serviço", placeholder="nome do serviço", key=f"ls_busca_ts_{item['id']}")
+    ags = _incluir_atual(buscar_agendamentos(prof_id, busca_ag), "ag_agenda", item.get("agenda_id"), COLS_AGENDA)
+    tps = _incluir_atual(buscar_tipos(prof_id, busca_ts), "ag_tipos_servicos", item.get("tipo_servico_id"), COLS_TIPO)
+    _aviso_limite(ags, tps)
 
     with st.form(f"form_edit_item_{item['id']}"):
         c1, c2 = st.columns([2,2])
         with c1:
-            ag_sel = st.selectbox("Agendamento", options=ag_labels, index=(ag_labels.index(ag_label_atual) if ag_label_atual in ag_labels else 0))
+            ag = st.selectbox("Agendamento", options=ags, index=_indice(ags, item.get("agenda_id")) if ags else None, format_func=_ag_label)
             qtd = st.number_input("Quantidade", min_value=1, step=1, value=int(item.get("quantidade",1)))
         with c2:
-            ts_sel = st.selectbox("Serviço", options=ts_labels, index=(ts_labels.index(ts_label_atual) if ts_label_atual in ts_labels else 0))
+            ts = st.selectbox("Serviço", options=tps, index=_indice(tps, item.get("tipo_servico_id")) if tps else None, format_func=_ts_label)
             val_unit = st.number_input("Valor unitário (R$)", min_value=0.0, step=0.5, value=float(item.get("valor_unitario",0.0)))
 
         salvar = st.form_submit_button("Salvar", type="primary")
 
     if salvar:
-        ag = ag_map.get(ag_sel)
-        ts = ts_map.get(ts_sel)
         if not ag or not ts:
             st.error("Selecione um agendamento e um serviço válidos.")
             return
@@ -90,48 +164,40 @@ def render():
         st.error("Profissional não identificado na sessão.")
         return
 
-    # Agendamentos (precisamos do cliente_id)
-    ags = listar_registros("ag_agenda", {"profissional_id": prof_id}, order="data_atendimento")
-    ag_labels, ag_map = [], {}
-    for a in ags:
-        lab = f"{a.get('cliente_nome','(sem nome)')} • {a.get('data_atendimento','')} {a.get('hora_inicio','')}-{a.get('hora_fim','')}"
-        ag_labels.append(lab)
-        ag_map[lab] = a
-
-    # Tipos de serviço (apenas ativos)
-    tps = listar_registros("ag_tipos_servicos", {"profissional_id": prof_id, "ativo": True}, order="nome")
-    ts_labels, ts_map = [], {}
-    for t in tps:
-        lab = f"{t.get('nome','')} — R$ {float(t.get('valor_padrao',0.0)):.2f} • {int(t.get('duracao_minutos',30))}min"
-        ts_labels.append(lab)
-        ts_map[lab] = t
-
     st.subheader("Novo lançamento")
+    b1, b2 = st.columns(2)
+    with b1:
+        busca_ag = st.text_input("Buscar agendamento", placeholder="cliente ou data (dd/mm)", key=_k("busca_ag"))
+    with b2:
+        busca_ts = st.text_input("Buscar serviço", placeholder="nome do serviço", key=_k("busca_ts"))
+
+    # as sugestões de agendamento (com o cliente_id) e de serviço são independentes: buscadas em paralelo
+    lote = buscar_em_paralelo({
+        "ags": partial(buscar_agendamentos, prof_id, busca_ag),
+        "tps": partial(buscar_tipos, prof_id, busca_ts),
+    })
+    ags, tps = lote["ags"], lote["tps"]
+    _aviso_limite(ags, tps)
+
     with st.form("form_lanc_serv", border=True):
         c1, c2, c3 = st.columns([2,2,1])
 
         with c1:
-            ag_sel = st.selectbox("Agendamento", options=ag_labels, index=0 if ag_labels else None, key=_k("ag"))
+            ag = st.selectbox("Agendamento", options=ags, index=0 if ags else None, format_func=_ag_label, key=_k("ag"))
             qtd = st.number_input("Quantidade", min_value=1, step=1, value=1, key=_k("qtd"))
         with c2:
-            ts_sel = st.selectbox("Serviço", options=ts_labels, index=0 if ts_labels else None, key=_k("ts"))
-            valor_padrao = float(ts_map[ts_sel]["valor_padrao"]) if ts_sel in ts_map else 0.0
+            ts = st.selectbox("Serviço", options=tps, index=0 if tps else None, format_func=_ts_label, key=_k("ts"))
+            valor_padrao = float(ts["valor_padrao"]) if ts else 0.0
             val_unit = st.number_input("Valor unitário (R$)", min_value=0.0, step=0.5, value=valor_padrao, key=_k("val"))
         with c3:
-            total_preview = (float(val_unit) * int(qtd)) if (ts_sel and ag_sel) else 0.0
+            total_preview = (float(val_unit) * int(qtd)) if (ts and ag) else 0.0
             st.metric("Total (prev.)", f"R$ {total_preview:.2f}")
 
         enviar = st.form_submit_button("Incluir", type="primary")
 
     if enviar:
-        if not ag_sel or not ts_sel:
-            st.error("Selecione um agendamento e um serviço.")
-            return
-
-        ag = ag_map.get(ag_sel)
-        ts = ts_map.get(ts_sel)
         if not ag or not ts:
-            st.error("Seleção inválida de agendamento/serviço.")
+            st.error("Selecione um agendamento e um serviço.")
             return
 
         cli_id = ag.get("cliente_id")
@@ -162,24 +228,42 @@ def render():
     st.divider()
     st.subheader("Serviços lançados")
 
-    itens = listar_registros(TABELA, {"profissional_id": prof_id})
+    hoje = date.today()
+    p1, p2, _ = st.columns([1, 1, 2])
+    with p1:
+        ini = st.date_input("De", value=hoje - timedelta(days=ITENS_DIAS_ANTES), key="ls_itens_ini")
+    with p2:
+        fim = st.date_input("Até", value=hoje + timedelta(days=ITENS_DIAS_DEPOIS), min_value=ini, key="ls_itens_fim")
+
+    # pilha de cursores keyset do período: o topo é o cursor da página atual
+    chave_cur = f"ls_itens_cursores_{ini}_{fim}"
+    cursores = st.session_state.setdefault(chave_cur, [None])
+    itens, proximo = pagina_registros(
+        VIEW_ITENS,
+        {"profissional_id": prof_id},
+        order_col="data_atendimento",
+        colunas=COLS_ITENS,
+        gte={"data_atendimento": ini},
+        lte={"data_atendimento": fim},
+        cursor=cursores[-1],
+        tamanho=ITENS_POR_PAGINA,
+        desc=True,
+    )
     if not itens:
-        st.info("Nenhum serviço lançado.")
+        st.info("Nenhum serviço lançado no período.")
+        if len(cursores) > 1 and st.button("◀ Voltar ao início", key="ls_itens_inicio"):
+            st.session_state[chave_cur] = [None]
+            st.rerun()
         return
 
-    # caches locais para exibir nomes
-    _ag_by_id = {a["id"]: a for a in ags}
-    _ts_by_id = {t["id"]: t for t in tps}
-
     for it in itens:
-        ag = _ag_by_id.get(it.get("agenda_id"))
-        ts = _ts_by_id.get(it.get("tipo_servico_id"))
-        cliente_nome = (ag.get("cliente_nome") if ag else "")
-        serv_nome = (ts.get("nome") if ts else "")
+        cliente_nome = it.get("cliente_nome") or ""
+        serv_nome = it.get("servico_nome") or ""
 
         col_info, col_actions = st.columns([7,3])
         with col_info:
             st.markdown(
+                f"**Data:** {it.get('data_atendimento') or '-'} {str(it.get('hora_inicio') or '')[:5]}  \n"
                 f"**Cliente:** {cliente_nome or '-'}  \n"
                 f"**Serviço:** {serv_nome or '-'}  \n"
                 f"**Qtd:** {int(it.get('quantidade',1))}  •  "
@@ -206,3 +290,15 @@ def render():
                 excluir_registro(TABELA, it["id"])
                 st.success("Excluído!")
                 st.rerun()
+
+    n1, n2, n3 = st.columns([1, 2, 1])
+    with n1:
+        if len(cursores) > 1 and st.button("◀ Anterior", key="ls_itens_ant"):
+            cursores.pop()
+            st.rerun()
+    with n2:
+        st.caption(f"Página {len(cursores)}")
+    with n3:
+        if proximo is not None and st.button("Próxima ▶", key="ls_itens_prox"):
+            cursores.append(proximo)
+            st.rerun()
@@ -1,13 +1,14 @@
 
 import streamlit as st
 from utils_layout import styled_submit
+from utils_ui import show_logo
 
 def render_login(auth_fn, logo="start.png", title="Agenda Profissional"):
     left, center, right = st.columns([1,2,1])
     with center:
         col_logo, col_title = st.columns([1,5])
         with col_logo:
-            st.image(logo, width=80)
+            show_logo(logo, width=80)
         with col_title:
             st.markdown(f"<h2 style='margin:0'>{title}</h2>", unsafe_allow_html=True)
 
@@ -1,31 +1,64 @@
-
 import re
-import streamlit as st
+
+# Telefones BR: a forma canônica é E.164 só com dígitos ("5511987654321"),
+# a mesma que a coluna gerada telefone_digitos / cliente_telefone_digitos
+# (sql/011) guarda. Qualquer mudança aqui precisa ser espelhada em ag_telefone_digitos().
+_RE_NAO_DIGITO = re.compile(r"\D+")
+_RE_PREFIXO = re.compile(r"^0+")                          # 0 de longa distância / 00 internacional
+_RE_PAIS = re.compile(r"^55(?=\d{10,11}$)")               # +55 quando sobram DDD + número
+_RE_NACIONAL = re.compile(r"^[1-9]{2}(?:9\d{8}|\d{8})$")  # DDD + celular (9 díg.) ou fixo (8 díg.)
 
 def only_digits(s: str) -> str:
-    return re.sub(r"\D+", "", s or "")
+    return _RE_NAO_DIGITO.sub("", s or "")
+
+def _nacional(s: str) -> str:
+    # dígitos sem prefixo de discagem e sem o código do país
+    return _RE_PAIS.sub("", _RE_PREFIXO.sub("", only_digits(s)))
+
+def normalize_br_phone(s: str) -> str | None:
+    """Forma canônica E.164 sem '+' ("5511987654321"); None se não for um telefone BR válido."""
+    d = _nacional(s)
+    return "55" + d if _RE_NACIONAL.match(d) else None
+
+def normalize_br_phones(valores):
+    """
+    normalize_br_phone em lote. Com uma Series do pandas roda vetorizado (.str),
+    devolvendo outra Series (None/NaN nos inválidos); com outro iterável, devolve lista.
+    """
+    if hasattr(valores, "str"):
+        d = (valores.fillna("").astype(str)
+             .str.replace(_RE_NAO_DIGITO, "", regex=True)
+             .str.replace(_RE_PREFIXO, "", regex=True)
+             .str.replace(_RE_PAIS, "", regex=True))
+        return ("55" + d).where(d.str.match(_RE_NACIONAL.pattern))
+    return [normalize_br_phone(v) for v in valores]
 
 def format_br_phone(digits: str) -> str:
     # Format Brazilian phone digits into (XX) XXXXX-XXXX or (XX) XXXX-XXXX.
-    d = only_digits(digits)
+    # Partial input (while typing) gets a partial mask.
+    d = _nacional(digits)
+    if not d:
+        return ""
     if len(d) <= 10:
         # (XX) XXXX-XXXX
         if len(d) <= 2:
-            return f"({{d}}"
+            return f"({d}"
         elif len(d) <= 6:
-            return f"({{d[:2]}}) {{d[2:]}}"
+            return f"({d[:2]}) {d[2:]}"
         else:
-            return f"({{d[:2]}}) {{d[2:6]}}-{{d[6:10]}}"
+            return f"({d[:2]}) {d[2:6]}-{d[6:10]}"
     else:
         # 11+ digits -> (XX) XXXXX-XXXX (ignore extras)
         d = d[:11]
-        return f"({{d[:2]}}) {{d[2:7]}}-{{d[7:11]}}"
+        return f"({d[:2]}) {d[2:7]}-{d[7:11]}"
 
 def sanitize_br_phone(formatted: str) -> str:
-    # Return only digits, suitable for wa.me etc.
-    return only_digits(formatted)
+    # Digits for wa.me etc.: E.164 when the number is valid, raw digits otherwise.
+    return normalize_br_phone(formatted) or only_digits(formatted)
 
 def mask_phone_on_change(key: str):
     # Streamlit on_change callback to enforce mask in-place via session_state.
+    # streamlit is imported here so CLI jobs (whatsapp_notifier) don't pay for it.
+    import streamlit as st
     val = st.session_state.get(key, "") or ""
     st.session_state[key] = format_br_phone(val)
@@ -1,14 +1,16 @@
 import re
 from datetime import time
-import bcrypt
 import streamlit as st
 
+from auth import gerar_hash
 from database import (
     listar_registros,
     inserir_registro,
     atualizar_registro,
     excluir_registro,
 )
+from utils_ui import show_logo
+from phone_utils import format_br_phone
 
 # ================================
 # Configurações locais do módulo
@@ -21,14 +23,6 @@ FORM_NS = "prof_form_v"
 # ================================
 PHONE_BR = r"^\(?\d{2}\)?\s?\d{4,5}-?\d{4}$"
 
-def _format_phone_br(raw: str) -> str:
-    d = re.sub(r"\D", "", raw or "")
-    if len(d) >= 11:   # (99) 99999-9999
-        return f"({d[0:2]}) {d[2:7]}-{d[7:11]}"
-    elif len(d) >= 10: # (99) 9999-9999
-        return f"({d[0:2]}) {d[2:6]}-{d[6:10]}"
-    return raw or ""
-
 def masked_text_input(
     label: str,
     key: str,
@@ -42,7 +36,7 @@ def masked_text_input(
     Retorna o número formatado e mostra um feedback visual simples.
     """
     raw = st.text_input(label, value=value, key=key, max_chars=16)
-    fmt = _format_phone_br(raw)
+    fmt = format_br_phone(raw)
     if raw:
         ok = re.match(PHONE_BR, fmt) is not None
         st.caption("Formato válido ✅" if ok else "Telefone inválido ❌. Ex.: (19) 99999-9999")
@@ -55,7 +49,7 @@ def masked_text_input(
 def _header():
     col_logo, col_title = st.columns([1, 6])
     with col_logo:
-        st.image("start.png", width=80)
+        show_logo(width=80)
     with col_title:
         st.markdown("<h2>Profissionais</h2>", unsafe_allow_html=True)
 
@@ -284,7 +278,7 @@ def render():
         enviar = st.form_submit_button("Incluir", type="primary")
 
     if enviar:
-        senha_hash = bcrypt.hashpw(senha.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        senha_hash = gerar_hash(senha)
         inserir_registro(TABELA, {
             "user_id": u.get("user_id") or u.get("id"),
             "is_admin": bool(is_admin),
@@ -0,0 +1,13 @@
+# reconstruir_resumo_diario.py
+# Reconstrói o rollup diário de KPIs (ag_agenda_resumo_diario).
+# Uso: python reconstruir_resumo_diario.py [profissional_id]
+import sys
+import time
+
+from database import reconstruir_resumo_diario
+
+prof_id = sys.argv[1] if len(sys.argv) > 1 else None
+t0 = time.perf_counter()
+n = reconstruir_resumo_diario(prof_id)
+alvo = f"profissional {prof_id}" if prof_id else "todos os profissionais"
+print(f"Rollup reconstruído para {alvo}: {n} linhas em {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,176 @@
+# recorrencia.py
+# Séries de atendimentos recorrentes: expansão da regra em datas e checagem das
+# ocorrências contra a agenda existente e o calendário de trabalho, num único passe.
+import calendar
+from datetime import date, time, timedelta
+
+from calendario import CalendarioTrabalho
+from disponibilidade import COLS_CONFLITO, indice_do_dia, tem_conflito
+
+TABELA_SERIES = "ag_agenda_series"
+MAX_OCORRENCIAS = 120
+
+# rótulo na tela -> (frequência, intervalo)
+FREQUENCIAS = {
+    "Semanal": ("semanal", 1),
+    "Quinzenal": ("semanal", 2),
+    "Mensal": ("mensal", 1),
+}
+
+def _somar_meses(d: date, meses: int, dia_base: int) -> date:
+    ano, mes = divmod(d.month - 1 + meses, 12)
+    ano, mes = d.year + ano, mes + 1
+    # dia 31 em mês de 30 dias (ou fevereiro) cai no último dia do mês
+    return date(ano, mes, min(dia_base, calendar.monthrange(ano, mes)[1]))
+
+def expandir(
+    inicio: date,
+    frequencia: str,
+    intervalo: int = 1,
+    ate: date | None = None,
+    quantidade: int | None = None,
+) -> list[date]:
+    """
+    Datas da série a partir de `inicio` (inclusive), até `ate` e/ou `quantidade`
+    ocorrências, o que vier primeiro. Sempre limitado a MAX_OCORRENCIAS.
+    """
+    if not ate and not quantidade:
+        raise ValueError("Informe a data final ou o número de ocorrências da série.")
+    limite = min(int(quantidade or MAX_OCORRENCIAS), MAX_OCORRENCIAS)
+    datas = []
+    n = 0
+    d = inicio
+    while len(datas) < limite and (ate is None or d <= ate):
+        datas.append(d)
+        n += 1
+        if frequencia == "mensal":
+            d = _somar_meses(inicio, n * intervalo, inicio.day)
+        else:
+            d = inicio + timedelta(weeks=n * intervalo)
+    return datas
+
+def planejar(
+    datas: list[date],
+    hora_ini: time,
+    hora_fim: time,
+    capacidade: int,
+    existentes: list,
+    calendario: CalendarioTrabalho | None = None,
+    ignorar_ids: set | None = None,
+) -> tuple[list[date], list[tuple[date, str]]]:
+    """
+    Separa as datas em (livres, [(data, motivo), ...]) num único passe.
+    `existentes` são os atendimentos do profissional entre a primeira e a última
+    data (uma consulta só); `ignorar_ids` exclui as próprias ocorrências ao editar a série.
+    Sem `calendario` (edição de horário, datas já validadas) só a ocupação é checada.
+    """
+    ignorar = {str(i) for i in (ignorar_ids or set())}
+    indice = indice_do_dia([a for a in existentes if str(a.get("id")) not in ignorar])
+    livres, recusadas = [], []
+    for d in datas:
+        if calendario is not None and not calendario.trabalha(d):
+            recusadas.append((d, "dia sem expediente"))
+        elif tem_conflito(indice, d, hora_ini, hora_fim, capacidade):
+            recusadas.append((d, "horário ocupado"))
+        else:
+            livres.append(d)
+    return livres, recusadas
+
+# ----------------------
+# Banco
+# ----------------------
+def agendamentos_no_periodo(prof_id, ini: date, fim: date) -> list:
+    """Atendimentos do profissional em [ini, fim] numa única varredura (keyset, sem corte de linhas)."""
+    from database import iterar_registros
+
+    return list(iterar_registros(
+        "ag_agenda",
+        {"profissional_id": prof_id},
+        order_col="data_atendimento",
+        colunas=COLS_CONFLITO,
+        gte={"data_atendimento": ini},
+        lte={"data_atendimento": fim},
+    ))
+
+def criar_serie(regra: dict, base: dict, datas: list[date]) -> list:
+    """
+    Grava a regra em ag_agenda_series e as ocorrências (cópias de `base`, uma por data)
+    num único INSERT em lote. Retorna as linhas criadas em ag_agenda.
+    """
+    from database import excluir_registro, inserir_registro, inserir_registros
+
+    if not datas:
+        return []
+    serie = inserir_registro(TABELA_SERIES, {
+        **regra,
+        "data_inicio": str(regra["data_inicio"]),
+        "data_fim": str(regra["data_fim"]) if regra.get("data_fim") else None,
+    })
+    try:
+        return inserir_registros(
+            "ag_agenda",
+            [{**base, "serie_id": serie["id"], "data_atendimento": str(d)} for d in datas],
+        )
+    except Exception:
+        # o lote é atômico (ex.: conflito barrado pelo trigger); não deixa a regra órfã
+        excluir_registro(TABELA_SERIES, serie["id"])
+        raise
+
+def serie_do_atendimento(agenda_id) -> int | None:
+    """
+    serie_id do atendimento; None se avulso ou se a coluna ainda não existe (sql/007).
+    Outras falhas sobem: tratá-las como "avulso" esconderia o "aplicar às próximas".
+    """
+    from database import _coluna_inexistente, listar_registros
+
+    try:
+        rows = listar_registros("ag_agenda", {"id": agenda_id}, colunas=["serie_id"])
+    except Exception as e:
+        if not _coluna_inexistente(e):
+            raise
+        return None
+    return rows[0].get("serie_id") if rows else None
+
+def atualizar_futuras(
+    prof_id,
+    serie_id,
+    a_partir: date,
+    payload: dict,
+    capacidade: int,
+) -> tuple[int, list[tuple[date, str]]]:
+    """
+    Aplica `payload` a todas as ocorrências da série a partir de `a_partir` num único UPDATE.
+    Se o horário muda, checa antes todas as datas de uma vez; havendo conflito nada é
+    gravado e as datas recusadas são devolvidas. Retorna (nº atualizadas, recusadas).
+    """
+    from database import atualizar_registros, listar_registros
+
+    futuras = listar_registros(
+        "ag_agenda",
+        {"profissional_id": prof_id, "serie_id": serie_id},
+        colunas=["id", "data_atendimento", "status"],
+        gte={"data_atendimento": a_partir},
+        order="data_atendimento",
+    )
+    if not futuras:
+        return 0, []
+    if "hora_inicio" in payload and payload.get("status", "Pendente") != "Cancelado":
+        datas = [date.fromisoformat(str(f["data_atendimento"])) for f in futuras]
+        existentes = agendamentos_no_periodo(prof_id, datas[0], datas[-1])
+        _, recusadas = planejar(
+            datas,
+            time.fromisoformat(str(payload["hora_inicio"])),
+            time.fromisoformat(str(payload["hora_fim"])),
+            capacidade,
+            existentes,
+            ignorar_ids={f["id"] for f in futuras},
+        )
+        if recusadas:
+            return 0, recusadas
+    linhas = atualizar_registros(
+        "ag_agenda",
+        payload,
+        filtros={"profissional_id": prof_id, "serie_id": serie_id},
+        gte={"data_atendimento": a_partir},
+    )
+    return len(linhas), []
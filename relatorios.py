@@ -0,0 +1,213 @@
+# relatorios.py
+# Faturamento sobre ag_servicos: os itens do período (e do período anterior de mesmo
+# tamanho) são lidos em blocos pela view ag_servicos_detalhados e agregados com
+# pandas/NumPy — por dia, mês, serviço, cliente e profissional, com variação
+# contra o período anterior e listas top-N. Os resultados ficam em cache por
+# (tenant, período) e caem a cada escrita em ag_servicos / ag_agenda / ag_tipos_servicos.
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from database import TAMANHO_PAGINA, ao_invalidar, iterar_registros, listar_registros
+
+VIEW_ITENS = "ag_servicos_detalhados"
+COLS_ITENS = [
+    "id", "profissional_id", "tipo_servico_id", "cliente_id", "cliente_nome",
+    "servico_nome", "data_atendimento", "quantidade", "valor_total",
+]
+TOP_N = 10
+
+try:
+    RELATORIO_TTL_SECS = float(os.getenv("AGENDA_RELATORIO_TTL_SECS", "300"))
+except ValueError:
+    RELATORIO_TTL_SECS = 300.0
+_MAX_ENTRADAS = 64
+
+# ----------------------
+# Leitura
+# ----------------------
+def periodo_anterior(ini: date, fim: date) -> tuple[date, date]:
+    """Período imediatamente anterior, com o mesmo número de dias."""
+    n = (fim - ini).days + 1
+    return ini - timedelta(days=n), ini - timedelta(days=1)
+
+def _tipar(df: pd.DataFrame) -> pd.DataFrame:
+    df["data"] = pd.to_datetime(df["data_atendimento"], format="%Y-%m-%d", errors="coerce")
+    df["valor_total"] = pd.to_numeric(df["valor_total"], errors="coerce").fillna(0.0)
+    df["quantidade"] = pd.to_numeric(df["quantidade"], errors="coerce").fillna(0).astype("int64")
+    df["cliente_nome"] = df["cliente_nome"].fillna("(sem nome)")
+    df["servico_nome"] = df["servico_nome"].fillna("(serviço removido)")
+    return df.drop(columns=["data_atendimento"])
+
+def carregar_itens(prof_id, ini: date, fim: date, tamanho_bloco: int | None = None) -> pd.DataFrame:
+    """
+    Itens com data de atendimento em [ini, fim]. prof_id None = todos os profissionais.
+    A leitura é por keyset em blocos de `tamanho_bloco` linhas; cada bloco vira um
+    DataFrame e só a concatenação final junta tudo.
+    """
+    tamanho = int(tamanho_bloco or TAMANHO_PAGINA)
+    linhas = iterar_registros(
+        VIEW_ITENS,
+        {"profissional_id": prof_id} if prof_id else None,
+        order_col="data_atendimento",
+        colunas=COLS_ITENS,
+        gte={"data_atendimento": ini},
+        lte={"data_atendimento": fim},
+        tamanho_pagina=tamanho,
+    )
+    partes = []
+    while True:
+        bloco = list(islice(linhas, tamanho))
+        if not bloco:
+            break
+        partes.append(pd.DataFrame.from_records(bloco, columns=COLS_ITENS))
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLS_ITENS)
+    return _tipar(df)
+
+# ----------------------
+# Agregações (vetorizadas)
+# ----------------------
+def _medidas(g) -> pd.DataFrame:
+    out = g.agg(
+        faturamento=("valor_total", "sum"),
+        quantidade=("quantidade", "sum"),
+        itens=("id", "size"),
+    )
+    itens = out["itens"].to_numpy(dtype="float64")
+    out["ticket_medio"] = np.divide(
+        out["faturamento"].to_numpy(dtype="float64"), itens, out=np.zeros(len(out)), where=itens > 0
+    )
+    return out
+
+def resumo(df: pd.DataFrame) -> dict:
+    fat = float(df["valor_total"].sum())
+    itens = int(len(df))
+    return {
+        "faturamento": fat,
+        "itens": itens,
+        "quantidade": int(df["quantidade"].sum()),
+        "ticket_medio": fat / itens if itens else 0.0,
+        "clientes": int(df["cliente_id"].nunique()),
+    }
+
+def por_dia(df: pd.DataFrame, ini: date, fim: date) -> pd.DataFrame:
+    """Uma linha por dia do período, inclusive os sem faturamento."""
+    dias = pd.date_range(ini, fim, freq="D", name="data")
+    out = _medidas(df.groupby("data")).reindex(dias, fill_value=0)
+    return out.reset_index()
+
+def por_mes(df: pd.DataFrame) -> pd.DataFrame:
+    out = _medidas(df.groupby(df["data"].dt.to_period("M").rename("mes"))).reset_index()
+    out["mes"] = out["mes"].astype(str)
+    return out
+
+def por_grupo(df: pd.DataFrame, chave: str, rotulo: str | None = None) -> pd.DataFrame:
+    """Agrega por `chave` (id) e traz o `rotulo` mais recente; ordenado por faturamento."""
+    g = df.groupby(chave, dropna=False, sort=False)
+    out = _medidas(g)
+    if rotulo:
+        out[rotulo] = g[rotulo].last()
+    total = float(out["faturamento"].sum())
+    out["participacao_pct"] = (out["faturamento"] / total * 100) if total else 0.0
+    return out.sort_values("faturamento", ascending=False).reset_index()
+
+def comparar(atual: pd.DataFrame, anterior: pd.DataFrame, chave: str, rotulo: str | None = None) -> pd.DataFrame:
+    """Faturamento atual x anterior por `chave`, com variação absoluta e percentual."""
+    a = atual.set_index(chave)
+    b = anterior.set_index(chave)
+    out = pd.concat(
+        [a["faturamento"], b["faturamento"].rename("faturamento_anterior")], axis=1
+    ).fillna(0.0)
+    if rotulo:
+        # quem só faturou no período anterior ainda precisa de nome
+        out.insert(0, rotulo, a[rotulo].combine_first(b[rotulo]).reindex(out.index))
+    out["variacao"] = out["faturamento"] - out["faturamento_anterior"]
+    base = out["faturamento_anterior"].to_numpy(dtype="float64")
+    out["variacao_pct"] = np.divide(
+        out["variacao"].to_numpy(dtype="float64") * 100, base,
+        out=np.full(len(out), np.nan), where=base > 0,
+    )
+    return out.reset_index()
+
+def _deltas(atual: dict, anterior: dict) -> dict:
+    out = {}
+    for k, v in atual.items():
+        ant = anterior.get(k, 0) or 0
+        out[k] = {"atual": v, "anterior": ant, "variacao": v - ant, "variacao_pct": ((v - ant) / ant * 100) if ant else None}
+    return out
+
+def _nomes_profissionais(ids) -> dict:
+    ids = [i for i in ids if i is not None]
+    if not ids:
+        return {}
+    rows = listar_registros("ag_profissionais", colunas=["id", "nome"], in_={"id": ids})
+    return {str(r["id"]): r.get("nome") or "" for r in rows}
+
+def montar_relatorio(df: pd.DataFrame, ini: date, fim: date, top_n: int = TOP_N) -> dict:
+    """Todas as visões a partir de um DataFrame que cobre o período anterior e o atual."""
+    ini_ant, fim_ant = periodo_anterior(ini, fim)
+    datas = df["data"].to_numpy()
+    no_atual = (datas >= np.datetime64(ini)) & (datas <= np.datetime64(fim))
+    no_anterior = (datas >= np.datetime64(ini_ant)) & (datas <= np.datetime64(fim_ant))
+    atual, anterior = df[no_atual], df[no_anterior]
+
+    servicos = por_grupo(atual, "tipo_servico_id", "servico_nome")
+    clientes = por_grupo(atual, "cliente_id", "cliente_nome")
+    profs = por_grupo(atual.assign(profissional_id=atual["profissional_id"].astype(str)), "profissional_id")
+    profs["profissional"] = profs["profissional_id"].map(_nomes_profissionais(profs["profissional_id"].tolist()))
+
+    return {
+        "periodo": (ini, fim),
+        "periodo_anterior": (ini_ant, fim_ant),
+        "resumo": _deltas(resumo(atual), resumo(anterior)),
+        "por_dia": por_dia(atual, ini, fim),
+        "por_mes": por_mes(atual),
+        "por_servico": servicos,
+        "por_cliente": clientes,
+        "por_profissional": profs,
+        "top_servicos": servicos.head(top_n),
+        "top_clientes": clientes.head(top_n),
+        "servicos_vs_anterior": comparar(
+            servicos, por_grupo(anterior, "tipo_servico_id", "servico_nome"), "tipo_servico_id", "servico_nome"
+        ).sort_values("variacao", ascending=False, ignore_index=True),
+        "itens": atual.sort_values(["data", "id"]).reset_index(drop=True),
+    }
+
+# ----------------------
+# Cache por (tenant, período)
+# ----------------------
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()  # chave -> (expira_em, relatorio)
+_lock = threading.Lock()
+
+def invalidar(tenant=None) -> None:
+    """Derruba os relatórios do tenant (e os consolidados de todos); None limpa tudo."""
+    alvo = None if tenant is None else str(tenant)
+    with _lock:
+        for chave in [c for c in _cache if alvo is None or c[0] is None or c[0] == alvo]:
+            del _cache[chave]
+
+for _tabela in ("ag_servicos", "ag_agenda", "ag_tipos_servicos"):
+    ao_invalidar(_tabela, invalidar)
+
+def relatorio(prof_id, ini: date, fim: date, top_n: int = TOP_N) -> dict:
+    """Relatório do período (prof_id None = todos). Uma leitura cobre período atual e anterior."""
+    chave = (None if prof_id is None else str(prof_id), ini, fim, int(top_n))
+    agora = time.monotonic()
+    with _lock:
+        item = _cache.get(chave)
+        if item and item[0] > agora:
+            _cache.move_to_end(chave)
+            return item[1]
+    ini_ant, _ = periodo_anterior(ini, fim)
+    rel = montar_relatorio(carregar_itens(prof_id, ini_ant, fim), ini, fim, top_n)
+    with _lock:
+        _cache[chave] = (agora + RELATORIO_TTL_SECS, rel)
+        while len(_cache) > _MAX_ENTRADAS:
+            _cache.popitem(last=False)
+    return rel
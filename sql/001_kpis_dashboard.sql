@@ -0,0 +1,49 @@
+-- KPIs do dashboard em uma única ida ao banco.
+-- Executar no SQL Editor do Supabase. Chamado por dashboard._contagens_agregadas
+-- via supabase.rpc("ag_kpis_dashboard", {...}).
+
+create or replace function ag_kpis_dashboard(
+    p_profissional_id ag_agenda.profissional_id%type,
+    p_hoje date default current_date
+)
+returns table (
+    dia bigint,
+    mes_anterior bigint,
+    mes_ate_ontem bigint,
+    total_mes bigint,
+    confirmados bigint,
+    pendentes bigint,
+    cancelados bigint,
+    concluidos_hoje bigint
+)
+language sql
+stable
+as $$
+    with p as (
+        select
+            p_hoje as hoje,
+            date_trunc('month', p_hoje)::date as primeiro_mes,
+            (date_trunc('month', p_hoje) - interval '1 month')::date as primeiro_mes_ant
+    ),
+    c as (
+        select
+            count(*) filter (where a.data_atendimento = p.hoje) as dia,
+            count(*) filter (where a.data_atendimento >= p.primeiro_mes_ant
+                               and a.data_atendimento < p.primeiro_mes) as mes_anterior,
+            count(*) filter (where a.data_atendimento >= p.primeiro_mes
+                               and a.data_atendimento < p.hoje) as mes_ate_ontem,
+            count(*) filter (where a.status = 'Confirmado') as confirmados,
+            count(*) filter (where a.status = 'Pendente') as pendentes,
+            count(*) filter (where a.status = 'Cancelado') as cancelados,
+            count(*) filter (where a.status = 'Concluído' and a.data_atendimento = p.hoje) as concluidos_hoje
+        from ag_agenda a, p
+        where a.profissional_id = p_profissional_id
+    )
+    select dia, mes_anterior, mes_ate_ontem, dia + mes_ate_ontem,
+           confirmados, pendentes, cancelados, concluidos_hoje
+    from c;
+$$;
+
+-- índice que atende tanto este agregado quanto as listagens por período
+create index if not exists ix_ag_agenda_prof_data
+    on ag_agenda (profissional_id, data_atendimento);
@@ -0,0 +1,141 @@
+-- Rollup diário de ag_agenda por (profissional, data, status), mantido por trigger.
+-- Qualquer escrita em ag_agenda (SDK, executar_sql, SQL Editor) ajusta os contadores,
+-- inclusive mudanças de status/data feitas pelo modal de edição e pelo "Mover" do kanban.
+-- Reconstrução: select ag_rebuild_resumo_diario();  (ou python reconstruir_resumo_diario.py)
+
+-- copia os tipos das colunas de ag_agenda
+create table if not exists ag_agenda_resumo_diario as
+    select profissional_id, data_atendimento, status, 0::bigint as total
+    from ag_agenda
+    where false;
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_constraint where conname = 'ag_agenda_resumo_diario_pkey'
+    ) then
+        alter table ag_agenda_resumo_diario
+            add constraint ag_agenda_resumo_diario_pkey
+            primary key (profissional_id, data_atendimento, status);
+    end if;
+end $$;
+
+create or replace function ag_agenda_resumo_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'UPDATE'
+       and old.profissional_id is not distinct from new.profissional_id
+       and old.data_atendimento is not distinct from new.data_atendimento
+       and coalesce(old.status, 'Pendente') = coalesce(new.status, 'Pendente') then
+        return null;
+    end if;
+
+    if tg_op in ('UPDATE', 'DELETE') then
+        update ag_agenda_resumo_diario
+           set total = total - 1
+         where profissional_id = old.profissional_id
+           and data_atendimento = old.data_atendimento
+           and status = coalesce(old.status, 'Pendente');
+        delete from ag_agenda_resumo_diario
+         where profissional_id = old.profissional_id
+           and data_atendimento = old.data_atendimento
+           and status = coalesce(old.status, 'Pendente')
+           and total <= 0;
+    end if;
+
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into ag_agenda_resumo_diario (profissional_id, data_atendimento, status, total)
+        values (new.profissional_id, new.data_atendimento, coalesce(new.status, 'Pendente'), 1)
+        on conflict (profissional_id, data_atendimento, status)
+        do update set total = ag_agenda_resumo_diario.total + 1;
+    end if;
+
+    return null;
+end;
+$$;
+
+drop trigger if exists trg_ag_agenda_resumo on ag_agenda;
+create trigger trg_ag_agenda_resumo
+    after insert or delete or update of profissional_id, data_atendimento, status
+    on ag_agenda
+    for each row
+    execute function ag_agenda_resumo_trg();
+
+-- Reconstrói o rollup (todos os profissionais ou só um). Retorna nº de linhas geradas.
+create or replace function ag_rebuild_resumo_diario(
+    p_profissional_id ag_agenda.profissional_id%type default null
+)
+returns bigint
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    n bigint;
+begin
+    -- bloqueia escritas em ag_agenda durante a reconstrução (leituras seguem livres)
+    lock table ag_agenda in share mode;
+
+    delete from ag_agenda_resumo_diario
+     where p_profissional_id is null or profissional_id = p_profissional_id;
+
+    insert into ag_agenda_resumo_diario (profissional_id, data_atendimento, status, total)
+    select profissional_id, data_atendimento, coalesce(status, 'Pendente'), count(*)
+      from ag_agenda
+     where p_profissional_id is null or profissional_id = p_profissional_id
+     group by 1, 2, 3;
+
+    get diagnostics n = row_count;
+    return n;
+end;
+$$;
+
+select ag_rebuild_resumo_diario();
+
+-- KPIs do dashboard passam a ler o rollup (mesma assinatura de sql/001_kpis_dashboard.sql)
+create or replace function ag_kpis_dashboard(
+    p_profissional_id ag_agenda.profissional_id%type,
+    p_hoje date default current_date
+)
+returns table (
+    dia bigint,
+    mes_anterior bigint,
+    mes_ate_ontem bigint,
+    total_mes bigint,
+    confirmados bigint,
+    pendentes bigint,
+    cancelados bigint,
+    concluidos_hoje bigint
+)
+language sql
+stable
+as $$
+    with p as (
+        select
+            p_hoje as hoje,
+            date_trunc('month', p_hoje)::date as primeiro_mes,
+            (date_trunc('month', p_hoje) - interval '1 month')::date as primeiro_mes_ant
+    ),
+    c as (
+        select
+            coalesce(sum(r.total) filter (where r.data_atendimento = p.hoje), 0)::bigint as dia,
+            coalesce(sum(r.total) filter (where r.data_atendimento >= p.primeiro_mes_ant
+                                            and r.data_atendimento < p.primeiro_mes), 0)::bigint as mes_anterior,
+            coalesce(sum(r.total) filter (where r.data_atendimento >= p.primeiro_mes
+                                            and r.data_atendimento < p.hoje), 0)::bigint as mes_ate_ontem,
+            coalesce(sum(r.total) filter (where r.status = 'Confirmado'), 0)::bigint as confirmados,
+            coalesce(sum(r.total) filter (where r.status = 'Pendente'), 0)::bigint as pendentes,
+            coalesce(sum(r.total) filter (where r.status = 'Cancelado'), 0)::bigint as cancelados,
+            coalesce(sum(r.total) filter (where r.status = 'Concluído'
+                                            and r.data_atendimento = p.hoje), 0)::bigint as concluidos_hoje
+        from ag_agenda_resumo_diario r, p
+        where r.profissional_id = p_profissional_id
+    )
+    select dia, mes_anterior, mes_ate_ontem, dia + mes_ate_ontem,
+           confirmados, pendentes, cancelados, concluidos_hoje
+    from c;
+$$;
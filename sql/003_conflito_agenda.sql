@@ -0,0 +1,68 @@
+-- Garante no banco que nenhum horário passa da capacidade_simultanea do profissional.
+-- Uma constraint EXCLUDE só cobre capacidade 1, então a checagem é feita num trigger
+-- BEFORE INSERT/UPDATE que serializa as escritas do mesmo profissional+dia com um
+-- advisory lock de transação: duas sessões concorrentes não conseguem ambas gravar.
+-- Atendimentos "Cancelado" não ocupam horário. Erro: SQLSTATE 23P01 (exclusion_violation).
+
+create or replace function ag_agenda_conflito_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_cap integer;
+    v_ocupados integer;
+begin
+    if coalesce(new.status, 'Pendente') = 'Cancelado' then
+        return new;
+    end if;
+    if tg_op = 'UPDATE'
+       and old.profissional_id is not distinct from new.profissional_id
+       and old.data_atendimento is not distinct from new.data_atendimento
+       and old.hora_inicio is not distinct from new.hora_inicio
+       and old.hora_fim is not distinct from new.hora_fim
+       and coalesce(old.status, 'Pendente') <> 'Cancelado' then
+        return new;  -- nada que afete ocupação mudou
+    end if;
+
+    perform pg_advisory_xact_lock(
+        hashtext('ag_agenda'),
+        hashtext(new.profissional_id::text || '|' || new.data_atendimento::text)
+    );
+
+    select coalesce(p.capacidade_simultanea, 1)
+      into v_cap
+      from ag_profissionais p
+     where p.id = new.profissional_id;
+    v_cap := coalesce(v_cap, 1);
+
+    select count(*)
+      into v_ocupados
+      from ag_agenda a
+     where a.profissional_id = new.profissional_id
+       and a.data_atendimento = new.data_atendimento
+       and coalesce(a.status, 'Pendente') <> 'Cancelado'
+       and a.hora_inicio < new.hora_fim
+       and a.hora_fim > new.hora_inicio
+       and (tg_op = 'INSERT' or a.id <> new.id);
+
+    if v_ocupados >= v_cap then
+        raise exception 'Conflito de horário: % atendimento(s) já ocupam % % - % (capacidade %)',
+            v_ocupados, new.data_atendimento, new.hora_inicio, new.hora_fim, v_cap
+            using errcode = 'exclusion_violation';
+    end if;
+
+    return new;
+end;
+$$;
+
+drop trigger if exists trg_ag_agenda_conflito on ag_agenda;
+create trigger trg_ag_agenda_conflito
+    before insert or update of profissional_id, data_atendimento, hora_inicio, hora_fim, status
+    on ag_agenda
+    for each row
+    execute function ag_agenda_conflito_trg();
+
+create index if not exists ix_ag_agenda_prof_data_hora
+    on ag_agenda (profissional_id, data_atendimento, hora_inicio);
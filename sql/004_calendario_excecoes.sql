@@ -0,0 +1,34 @@
+-- Exceções de calendário por profissional (lidas por calendario.carregar_excecoes).
+-- tipo 'bloqueio': não atende no período (férias, folga, curso...)
+-- tipo 'extra'   : atende mesmo em dia não permitido ou feriado (plantão, mutirão...)
+
+create table if not exists ag_calendario_excecoes (
+    id bigint generated by default as identity primary key,
+    profissional_id uuid not null,
+    data_inicio date not null,
+    data_fim date not null,
+    tipo text not null default 'bloqueio' check (tipo in ('bloqueio', 'extra')),
+    descricao text,
+    created_at timestamptz not null default now(),
+    check (data_fim >= data_inicio)
+);
+
+-- acompanha o tipo real de ag_profissionais.id (uuid ou inteiro)
+do $$
+declare
+    v_tipo text;
+begin
+    select format_type(a.atttypid, a.atttypmod)
+      into v_tipo
+      from pg_attribute a
+     where a.attrelid = 'ag_profissionais'::regclass and a.attname = 'id';
+    if v_tipo is not null and v_tipo <> 'uuid' then
+        execute format(
+            'alter table ag_calendario_excecoes alter column profissional_id type %s using profissional_id::text::%s',
+            v_tipo, v_tipo
+        );
+    end if;
+end $$;
+
+create index if not exists ix_ag_calendario_excecoes_prof_periodo
+    on ag_calendario_excecoes (profissional_id, data_inicio, data_fim);
@@ -0,0 +1,22 @@
+-- Contagem por status (histórico inteiro e dentro de um período) a partir do rollup
+-- diário (sql/002_resumo_diario.sql). Usada pelos KPIs e cabeçalhos do kanban da agenda.
+
+create or replace function ag_contagem_status(
+    p_profissional_id ag_agenda.profissional_id%type,
+    p_ini date default null,
+    p_fim date default null
+)
+returns table (status text, total bigint, total_periodo bigint)
+language sql
+stable
+as $$
+    select r.status::text,
+           sum(r.total)::bigint,
+           coalesce(sum(r.total) filter (
+               where (p_ini is null or r.data_atendimento >= p_ini)
+                 and (p_fim is null or r.data_atendimento <= p_fim)
+           ), 0)::bigint
+      from ag_agenda_resumo_diario r
+     where r.profissional_id = p_profissional_id
+     group by r.status;
+$$;
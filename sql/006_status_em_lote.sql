@@ -0,0 +1,25 @@
+-- Atualiza o status de vários atendimentos num único UPDATE (kanban arrastar e soltar).
+-- p_itens: [{"id": ..., "status": "..."}, ...]. Só altera linhas do próprio profissional.
+-- Os triggers de ag_agenda (rollup e conflito) rodam normalmente; se algum item violar a
+-- capacidade, o comando inteiro é desfeito (tudo ou nada). Retorna o nº de linhas alteradas.
+
+create or replace function ag_atualizar_status_lote(
+    p_profissional_id ag_agenda.profissional_id%type,
+    p_itens jsonb
+)
+returns integer
+language plpgsql
+as $$
+declare
+    n integer;
+begin
+    update ag_agenda a
+       set status = v.status
+      from jsonb_populate_recordset(null::ag_agenda, p_itens) v
+     where a.id = v.id
+       and a.profissional_id = p_profissional_id
+       and a.status is distinct from v.status;
+    get diagnostics n = row_count;
+    return n;
+end;
+$$;
@@ -0,0 +1,44 @@
+-- Séries de atendimentos recorrentes (recorrencia.py / agenda.py).
+-- Cada ocorrência é uma linha normal de ag_agenda com serie_id apontando para a regra.
+
+create table if not exists ag_agenda_series (
+    id bigint generated by default as identity primary key,
+    profissional_id uuid not null,
+    cliente_id bigint,
+    frequencia text not null check (frequencia in ('semanal', 'mensal')),
+    intervalo integer not null default 1 check (intervalo >= 1),
+    data_inicio date not null,
+    data_fim date,
+    ocorrencias integer,
+    hora_inicio time not null,
+    hora_fim time not null,
+    created_at timestamptz not null default now(),
+    check (data_fim is not null or ocorrencias is not null)
+);
+
+-- acompanha os tipos reais de ag_profissionais.id e ag_clientes.id
+do $$
+declare
+    v_prof text;
+    v_cli text;
+begin
+    select format_type(a.atttypid, a.atttypmod) into v_prof
+      from pg_attribute a
+     where a.attrelid = 'ag_profissionais'::regclass and a.attname = 'id';
+    if v_prof is not null and v_prof <> 'uuid' then
+        execute format('alter table ag_agenda_series alter column profissional_id type %s using profissional_id::text::%s', v_prof, v_prof);
+    end if;
+    select format_type(a.atttypid, a.atttypmod) into v_cli
+      from pg_attribute a
+     where a.attrelid = 'ag_clientes'::regclass and a.attname = 'id';
+    if v_cli is not null and v_cli <> 'bigint' then
+        execute format('alter table ag_agenda_series alter column cliente_id type %s using cliente_id::text::%s', v_cli, v_cli);
+    end if;
+end $$;
+
+alter table ag_agenda
+    add column if not exists serie_id bigint references ag_agenda_series (id) on delete set null;
+
+create index if not exists ix_ag_agenda_serie_data
+    on ag_agenda (serie_id, data_atendimento)
+    where serie_id is not null;
@@ -0,0 +1,51 @@
+-- Fila persistente de mensagens de saída (fila_mensagens.py).
+-- chave_dedup impede que a mesma notificação seja enfileirada duas vezes
+-- (ex.: o cron de lembretes rodando de novo no mesmo dia).
+
+create table if not exists ag_fila_mensagens (
+    id bigint generated by default as identity primary key,
+    canal text not null check (canal in ('whatsapp', 'email')),
+    destino text not null,
+    assunto text,
+    corpo text not null,
+    chave_dedup text not null unique,
+    profissional_id text,
+    agenda_id text,
+    status text not null default 'pendente'
+        check (status in ('pendente', 'enviando', 'enviado', 'falhou')),
+    tentativas integer not null default 0,
+    proxima_tentativa timestamptz not null default now(),
+    reservado_ate timestamptz,
+    ultimo_erro text,
+    created_at timestamptz not null default now(),
+    enviado_em timestamptz
+);
+
+create index if not exists ix_ag_fila_mensagens_prontas
+    on ag_fila_mensagens (proxima_tentativa)
+    where status in ('pendente', 'enviando');
+
+-- Reserva até p_limite mensagens prontas para um worker. SKIP LOCKED deixa vários
+-- workers disputarem a fila sem bloquear uns aos outros; a reserva expira após
+-- p_lease_segundos, devolvendo à fila mensagens de um worker que caiu no meio do envio.
+create or replace function ag_reservar_mensagens(
+    p_limite integer default 50,
+    p_lease_segundos integer default 120
+)
+returns setof ag_fila_mensagens
+language sql
+as $$
+    update ag_fila_mensagens f
+       set status = 'enviando',
+           reservado_ate = now() + make_interval(secs => p_lease_segundos)
+     where f.id in (
+            select id
+              from ag_fila_mensagens
+             where (status = 'pendente' and proxima_tentativa <= now())
+                or (status = 'enviando' and reservado_ate < now())
+             order by proxima_tentativa
+             limit p_limite
+               for update skip locked
+           )
+    returning f.*;
+$$;
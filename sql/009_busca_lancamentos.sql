@@ -0,0 +1,11 @@
+-- Busca dos seletores de lancamento_servicos.py (trecho do nome, sem diferenciar caixa).
+-- ILIKE '%termo%' não usa B-tree; com pg_trgm o GIN atende a busca por trecho e o
+-- LIMIT dos seletores corta cedo, independentemente do tamanho do histórico.
+
+create extension if not exists pg_trgm;
+
+create index if not exists ix_ag_agenda_cliente_nome_trgm
+    on ag_agenda using gin (cliente_nome gin_trgm_ops);
+
+create index if not exists ix_ag_tipos_servicos_nome_trgm
+    on ag_tipos_servicos using gin (nome gin_trgm_ops);
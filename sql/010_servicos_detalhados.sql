@@ -0,0 +1,31 @@
+-- Itens de serviço já unidos ao agendamento (data, hora, cliente) e ao tipo de serviço,
+-- para a lista "Serviços lançados" (lancamento_servicos.py) buscar uma tela por vez
+-- com keyset em (data_atendimento, id). Itens sem agendamento não entram (o período
+-- é filtrado pela data do atendimento).
+-- security_invoker: a view respeita as permissões/RLS de quem consulta (Postgres 15+).
+
+create or replace view ag_servicos_detalhados
+with (security_invoker = true)
+as
+select
+    s.id,
+    s.profissional_id,
+    s.agenda_id,
+    s.tipo_servico_id,
+    s.cliente_id,
+    s.quantidade,
+    s.valor_unitario,
+    s.valor_total,
+    a.data_atendimento,
+    a.hora_inicio,
+    a.cliente_nome,
+    t.nome as servico_nome
+from ag_servicos s
+join ag_agenda a on a.id = s.agenda_id
+left join ag_tipos_servicos t on t.id = s.tipo_servico_id;
+
+create index if not exists ix_ag_servicos_agenda
+    on ag_servicos (agenda_id);
+
+create index if not exists ix_ag_servicos_prof_agenda
+    on ag_servicos (profissional_id, agenda_id);
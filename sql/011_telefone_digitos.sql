@@ -0,0 +1,38 @@
+-- Telefone canônico (E.164 só com dígitos, ex.: 5511987654321) ao lado do telefone
+-- formatado, para casar resposta de WhatsApp / linha de importação com o cliente por
+-- igualdade indexada em vez de varrer e reformatar. As colunas são geradas pelo banco:
+-- o app continua gravando só o telefone formatado.
+-- ag_telefone_digitos espelha phone_utils.normalize_br_phone (mudou um, muda o outro).
+
+create or replace function ag_telefone_digitos(t text)
+returns text
+language sql
+immutable
+parallel safe
+as $$
+    select case when d ~ '^[1-9]{2}(9[0-9]{8}|[0-9]{8})$' then '55' || d end
+    from (
+        select regexp_replace(
+                   regexp_replace(regexp_replace(coalesce(t, ''), '[^0-9]+', '', 'g'), '^0+', ''),
+                   '^55(?=[0-9]{10,11}$)', ''
+               ) as d
+    ) s
+$$;
+
+alter table ag_clientes
+    add column if not exists telefone_digitos text
+    generated always as (ag_telefone_digitos(telefone)) stored;
+
+alter table ag_agenda
+    add column if not exists cliente_telefone_digitos text
+    generated always as (ag_telefone_digitos(cliente_telefone)) stored;
+
+-- cliente do profissional pelo telefone (importação, cadastro duplicado)
+create index if not exists ix_ag_clientes_prof_tel
+    on ag_clientes (profissional_id, telefone_digitos)
+    where telefone_digitos is not null;
+
+-- resposta de WhatsApp: atendimentos daquele número a partir de uma data
+create index if not exists ix_ag_agenda_tel_data
+    on ag_agenda (cliente_telefone_digitos, data_atendimento)
+    where cliente_telefone_digitos is not null;
@@ -0,0 +1,11 @@
+-- Status obrigatório em ag_agenda.
+-- Linhas antigas com status NULL eram tratadas como 'Pendente' pelo rollup (sql/002),
+-- mas as colunas do kanban filtram status = '<status>' e nunca as carregavam: a contagem
+-- de Pendente ficava acima das linhas carregadas e o "Carregar mais" não sumia.
+-- O trigger do rollup já trata NULL e 'Pendente' como o mesmo status, então o
+-- backfill não altera ag_agenda_resumo_diario.
+
+update ag_agenda set status = 'Pendente' where status is null;
+
+alter table ag_agenda alter column status set default 'Pendente';
+alter table ag_agenda alter column status set not null;
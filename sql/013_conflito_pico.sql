@@ -0,0 +1,71 @@
+-- Conflito pela ocupação de pico, não pelo total de atendimentos que tocam o horário.
+-- O trigger de sql/003 contava todos os atendimentos que encostam em [início, fim):
+-- com capacidade 2 e atendimentos 09-10 e 10-11, um novo 09-11 era recusado embora
+-- nunca houvesse mais de um ao mesmo tempo. Agora a contagem é o máximo de
+-- atendimentos em curso em cada ponto onde a ocupação pode subir: o início do novo
+-- atendimento e cada início que cai dentro dele.
+-- disponibilidade.IndiceAgenda.pico faz a mesma conta antes de gravar (mudou um, muda o outro).
+
+create or replace function ag_agenda_conflito_trg()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_cap integer;
+    v_ocupados integer;
+begin
+    if coalesce(new.status, 'Pendente') = 'Cancelado' then
+        return new;
+    end if;
+    if tg_op = 'UPDATE'
+       and old.profissional_id is not distinct from new.profissional_id
+       and old.data_atendimento is not distinct from new.data_atendimento
+       and old.hora_inicio is not distinct from new.hora_inicio
+       and old.hora_fim is not distinct from new.hora_fim
+       and coalesce(old.status, 'Pendente') <> 'Cancelado' then
+        return new;  -- nada que afete ocupação mudou
+    end if;
+
+    perform pg_advisory_xact_lock(
+        hashtext('ag_agenda'),
+        hashtext(new.profissional_id::text || '|' || new.data_atendimento::text)
+    );
+
+    select coalesce(p.capacidade_simultanea, 1)
+      into v_cap
+      from ag_profissionais p
+     where p.id = new.profissional_id;
+    v_cap := coalesce(v_cap, 1);
+
+    with outros as (
+        select a.hora_inicio, a.hora_fim
+          from ag_agenda a
+         where a.profissional_id = new.profissional_id
+           and a.data_atendimento = new.data_atendimento
+           and coalesce(a.status, 'Pendente') <> 'Cancelado'
+           and a.hora_inicio < new.hora_fim
+           and a.hora_fim > new.hora_inicio
+           and (tg_op = 'INSERT' or a.id <> new.id)
+    ), pontos as (
+        select new.hora_inicio as t
+        union
+        select o.hora_inicio from outros o where o.hora_inicio > new.hora_inicio
+    )
+    select coalesce(max(n), 0)
+      into v_ocupados
+      from (
+        select (select count(*) from outros o where o.hora_inicio <= p.t and o.hora_fim > p.t) as n
+          from pontos p
+      ) c;
+
+    if v_ocupados >= v_cap then
+        raise exception 'Conflito de horário: % atendimento(s) ao mesmo tempo em % % - % (capacidade %)',
+            v_ocupados, new.data_atendimento, new.hora_inicio, new.hora_fim, v_cap
+            using errcode = 'exclusion_violation';
+    end if;
+
+    return new;
+end;
+$$;
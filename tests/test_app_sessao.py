@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("streamlit_option_menu")
+pytest.importorskip("dotenv")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import auth  # noqa: E402
+
+USUARIO = {"id": 1, "nome": "Ana", "email": "ana@exemplo.com", "is_admin": False}
+
+
+def _app():
+    return AppTest.from_file("../app.py", default_timeout=30)
+
+
+def _cookies_gravados(at):
+    return [el.proto.srcdoc for el in at.main if "agenda_sessao=" in getattr(el.proto, "srcdoc", "")]
+
+
+def test_token_na_url_e_descartado_sem_restaurar(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(auth, "usuario_do_token", lambda t: chamadas.append(t) or USUARIO)
+    at = _app()
+    at.query_params["sessao"] = "qualquer.token"
+    at.run()
+    assert not at.exception
+    assert "sessao" not in at.query_params
+    assert chamadas == []
+    assert [b.label for b in at.button] == ["Entrar"]
+
+
+def test_login_grava_cookie_e_nao_poe_token_na_url(monkeypatch):
+    monkeypatch.setattr(auth, "validar_login", lambda email, senha: dict(USUARIO))
+    monkeypatch.setattr(auth, "token_para", lambda u: "corpo.assinatura")
+    at = _app().run()
+    at.text_input[0].input("ana@exemplo.com")
+    at.text_input[1].input("segredo")
+    at.button[0].click().run()
+    assert not at.exception
+    assert dict(at.query_params) == {}
+    assert at.session_state.user["id"] == 1
+    [script] = _cookies_gravados(at)
+    assert "agenda_sessao=corpo.assinatura" in script and "SameSite=Strict" in script
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+import assets
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    assets.limpar()
+    yield
+    assets.limpar()
+
+
+def test_logo_lido_uma_vez_e_relido_quando_muda(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "ASSETS_CHECK_SECS", 0.0)
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"v1")
+    assert assets.logo_bytes(str(logo)) == b"v1"
+
+    lidos = []
+    original = assets._ler_bytes
+    monkeypatch.setattr(assets, "_ler_bytes", lambda p: lidos.append(p) or original(p))
+    assert assets.logo_bytes(str(logo)) == b"v1"
+    assert lidos == []
+
+    logo.write_bytes(b"v2")
+    os.utime(logo, (1, 1))
+    assert assets.logo_bytes(str(logo)) == b"v2"
+    assert len(lidos) == 1
+
+
+def test_logo_servido_por_url_e_nao_embutido():
+    pytest.importorskip("streamlit")
+    from streamlit.testing.v1 import AppTest
+
+    def pagina():
+        from utils_ui import show_logo
+        show_logo("start.png", width=80)
+        show_logo(width=None)
+
+    at = AppTest.from_function(pagina).run()
+    assert not at.exception
+    urls = [img.url for el in at.main.children.values() for img in el.proto.imgs]
+    assert len(urls) == 2
+    assert all(u and not u.startswith("data:") for u in urls)
@@ -0,0 +1,37 @@
+import hashlib
+import hmac
+
+import pytest
+
+pytest.importorskip("bcrypt")
+pytest.importorskip("dotenv")
+
+import auth  # noqa: E402
+import database  # noqa: E402
+
+
+def test_token_com_chave_errada_e_recusado(monkeypatch):
+    monkeypatch.setenv("AGENDA_SESSION_SECRET", "chave-do-servidor")
+    token = auth.emitir_token("u1", "$2b$12$hash")
+    assert auth.ler_token(token)["uid"] == "u1"
+
+    monkeypatch.setenv("AGENDA_SESSION_SECRET", "outra-chave")
+    assert auth.ler_token(token) is None
+
+
+def test_token_adulterado_e_recusado(monkeypatch):
+    monkeypatch.setenv("AGENDA_SESSION_SECRET", "chave-do-servidor")
+    corpo, assinatura = auth.emitir_token("u1", "h").split(".")
+    outro = auth.emitir_token("admin", "h").split(".")[0]
+    assert auth.ler_token(f"{outro}.{assinatura}") is None
+
+
+def test_sem_segredo_nao_usa_a_chave_do_supabase(monkeypatch):
+    monkeypatch.delenv("AGENDA_SESSION_SECRET", raising=False)
+    # token forjado só com dados públicos: a chave anon do .env versionado
+    anon = (database.SUPABASE_KEY or "anon").encode("utf-8")
+    chave_publica = hashlib.sha256(b"agenda-sessao:" + anon).digest()
+    corpo = auth.emitir_token("admin", "h").split(".")[0]
+    forjada = auth._b64(hmac.new(chave_publica, corpo.encode("ascii"), hashlib.sha256).digest())
+    assert auth.ler_token(f"{corpo}.{forjada}") is None
+    assert auth._segredo() == auth._SEGREDO_PROCESSO
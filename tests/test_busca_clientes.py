@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+from busca_clientes import IndiceClientes, termos_da_busca
+
+CLIENTES = [
+    {"id": 1, "nome": "João da Silva", "telefone": "(11) 98765-4321", "email": "joao@exemplo.com"},
+    {"id": 2, "nome": "Maria Conceição", "telefone": "+55 21 3333-4444", "email": "maria.c@exemplo.com"},
+    {"id": 3, "nome": "Joana Prado", "telefone": "5531912345678", "email": None},
+    {"id": 4, "nome": "Antônio Souza", "telefone": None, "email": "tonho@exemplo.com"},
+]
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+@pytest.fixture
+def idx():
+    return IndiceClientes(CLIENTES)
+
+
+def test_vazio_traz_todos_em_ordem_de_nome(idx):
+    assert _ids(idx.buscar("")) == [4, 3, 1, 2]
+
+
+def test_nome_por_prefixo_e_trecho(idx):
+    assert _ids(idx.buscar("jo")) == [3, 1]
+    assert _ids(idx.buscar("silva")) == [1]
+    assert _ids(idx.buscar("ilv")) == [1]
+    assert _ids(idx.buscar("jo silva")) == [1]
+
+
+def test_ignora_acentos_e_maiusculas(idx):
+    assert _ids(idx.buscar("joao")) == [1]
+    assert _ids(idx.buscar("JOÃO")) == [1]
+    assert _ids(idx.buscar("conceicao")) == [2]
+    assert _ids(idx.buscar("antonio")) == [4]
+
+
+def test_email(idx):
+    assert _ids(idx.buscar("tonho@")) == [4]
+    assert _ids(idx.buscar("maria.c@exemplo.com")) == [2]
+
+
+def test_telefone_parcial(idx):
+    assert _ids(idx.buscar("98765")) == [1]
+    assert _ids(idx.buscar("(11) 9876")) == [1]
+    assert _ids(idx.buscar("3333-4444")) == [2]
+    assert _ids(idx.buscar("4321")) == [1]
+
+
+@pytest.mark.parametrize("termo", ["5511987654321", "+55 11 98765-4321", "011 98765-4321", "(11) 98765-4321"])
+def test_telefone_completo_em_qualquer_formato(idx, termo):
+    assert _ids(idx.buscar(termo)) == [1]
+
+
+@pytest.mark.parametrize("termo", ["(31) 91234-5678", "+55 31 91234-5678", "31912345678"])
+def test_telefone_gravado_em_e164(idx, termo):
+    assert _ids(idx.buscar(termo)) == [3]
+
+
+def test_termos_de_telefone_sem_pais_e_sem_prefixo():
+    assert termos_da_busca("+55 (11) 98765-4321") == ["11987654321"]
+    assert termos_da_busca("0 11 9876") == ["119876"]
+    assert termos_da_busca("0") == ["0"]
+
+
+def test_adicionar_atualizar_remover(idx):
+    idx.adicionar({"id": 5, "nome": "Bruna Lima", "telefone": "(41) 99999-0000", "email": ""})
+    assert _ids(idx.buscar("bruna")) == [5]
+    idx.adicionar({"id": 5, "nome": "Bruna Costa", "telefone": "(41) 99999-0000", "email": ""})
+    assert _ids(idx.buscar("lima")) == []
+    assert _ids(idx.buscar("costa")) == [5]
+    idx.remover(5)
+    assert _ids(idx.buscar("41999990000")) == []
+    assert len(idx) == len(CLIENTES)
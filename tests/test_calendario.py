@@ -0,0 +1,105 @@
+from datetime import date
+
+import pytest
+
+import calendario
+from calendario import CalendarioTrabalho, feriados_nacionais, pascoa
+
+
+@pytest.fixture(autouse=True)
+def sem_municipais(tmp_path, monkeypatch):
+    monkeypatch.setattr(calendario, "ARQ_FERIADOS_MUNICIPAIS", str(tmp_path / "nao_existe.csv"))
+
+
+@pytest.mark.parametrize("ano,esperado", [
+    (2000, date(2000, 4, 23)),
+    (2008, date(2008, 3, 23)),
+    (2019, date(2019, 4, 21)),
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2026, date(2026, 4, 5)),
+    (2038, date(2038, 4, 25)),
+    (2285, date(2285, 3, 22)),  # a mais cedo possível
+])
+def test_pascoa(ano, esperado):
+    assert pascoa(ano) == esperado
+
+
+@pytest.mark.parametrize("carnaval,sexta_santa,corpus", [
+    ((date(2024, 2, 12), date(2024, 2, 13)), date(2024, 3, 29), date(2024, 5, 30)),
+    ((date(2025, 3, 3), date(2025, 3, 4)), date(2025, 4, 18), date(2025, 6, 19)),
+    ((date(2026, 2, 16), date(2026, 2, 17)), date(2026, 4, 3), date(2026, 6, 4)),
+    ((date(2027, 2, 8), date(2027, 2, 9)), date(2027, 3, 26), date(2027, 5, 27)),
+])
+def test_feriados_moveis(carnaval, sexta_santa, corpus):
+    f = feriados_nacionais(corpus.year)
+    assert set(carnaval) <= f
+    assert sexta_santa in f and corpus in f
+    assert date(corpus.year, 4, 21) in f and date(corpus.year, 12, 25) in f
+    assert len(f) == 12
+
+
+def test_calendario_respeita_dias_da_semana_e_feriados():
+    cal = CalendarioTrabalho({"id": "p1", "dias_semana": "1,2,3,4,5"}, considerar_feriados=True)
+    assert cal.trabalha(date(2025, 3, 5))       # quarta de cinzas
+    assert not cal.trabalha(date(2025, 3, 4))   # carnaval
+    assert not cal.trabalha(date(2025, 3, 8))   # sábado
+    assert not cal.trabalha(date(2025, 6, 19))  # Corpus Christi
+    sem = CalendarioTrabalho({"id": "p1", "dias_semana": "1,2,3,4,5"}, considerar_feriados=False)
+    assert sem.trabalha(date(2025, 3, 4))
+
+
+def test_excecoes_bloqueio_extra_e_intervalo():
+    excecoes = [
+        {"data_inicio": "2025-07-07", "data_fim": "2025-07-09", "tipo": "bloqueio"},  # férias seg-qua
+        {"data_inicio": "2025-07-12", "tipo": "extra"},                              # sábado extra
+        {"data_inicio": "2025-07-08", "tipo": "extra"},                              # bloqueio vence
+    ]
+    cal = CalendarioTrabalho({"id": "p2", "dias_semana": "1,2,3,4,5"}, excecoes, considerar_feriados=False)
+    dias = list(cal.dias_uteis(date(2025, 7, 7), date(2025, 7, 13)))
+    assert dias == [date(2025, 7, 10), date(2025, 7, 11), date(2025, 7, 12)]
+
+
+def test_municipais_do_arquivo(tmp_path, monkeypatch):
+    arq = tmp_path / "municipais.csv"
+    arq.write_text("data,nome\n01-25,Aniversário da cidade\n2025-08-15,Assunção de Nossa Senhora\n", encoding="utf-8")
+    monkeypatch.setattr(calendario, "ARQ_FERIADOS_MUNICIPAIS", str(arq))
+    cal = CalendarioTrabalho({"id": "p3", "dias_semana": "1,2,3,4,5,6,7"}, considerar_feriados=True)
+    assert not cal.trabalha(date(2026, 1, 25))
+    assert not cal.trabalha(date(2025, 8, 15))
+    assert cal.trabalha(date(2026, 8, 15))
+
+
+class _ErroPostgrest(Exception):
+    def __init__(self, code, msg):
+        super().__init__(msg)
+        self.code = code
+
+
+@pytest.mark.parametrize("erro", [
+    _ErroPostgrest("PGRST205", "Could not find the table 'public.ag_calendario_excecoes' in the schema cache"),
+    _ErroPostgrest("42P01", 'relation "ag_calendario_excecoes" does not exist'),
+])
+def test_excecoes_sem_tabela_viram_lista_vazia(monkeypatch, erro):
+    database = pytest.importorskip("database")
+
+    def falha(*a, **kw):
+        raise erro
+
+    monkeypatch.setattr(database, "listar_registros", falha)
+    assert calendario.carregar_excecoes([1], date(2025, 1, 1), date(2025, 1, 31)) == []
+
+
+@pytest.mark.parametrize("erro", [
+    _ErroPostgrest("PGRST301", "JWT expired"),
+    ConnectionError("timeout"),
+])
+def test_excecoes_com_outra_falha_sobem(monkeypatch, erro):
+    database = pytest.importorskip("database")
+
+    def falha(*a, **kw):
+        raise erro
+
+    monkeypatch.setattr(database, "listar_registros", falha)
+    with pytest.raises(type(erro)):
+        calendario.carregar_excecoes([1], date(2025, 1, 1), date(2025, 1, 31))
@@ -0,0 +1,21 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+faltando = [m for m in ("streamlit", "supabase") if importlib.util.find_spec(m) is None]
+
+
+@pytest.mark.skipif(bool(faltando), reason=f"dependências ausentes: {', '.join(faltando)}")
+def test_partida_dentro_do_orcamento():
+    # o próprio bench confere o orçamento (AGENDA_COLD_START_MS) e os módulos sob demanda
+    proc = subprocess.run(
+        [sys.executable, os.path.join(BASE_DIR, "bench_cold_start.py")],
+        cwd=BASE_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    assert "OK" in proc.stdout
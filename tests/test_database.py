@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+import database  # noqa: E402
+
+
+class _SemBanco:
+    def __getattr__(self, nome):
+        raise AssertionError("a guarda deveria barrar antes de montar a consulta")
+
+
+@pytest.fixture(autouse=True)
+def sem_banco(monkeypatch):
+    monkeypatch.setattr(database, "supabase", _SemBanco())
+
+
+def test_excluir_com_in_so_de_none_e_barrado():
+    with pytest.raises(ValueError):
+        database.excluir_registros("ag_clientes", in_={"id": None})
+
+
+def test_excluir_com_filtros_e_in_none_e_barrado():
+    with pytest.raises(ValueError):
+        database.excluir_registros("ag_clientes", filtros={"profissional_id": None}, in_={"id": None, "x": None})
+
+
+def test_atualizar_sem_filtro_e_barrado():
+    with pytest.raises(ValueError):
+        database.atualizar_registros("ag_agenda", {"status": "Cancelado"}, in_={"id": None})
+    with pytest.raises(ValueError):
+        database.atualizar_registros("ag_agenda", {"status": "Cancelado"})
+
+
+class _ConexaoFalsa:
+    def __init__(self, ping_lento=None):
+        self.closed = False
+        self.ping_lento = ping_lento  # threading.Event que o SELECT 1 espera
+
+    def cursor(self):
+        conexao = self
+
+        class _Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if conexao.ping_lento is not None:
+                    conexao.ping_lento.wait(2)
+
+        return _Cursor()
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return 0
+
+    def close(self):
+        self.closed = True
+
+
+def test_health_check_lento_nao_segura_o_lock_do_pool(monkeypatch):
+    import threading
+    import time
+
+    pytest.importorskip("psycopg2")
+    lento = threading.Event()
+    pool = database._PoolConexoes(min_conn=0, max_conn=2, idle_s=3600, ping_s=0, timeout_s=1)
+    pool._ociosas.append((_ConexaoFalsa(ping_lento=lento), time.monotonic() - 10))
+
+    t = threading.Thread(target=pool.obter)
+    t.start()
+    time.sleep(0.05)  # a thread está parada no SELECT 1
+    t0 = time.monotonic()
+    stats = pool.estatisticas()
+    assert time.monotonic() - t0 < 0.5
+    assert stats["em_uso"] == 1 and stats["ociosas"] == 0
+    lento.set()
+    t.join(2)
+    assert pool.estatisticas()["reutilizadas"] == 1
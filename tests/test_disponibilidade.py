@@ -0,0 +1,105 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from bench_disponibilidade import _agenda_sintetica, grade_original
+from disponibilidade import (
+    IndiceAgenda, _seg, _slots_do_dia, grade_disponibilidade, indice_do_dia, primeiros_horarios_livres, tem_conflito,
+)
+
+PROF_ID = "1"
+PROF = {"dias_semana": "1,2,3,4,5,6,7"}
+DIA = date(2025, 3, 10)
+
+
+def _ag(ini, fim, cliente="", status="Pendente", dia=DIA):
+    return {
+        "profissional_id": PROF_ID, "data_atendimento": str(dia),
+        "hora_inicio": ini + ":00", "hora_fim": fim + ":00",
+        "cliente_nome": cliente, "status": status, "observacoes": "",
+    }
+
+
+def _args(dados, cap, ini=DIA, fim=DIA, slot=30, buffer=0, almoco=(time(12, 0), time(13, 0))):
+    return (dados, PROF, PROF_ID, ini, fim, time(8, 0), time(18, 0), slot, buffer,
+            almoco[0], almoco[1], False, cap)
+
+
+CASOS = {
+    "sobrepostos": [_ag("09:00", "10:00", "Ana"), _ag("09:30", "10:30", "Bia"), _ag("09:45", "09:50", "")],
+    "encostados": [_ag("08:00", "08:30", "Ana"), _ag("08:30", "09:00", "Bia")],
+    "atravessa_almoco": [_ag("11:45", "13:15", "Caio")],
+    "sem_nome": [_ag("14:00", "15:00", ""), _ag("14:00", "14:30", "")],
+    "invertido": [_ag("16:00", "15:00", "Dani"), _ag("15:30", "16:30", "Edu")],
+    "dentro_do_slot": [_ag("10:05", "10:10", "Fabi"), _ag("10:10", "10:20", "Gil"), _ag("10:15", "10:25", "")],
+}
+
+
+@pytest.mark.parametrize("cap", [1, 2, 3])
+@pytest.mark.parametrize("caso", sorted(CASOS))
+def test_sweep_igual_ao_loop_original(caso, cap):
+    args = _args(CASOS[caso], cap)
+    assert grade_disponibilidade(*args) == grade_original(*args)
+
+
+@pytest.mark.parametrize("cap,slot,buffer", [(1, 15, 0), (2, 30, 5), (3, 45, 10)])
+def test_sweep_igual_ao_loop_original_em_agenda_sintetica(cap, slot, buffer):
+    ini = date(2025, 1, 1)
+    dados = _agenda_sintetica(PROF_ID, ini, 30, 25, seed=cap)
+    args = _args(dados, cap, ini=ini, fim=ini + timedelta(days=29), slot=slot, buffer=buffer)
+    assert grade_disponibilidade(*args) == grade_original(*args)
+
+
+def test_almoco_nao_gera_slot():
+    slots = _slots_do_dia(time(8, 0), time(18, 0), 60, 0, time(12, 0), time(13, 0))
+    assert (_seg(time(12, 0)), _seg(time(13, 0))) not in slots
+    assert all(not (s < _seg(time(13, 0)) and e > _seg(time(12, 0))) for s, e in slots)
+    assert len(slots) == 9
+
+
+def test_indice_conta_sobreposicoes_como_a_forca_bruta():
+    dados = _agenda_sintetica(PROF_ID, DIA, 1, 40, seed=7)
+    idx = IndiceAgenda.de_registros(dados)
+    intervalos = [(_seg(time.fromisoformat(a["hora_inicio"])), _seg(time.fromisoformat(a["hora_fim"]))) for a in dados]
+    for s in range(_seg(time(7, 0)), _seg(time(19, 0)), 600):
+        e = s + 1800
+        esperado = sum(1 for a, b in intervalos if b >= a and a < e and b > s)
+        assert idx.ocupacao(DIA, s, e) == esperado
+
+
+def test_pico_igual_a_forca_bruta_por_minuto():
+    dados = _agenda_sintetica(PROF_ID, DIA, 1, 40, seed=7)
+    idx = IndiceAgenda.de_registros(dados)
+    intervalos = [(_seg(time.fromisoformat(a["hora_inicio"])), _seg(time.fromisoformat(a["hora_fim"]))) for a in dados]
+    for s in range(_seg(time(7, 0)), _seg(time(19, 0)), 600):
+        for dur in (600, 1800, 5400):
+            e = s + dur
+            esperado = max(sum(1 for a, b in intervalos if a <= t < b) for t in range(s, e, 60))
+            assert idx.pico(DIA, s, e) == esperado
+
+
+def test_capacidade_dois_com_atendimentos_encostados():
+    idx = indice_do_dia([_ag("09:00", "10:00", "Ana"), _ag("10:00", "11:00", "Bia")])
+    # nunca há mais de um ao mesmo tempo em 09-11: cabe com capacidade 2
+    assert not tem_conflito(idx, DIA, time(9, 0), time(11, 0), 2)
+    assert tem_conflito(idx, DIA, time(9, 0), time(11, 0), 1)
+    idx = indice_do_dia([_ag("09:00", "10:00", "Ana"), _ag("10:00", "11:00", "Bia"), _ag("10:30", "11:30", "Caio")])
+    assert tem_conflito(idx, DIA, time(9, 0), time(11, 0), 2)
+    assert not tem_conflito(idx, DIA, time(9, 0), time(10, 30), 2)
+
+
+def test_primeiros_horarios_usam_o_pico():
+    prof = {"id": PROF_ID, "nome": "Ana", **PROF, "hora_inicio_jornada": "09:00", "hora_fim_jornada": "11:00",
+            "capacidade_simultanea": 2}
+    ags = [_ag("09:00", "10:00", "Ana"), _ag("10:00", "11:00", "Bia")]
+    livres = primeiros_horarios_livres([prof], ags, datetime.combine(DIA, time(9, 0)), 1, 120)
+    assert [(h["hora_inicio"], h["hora_fim"]) for h in livres] == [(time(9, 0), time(11, 0))]
+
+
+def test_primeiros_horarios_ignoram_cancelados():
+    prof = {"id": PROF_ID, "nome": "Ana", **PROF, "hora_inicio_jornada": "09:00", "hora_fim_jornada": "10:00"}
+    ags = [_ag("09:00", "09:30", "Ana", status="Cancelado"), _ag("09:30", "10:00", "Bia")]
+    livres = primeiros_horarios_livres([prof], ags, datetime.combine(DIA, time(9, 0)), 1, 30)
+    assert [h["hora_inicio"] for h in livres] == [time(9, 0)]
+    # mesma regra da checagem na gravação
+    assert indice_do_dia(ags).ocupacao(DIA, _seg(time(9, 0)), _seg(time(9, 30))) == 0
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from fila_mensagens import (
+    CANAL_EMAIL, CANAL_WHATSAPP, ErroPermanente, ErroTransitorio, FilaMemoria, TransporteHTTP, WorkerFila,
+    mensagem, servidor_local,
+)
+
+
+def _msgs(n, canal=CANAL_WHATSAPP):
+    return [mensagem(canal, f"55119{i:08d}", f"Lembrete {i}", f"teste:{i}") for i in range(n)]
+
+
+class _TransporteContador:
+    def __init__(self, erro=None):
+        self.erro = erro
+        self.chamadas = 0
+
+    def enviar(self, msg):
+        self.chamadas += 1
+        if self.erro is not None:
+            raise self.erro
+
+
+@pytest.fixture
+def gateway():
+    srv, url = servidor_local(falha=0.3)
+    yield srv, url
+    srv.shutdown()
+
+
+def test_gateway_com_falhas_recebe_cada_chave_uma_vez(gateway):
+    random.seed(1234)
+    srv, url = gateway
+    fila = FilaMemoria(_msgs(200))
+    worker = WorkerFila(
+        fila, {CANAL_WHATSAPP: TransporteHTTP(url, timeout=5)},
+        threads=8, por_segundo=0, max_tentativas=40, backoff_base=0.001,
+    )
+    st = worker.rodar("vazia", ocioso_s=0.01)
+
+    assert st["enviadas"] == 200 and st["falhas"] == 0
+    assert st["reenvios"] > 0  # os 503 foram de fato exercitados
+    assert sorted(srv.recebidas) == sorted(f"teste:{i}" for i in range(200))
+    assert set(srv.recebidas.values()) == {1}
+    assert sorted(fila.enviadas) == list(range(1, 201))
+
+
+def test_chave_dedup_repetida_e_descartada():
+    msgs = _msgs(3)
+    fila = FilaMemoria(msgs + msgs[:1])
+    assert fila.adicionar([msgs[1], *_msgs(1, CANAL_EMAIL)]) == 0  # mesmas chaves "teste:0/1"
+    assert len(fila.reservar(10)) == 3
+
+
+def test_erro_permanente_vai_para_falhas_sem_reenvio():
+    transporte = _TransporteContador(ErroPermanente("HTTP 400"))
+    fila = FilaMemoria(_msgs(2))
+    st = WorkerFila(fila, {CANAL_WHATSAPP: transporte}, threads=2, por_segundo=0).rodar("vazia", ocioso_s=0.01)
+
+    assert transporte.chamadas == 2
+    assert st["falhas"] == 2 and st["reenvios"] == 0 and st["enviadas"] == 0
+    assert sorted(i for i, _ in fila.falhas) == [1, 2]
+    assert all("HTTP 400" in erro for _, erro in fila.falhas)
+
+
+def test_canal_sem_transporte_e_falha_permanente():
+    fila = FilaMemoria(_msgs(1, CANAL_EMAIL))
+    WorkerFila(fila, {}, threads=1, por_segundo=0).rodar("vazia", ocioso_s=0.01)
+    assert [i for i, _ in fila.falhas] == [1]
+
+
+def test_max_tentativas_e_respeitado():
+    transporte = _TransporteContador(ErroTransitorio("timeout"))
+    fila = FilaMemoria(_msgs(1))
+    st = WorkerFila(
+        fila, {CANAL_WHATSAPP: transporte}, threads=1, por_segundo=0, max_tentativas=3, backoff_base=0.001,
+    ).rodar("vazia", ocioso_s=0.01)
+
+    assert transporte.chamadas == 3
+    assert st["reenvios"] == 2 and st["falhas"] == 1
+    assert fila.falhas == [(1, "timeout")]
+    assert fila.proxima_em() is None
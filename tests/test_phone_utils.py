@@ -0,0 +1,54 @@
+import pytest
+
+from phone_utils import format_br_phone, normalize_br_phone, normalize_br_phones, sanitize_br_phone
+
+
+@pytest.mark.parametrize("entrada,esperado", [
+    ("1133334444", "551133334444"),              # 10 dígitos: fixo
+    ("(11) 3333-4444", "551133334444"),
+    ("11987654321", "5511987654321"),            # 11 dígitos: celular
+    ("(11) 98765-4321", "5511987654321"),
+    ("551133334444", "551133334444"),            # 12 dígitos: +55 e fixo
+    ("5511987654321", "5511987654321"),          # 13 dígitos: +55 e celular
+    ("+55 (11) 98765-4321", "5511987654321"),
+    ("011 98765-4321", "5511987654321"),         # 0 de longa distância
+    ("0055 11 3333-4444", "551133334444"),       # 00 internacional
+    ("5598765432", "555598765432"),              # DDD 55 sem código do país
+    ("(55) 98765-4321", "5555987654321"),
+])
+def test_normaliza_para_e164(entrada, esperado):
+    assert normalize_br_phone(entrada) == esperado
+
+
+@pytest.mark.parametrize("entrada", [None, "", "123", "98765-4321", "(00) 98765-4321", "551198765432100", "abc"])
+def test_invalidos_viram_none(entrada):
+    assert normalize_br_phone(entrada) is None
+
+
+def test_lote_igual_ao_unitario():
+    entradas = ["(11) 98765-4321", "+55 11 3333-4444", "0xx", None, "011987654321"]
+    assert normalize_br_phones(entradas) == [normalize_br_phone(e) for e in entradas]
+
+
+def test_lote_vetorizado_com_pandas():
+    pd = pytest.importorskip("pandas")
+    entradas = ["(11) 98765-4321", "+55 11 3333-4444", "123", None, "011987654321"]
+    out = normalize_br_phones(pd.Series(entradas))
+    assert [None if pd.isna(v) else v for v in out] == [normalize_br_phone(e) for e in entradas]
+
+
+@pytest.mark.parametrize("entrada,esperado", [
+    ("11987654321", "(11) 98765-4321"),
+    ("+55 11 98765-4321", "(11) 98765-4321"),
+    ("1133334444", "(11) 3333-4444"),
+    ("1", "(1"),
+    ("1198", "(11) 98"),
+    ("", ""),
+])
+def test_formatacao(entrada, esperado):
+    assert format_br_phone(entrada) == esperado
+
+
+def test_sanitize_usa_e164_quando_valido():
+    assert sanitize_br_phone("(11) 98765-4321") == "5511987654321"
+    assert sanitize_br_phone("123") == "123"
@@ -0,0 +1,104 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+import calendario
+from calendario import CalendarioTrabalho
+from recorrencia import MAX_OCORRENCIAS, expandir, planejar
+
+
+@pytest.fixture(autouse=True)
+def sem_municipais(tmp_path, monkeypatch):
+    monkeypatch.setattr(calendario, "ARQ_FERIADOS_MUNICIPAIS", str(tmp_path / "nao_existe.csv"))
+
+
+def test_termina_por_quantidade():
+    datas = expandir(date(2025, 2, 18), "semanal", quantidade=4)
+    assert datas == [date(2025, 2, 18), date(2025, 2, 25), date(2025, 3, 4), date(2025, 3, 11)]
+
+
+def test_termina_por_data_inclusive():
+    datas = expandir(date(2025, 2, 18), "semanal", 2, ate=date(2025, 3, 18))
+    assert datas == [date(2025, 2, 18), date(2025, 3, 4), date(2025, 3, 18)]
+
+
+def test_quantidade_e_data_vale_o_que_vier_primeiro():
+    assert len(expandir(date(2025, 1, 6), "semanal", ate=date(2025, 12, 31), quantidade=3)) == 3
+    assert len(expandir(date(2025, 1, 6), "semanal", ate=date(2025, 1, 20), quantidade=10)) == 3
+
+
+def test_mensal_no_dia_31_cai_no_ultimo_dia_e_volta_ao_31():
+    datas = expandir(date(2024, 1, 31), "mensal", quantidade=4)
+    assert datas == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+
+
+def test_limite_de_ocorrencias_e_regra_sem_fim():
+    assert len(expandir(date(2025, 1, 1), "semanal", ate=date(2030, 1, 1))) == MAX_OCORRENCIAS
+    with pytest.raises(ValueError):
+        expandir(date(2025, 1, 1), "semanal")
+
+
+def test_planejar_pula_feriado_e_horario_ocupado():
+    # terças 10:00-11:00; 04/03/2025 é carnaval e 18/03 já tem atendimento no horário
+    datas = expandir(date(2025, 2, 25), "semanal", ate=date(2025, 3, 25))
+    cal = CalendarioTrabalho({"id": "p1", "dias_semana": "1,2,3,4,5"}, considerar_feriados=True)
+    existentes = [
+        {"id": 1, "data_atendimento": "2025-03-18", "hora_inicio": "10:30:00", "hora_fim": "11:30:00", "status": "Confirmado"},
+        {"id": 2, "data_atendimento": "2025-03-11", "hora_inicio": "10:00:00", "hora_fim": "11:00:00", "status": "Cancelado"},
+        {"id": 3, "data_atendimento": "2025-03-25", "hora_inicio": "11:00:00", "hora_fim": "12:00:00", "status": "Pendente"},
+    ]
+    livres, recusadas = planejar(datas, time(10, 0), time(11, 0), 1, existentes, cal)
+    assert livres == [date(2025, 2, 25), date(2025, 3, 11), date(2025, 3, 25)]
+    assert recusadas == [(date(2025, 3, 4), "dia sem expediente"), (date(2025, 3, 18), "horário ocupado")]
+
+
+def test_planejar_com_capacidade_e_ignorando_a_propria_serie():
+    datas = [date(2025, 5, 6) + timedelta(weeks=i) for i in range(3)]
+    existentes = [
+        {"id": 10, "data_atendimento": str(d), "hora_inicio": "09:00:00", "hora_fim": "10:00:00", "status": "Pendente"}
+        for d in datas
+    ]
+    livres, recusadas = planejar(datas, time(9, 0), time(10, 0), 1, existentes)
+    assert livres == [] and len(recusadas) == 3
+    assert planejar(datas, time(9, 0), time(10, 0), 2, existentes)[0] == datas
+    assert planejar(datas, time(9, 0), time(10, 0), 1, existentes, ignorar_ids={10})[0] == datas
+
+
+class _ErroPostgrest(Exception):
+    def __init__(self, code, msg):
+        super().__init__(msg)
+        self.code = code
+
+
+def test_serie_sem_coluna_e_avulso(monkeypatch):
+    database = pytest.importorskip("database")
+    from recorrencia import serie_do_atendimento
+
+    def falha(*a, **kw):
+        raise _ErroPostgrest("42703", "column ag_agenda.serie_id does not exist")
+
+    monkeypatch.setattr(database, "listar_registros", falha)
+    assert serie_do_atendimento(1) is None
+
+
+@pytest.mark.parametrize("erro", [_ErroPostgrest("PGRST301", "JWT expired"), ConnectionError("timeout")])
+def test_serie_com_outra_falha_sobe(monkeypatch, erro):
+    database = pytest.importorskip("database")
+    from recorrencia import serie_do_atendimento
+
+    def falha(*a, **kw):
+        raise erro
+
+    monkeypatch.setattr(database, "listar_registros", falha)
+    with pytest.raises(type(erro)):
+        serie_do_atendimento(1)
+
+
+def test_serie_do_atendimento(monkeypatch):
+    database = pytest.importorskip("database")
+    from recorrencia import serie_do_atendimento
+
+    monkeypatch.setattr(database, "listar_registros", lambda *a, **kw: [{"serie_id": 7}])
+    assert serie_do_atendimento(1) == 7
+    monkeypatch.setattr(database, "listar_registros", lambda *a, **kw: [])
+    assert serie_do_atendimento(1) is None
@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("dotenv")
+
+import database  # noqa: E402
+import relatorios  # noqa: E402
+
+INI, FIM = date(2025, 3, 10), date(2025, 3, 12)  # anterior: 07/03 a 09/03
+
+
+def _item(id, prof, serv, servico, cli, cliente, dia, qtd, valor):
+    return {
+        "id": id, "profissional_id": prof, "tipo_servico_id": serv, "cliente_id": cli,
+        "cliente_nome": cliente, "servico_nome": servico, "data_atendimento": dia,
+        "quantidade": qtd, "valor_total": valor,
+    }
+
+
+ITENS = [
+    _item(1, 1, 10, "Corte", 100, "Ana", "2025-03-10", 1, "50.00"),
+    _item(2, 1, 10, "Corte", 101, "Bia", "2025-03-10", 2, 100.0),
+    _item(3, 2, 20, "Barba", 100, "Ana", "2025-03-12", 1, 30.0),
+    _item(4, 1, None, None, None, None, "2025-03-12", 1, 20.0),        # serviço e cliente removidos
+    _item(5, 1, 10, "Corte", 100, "Ana", "2025-03-08", 1, 40.0),
+    _item(6, 1, 30, "Hidratação", 102, "Caio", "2025-03-07", 1, 60.0),  # só no período anterior
+]
+
+
+@pytest.fixture
+def df():
+    return relatorios._tipar(pd.DataFrame.from_records(ITENS, columns=relatorios.COLS_ITENS))
+
+
+@pytest.fixture
+def rel(df, monkeypatch):
+    monkeypatch.setattr(relatorios, "listar_registros", lambda *a, **kw: [{"id": 1, "nome": "Ana P."}, {"id": 2, "nome": "Bruno"}])
+    return relatorios.montar_relatorio(df, INI, FIM)
+
+
+def test_periodo_anterior_de_mesmo_tamanho():
+    assert relatorios.periodo_anterior(INI, FIM) == (date(2025, 3, 7), date(2025, 3, 9))
+
+
+def test_por_dia_inclui_dias_sem_faturamento(rel):
+    d = rel["por_dia"]
+    assert list(d["data"].dt.date) == [date(2025, 3, 10), date(2025, 3, 11), date(2025, 3, 12)]
+    assert d["faturamento"].tolist() == [150.0, 0.0, 50.0]
+    assert d["itens"].tolist() == [2, 0, 2]
+    assert d["ticket_medio"].tolist() == [75.0, 0.0, 25.0]
+
+
+def test_resumo_e_deltas(rel):
+    r = rel["resumo"]
+    assert r["faturamento"] == {"atual": 200.0, "anterior": 100.0, "variacao": 100.0, "variacao_pct": 100.0}
+    assert r["itens"]["atual"] == 4 and r["itens"]["anterior"] == 2
+    assert r["ticket_medio"]["atual"] == 50.0
+    assert r["clientes"]["atual"] == 2  # cliente removido (NaN) não conta
+
+
+def test_deltas_sem_base_nao_tem_percentual():
+    d = relatorios._deltas({"faturamento": 10.0}, {"faturamento": 0})
+    assert d["faturamento"]["variacao"] == 10.0 and d["faturamento"]["variacao_pct"] is None
+
+
+def test_por_servico_mantem_itens_sem_servico(rel):
+    s = rel["por_servico"]
+    assert s["faturamento"].tolist() == [150.0, 30.0, 20.0]
+    assert s["servico_nome"].tolist() == ["Corte", "Barba", "(serviço removido)"]
+    assert s["tipo_servico_id"].isna().tolist() == [False, False, True]
+    assert s["participacao_pct"].tolist() == [75.0, 15.0, 10.0]
+    c = rel["por_cliente"]
+    assert c["cliente_nome"].tolist() == ["Bia", "Ana", "(sem nome)"]
+    assert c["faturamento"].tolist() == [100.0, 80.0, 20.0]
+
+
+def test_comparacao_com_periodo_anterior(rel):
+    c = rel["servicos_vs_anterior"].set_index("servico_nome")
+    assert c.loc["Corte", "faturamento_anterior"] == 40.0
+    assert c.loc["Corte", "variacao"] == 110.0
+    assert c.loc["Corte", "variacao_pct"] == pytest.approx(275.0)
+    # só existiu no período anterior: nome vem de lá, queda de 100%
+    assert c.loc["Hidratação", "faturamento"] == 0.0
+    assert c.loc["Hidratação", "variacao"] == -60.0
+    assert c.loc["Hidratação", "variacao_pct"] == -100.0
+    # novo no período: sem base, percentual indefinido
+    assert c.loc["Barba", "faturamento_anterior"] == 0.0
+    assert pd.isna(c.loc["Barba", "variacao_pct"])
+    assert c.loc["(serviço removido)", "faturamento"] == 20.0
+    assert rel["servicos_vs_anterior"]["variacao"].tolist() == sorted(c["variacao"].tolist(), reverse=True)
+
+
+def test_por_profissional_com_nomes(rel):
+    p = rel["por_profissional"].set_index("profissional_id")
+    assert p.loc["1", "faturamento"] == 170.0 and p.loc["1", "profissional"] == "Ana P."
+    assert p.loc["2", "faturamento"] == 30.0 and p.loc["2", "profissional"] == "Bruno"
+
+
+def test_itens_do_periodo_atual(rel):
+    assert rel["itens"]["id"].tolist() == [1, 2, 3, 4]
+
+
+def test_escrita_em_ag_servicos_derruba_o_cache_do_tenant_e_o_consolidado(df, monkeypatch):
+    leituras = []
+
+    def carregar(prof_id, ini, fim):
+        leituras.append(prof_id)
+        return df
+
+    monkeypatch.setattr(relatorios, "carregar_itens", carregar)
+    monkeypatch.setattr(relatorios, "listar_registros", lambda *a, **kw: [])
+    relatorios.invalidar()
+    for prof in (1, 2, None):
+        relatorios.relatorio(prof, INI, FIM)
+    relatorios.relatorio(1, INI, FIM)
+    assert leituras == [1, 2, None]
+
+    database.limpar_cache("ag_servicos", 1)
+    for prof in (1, 2, None):
+        relatorios.relatorio(prof, INI, FIM)
+    assert leituras == [1, 2, None, 1, None]  # o tenant 2 continuou em cache
+    relatorios.invalidar()
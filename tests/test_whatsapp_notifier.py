@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import whatsapp_notifier
+
+DIA = date(2025, 3, 10)
+
+
+def _ag(prof_id, hora, status="Pendente"):
+    return {
+        "profissional_id": prof_id, "cliente_nome": "Cli", "cliente_telefone": "(11) 98765-4321",
+        "data_atendimento": str(DIA), "hora_inicio": hora, "status": status,
+    }
+
+
+def test_lembretes_filtram_profissionais_no_banco(monkeypatch):
+    chamadas = []
+
+    def iterar(tabela, filtros=None, **kw):
+        chamadas.append((tabela, filtros, kw))
+        return iter([_ag("1", "10:00:00"), _ag("1", "09:00:00"), _ag("1", "11:00:00", "Cancelado"), _ag("2", "09:00:00")])
+
+    monkeypatch.setattr(whatsapp_notifier, "profissionais_notificaveis", lambda flag: {"1": "Ana", "2": "Bia"})
+    monkeypatch.setattr(whatsapp_notifier, "iterar_registros", iterar)
+    out = list(whatsapp_notifier.lembretes_do_dia(DIA))
+
+    [(tabela, filtros, kw)] = chamadas
+    assert tabela == "ag_agenda" and filtros == {"data_atendimento": str(DIA)}
+    assert sorted(kw["in_"]["profissional_id"]) == ["1", "2"]
+    assert [(p, n, [l["hora"] for l in ls]) for p, n, ls in out] == [
+        ("1", "Ana", ["09:00:00", "10:00:00"]),
+        ("2", "Bia", ["09:00:00"]),
+    ]
+
+
+def test_lembretes_em_lotes_de_ids(monkeypatch):
+    profs = {str(i): f"P{i}" for i in range(5)}
+    agenda = [_ag(p, "09:00:00") for p in sorted(profs)] + [_ag("9", "09:00:00")]
+    lotes = []
+
+    def iterar(tabela, filtros=None, order_col=None, in_=None, **kw):
+        ids = in_["profissional_id"]
+        lotes.append(ids)
+        return iter([a for a in agenda if a["profissional_id"] in ids])
+
+    monkeypatch.setattr(whatsapp_notifier, "LOTE_IDS", 2)
+    monkeypatch.setattr(whatsapp_notifier, "profissionais_notificaveis", lambda flag: profs)
+    monkeypatch.setattr(whatsapp_notifier, "iterar_registros", iterar)
+    out = list(whatsapp_notifier.lembretes_do_dia(DIA))
+
+    assert [len(l) for l in lotes] == [2, 2, 1]
+    assert sorted(i for l in lotes for i in l) == sorted(profs)
+    assert [p for p, _, _ in out] == sorted(profs)
+
+
+def test_sem_profissionais_notificaveis_nao_le_a_agenda(monkeypatch):
+    def iterar(*a, **kw):
+        raise AssertionError("não deveria ler ag_agenda")
+
+    monkeypatch.setattr(whatsapp_notifier, "profissionais_notificaveis", lambda flag: {})
+    monkeypatch.setattr(whatsapp_notifier, "iterar_registros", iterar)
+    assert list(whatsapp_notifier.lembretes_do_dia(DIA)) == []
+
+
+def test_agendamentos_do_telefone_filtra_status_antes_do_limite(monkeypatch):
+    chamadas = []
+
+    def listar(tabela, filtros=None, **kw):
+        chamadas.append((tabela, filtros, kw))
+        return [_ag("1", "09:00:00")]
+
+    monkeypatch.setattr(whatsapp_notifier, "listar_registros", listar)
+    out = whatsapp_notifier.agendamentos_do_telefone("+55 (11) 98765-4321", DIA, limite=3)
+
+    [(tabela, filtros, kw)] = chamadas
+    assert filtros == {"cliente_telefone_digitos": "5511987654321"}
+    assert kw["limit"] == 3
+    assert sorted(kw["in_"]["status"]) == ["Confirmado", "Pendente"]
+    assert not set(kw["in_"]["status"]) & whatsapp_notifier.STATUS_SEM_LEMBRETE
+    assert out == [_ag("1", "09:00:00")]
+
+
+def test_agendamentos_do_telefone_invalido_nao_consulta(monkeypatch):
+    monkeypatch.setattr(whatsapp_notifier, "listar_registros", lambda *a, **kw: pytest.fail("consultou"))
+    assert whatsapp_notifier.agendamentos_do_telefone("123") == []
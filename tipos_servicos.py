@@ -1,6 +1,7 @@
 
 import streamlit as st
 from database import listar_registros, inserir_registro, atualizar_registro, excluir_registro
+from utils_ui import show_logo
 
 TABELA = "ag_tipos_servicos"
 FORM_NS = "tipos_serv_form_v"
@@ -8,7 +9,7 @@ FORM_NS = "tipos_serv_form_v"
 def _header():
     col_logo, col_title = st.columns([1, 6])
     with col_logo:
-        st.image("start.png", width=80)
+        show_logo(width=80)
     with col_title:
         st.markdown("<h2>Tipos de Serviços</h2>", unsafe_allow_html=True)
 
@@ -1,17 +1,117 @@
+from database import LOTE_IDS, listar_registros, iterar_registros
+from datetime import datetime, date, timedelta
+from itertools import groupby
+from urllib.parse import quote
+from phone_utils import sanitize_br_phone, normalize_br_phone
 
-from database import listar_registros
-from datetime import datetime, timedelta
-from phone_utils import sanitize_br_phone
+COLS_LEMBRETE = ["id", "profissional_id", "cliente_id", "cliente_nome", "cliente_telefone", "data_atendimento", "hora_inicio", "status"]
+STATUS_SEM_LEMBRETE = {"Cancelado", "Concluído"}
+STATUS_ATIVOS = ["Pendente", "Confirmado"]  # os demais status de agenda.STATUS
+
+def _mensagem(profissional_nome: str, ag: dict) -> str:
+    return f"Aqui é {profissional_nome}, você tem um horário agendado no dia {ag['data_atendimento']} às {ag['hora_inicio']} hrs. Digite 1 para Confirmar e 2 Cancelar"
+
+def _lembrete(profissional_nome: str, ag: dict) -> dict:
+    numero = sanitize_br_phone(ag.get("cliente_telefone", ""))
+    msg = _mensagem(profissional_nome, ag)
+    return {
+        "agenda_id": ag.get("id"),
+        "cliente_id": ag.get("cliente_id"),
+        "cliente": ag.get("cliente_nome"),
+        "data": ag.get("data_atendimento"),
+        "hora": ag.get("hora_inicio"),
+        "telefone": numero,
+        "mensagem": msg,
+        "link": f"https://wa.me/{numero}?text={quote(msg)}",
+    }
 
 def notificar_agendamentos(profissional_id: str, profissional_nome: str):
     hoje = datetime.today().date()
     amanha = hoje + timedelta(days=1)
-    ags = listar_registros("ag_agenda", {"profissional_id": profissional_id})
+    ags = listar_registros(
+        "ag_agenda",
+        {"profissional_id": profissional_id, "data_atendimento": str(amanha)},
+        colunas=["cliente_nome", "cliente_telefone", "data_atendimento", "hora_inicio"],
+        order="hora_inicio",
+    )
     links = []
     for ag in ags:
-        if str(ag["data_atendimento"]) == str(amanha):
-            numero = sanitize_br_phone(ag.get("cliente_telefone", ""))
-            msg = f"Aqui é {profissional_nome}, você tem um horário agendado no dia {ag['data_atendimento']} às {ag['hora_inicio']} hrs. Digite 1 para Confirmar e 2 Cancelar"
-            link = f"https://wa.me/{numero}?text={msg.replace(' ', '%20')}"
-            links.append({"cliente": ag.get("cliente_nome"), "link": link})
+        lembrete = _lembrete(profissional_nome, ag)
+        links.append({"cliente": lembrete["cliente"], "link": lembrete["link"]})
     return links
+
+def profissionais_notificaveis(flag: str = "whatsapp_notificar") -> dict:
+    """{id: nome} dos profissionais com a notificação `flag` ligada (whatsapp_notificar / email_notificar)."""
+    rows = listar_registros("ag_profissionais", {flag: True}, colunas=["id", "nome"])
+    return {str(p["id"]): p.get("nome", "") for p in rows}
+
+def lembretes_do_dia(dia: date | None = None, flag: str = "whatsapp_notificar"):
+    """
+    Lembretes de todos os profissionais notificáveis para `dia` (padrão: amanhã).
+    Uma leitura dos profissionais e uma varredura da agenda filtrada pela data e
+    por esses profissionais (in_, em lotes de LOTE_IDS ids), ordenada por
+    profissional; entrega (profissional_id, nome, [lembretes]) um profissional
+    por vez, sem montar o dia inteiro em memória.
+    """
+    dia = dia or (datetime.today().date() + timedelta(days=1))
+    profs = profissionais_notificaveis(flag)
+    if not profs:
+        return
+    ids = sorted(profs)
+    for i in range(0, len(ids), LOTE_IDS):
+        ags = iterar_registros(
+            "ag_agenda",
+            {"data_atendimento": str(dia)},
+            order_col="profissional_id",
+            colunas=COLS_LEMBRETE,
+            in_={"profissional_id": ids[i:i + LOTE_IDS]},
+        )
+        for prof_id, grupo in groupby(ags, key=lambda a: str(a.get("profissional_id"))):
+            nome = profs.get(prof_id)
+            if nome is None:
+                continue
+            itens = sorted(
+                (a for a in grupo if a.get("status") not in STATUS_SEM_LEMBRETE),
+                key=lambda a: str(a.get("hora_inicio")),
+            )
+            if itens:
+                yield prof_id, nome, [_lembrete(nome, a) for a in itens]
+
+def agendamentos_do_telefone(telefone: str, a_partir: date | None = None, limite: int = 5) -> list:
+    """
+    Próximos atendimentos do número que respondeu ao lembrete (o wa.me/remetente chega
+    em qualquer formato). Igualdade na coluna gerada cliente_telefone_digitos (sql/011),
+    pelo índice (cliente_telefone_digitos, data_atendimento). O status é filtrado no
+    banco, antes do limite: cancelados não tomam o lugar de atendimentos ativos.
+    """
+    digitos = normalize_br_phone(telefone)
+    if not digitos:
+        return []
+    return listar_registros(
+        "ag_agenda",
+        {"cliente_telefone_digitos": digitos},
+        colunas=COLS_LEMBRETE,
+        gte={"data_atendimento": str(a_partir or datetime.today().date())},
+        in_={"status": STATUS_ATIVOS},
+        order="data_atendimento",
+        limit=limite,
+    )
+
+if __name__ == "__main__":
+    # Uso: python whatsapp_notifier.py [AAAA-MM-DD]  (cron: diário, gera os lembretes de amanhã)
+    import csv
+    import sys
+    import time
+
+    t0 = time.perf_counter()
+    dia = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else None
+    out = csv.writer(sys.stdout)
+    out.writerow(["profissional_id", "profissional", "agenda_id", "cliente", "telefone", "link"])
+    n_profs = n_msgs = 0
+    for prof_id, nome, lembretes in lembretes_do_dia(dia):
+        n_profs += 1
+        for l in lembretes:
+            out.writerow([prof_id, nome, l["agenda_id"], l["cliente"], l["telefone"], l["link"]])
+        n_msgs += len(lembretes)
+        sys.stdout.flush()
+    print(f"{n_msgs} lembretes de {n_profs} profissionais em {time.perf_counter() - t0:.2f}s", file=sys.stderr)